@@ -0,0 +1,72 @@
+"""Benchmark incremental indexer updates against full rebuilds.
+
+Run with: PYTHONPATH=src python benchmarks/indexer_incremental.py [nb_objects] [nb_updates]
+"""
+import dataclasses
+import random
+import sys
+import timeit
+
+import propt.adapters.indexer as indexer
+
+
+@dataclasses.dataclass
+class FakeRecipe:
+    name: str
+    products: tuple[str, ...]
+    temperatures: tuple[tuple[str, int], ...]
+
+
+def make_recipes(nb_objects: int, rng: random.Random) -> list[FakeRecipe]:
+    return [
+        FakeRecipe(
+            name=f"recipe-{idx}",
+            products=tuple(f"item-{rng.randrange(nb_objects // 4)}" for _ in range(3)),
+            temperatures=((f"fluid-{rng.randrange(50)}", rng.randrange(15, 2000)),),
+        )
+        for idx in range(nb_objects)
+    ]
+
+
+def make_composite() -> indexer.CompositeIndexer[FakeRecipe]:
+    return indexer.CompositeIndexer(
+        by_name=indexer.OneToOneIndexer(lambda recipe: recipe.name),
+        by_product=indexer.MultiToMultiIndexer(lambda recipe: recipe.products),
+        by_temperature=indexer.RangeIndexer(lambda recipe: recipe.temperatures),
+    )
+
+
+def main(nb_objects: int = 20_000, nb_updates: int = 50) -> None:
+    rng = random.Random(42)
+    recipes = make_recipes(nb_objects, rng)
+    replacements = make_recipes(nb_updates, rng)
+    positions = rng.sample(range(nb_objects), nb_updates)
+
+    def rebuild() -> None:
+        collection = list(recipes)
+        composite = make_composite()
+        for position, new in zip(positions, replacements):
+            collection[position] = new
+            composite.set_collection(collection)
+
+    composite = make_composite()
+    initial = timeit.timeit(lambda: composite.set_collection(recipes), number=1)
+    rebuild_time = timeit.timeit(rebuild, number=1)
+    incremental_time = timeit.timeit(
+        lambda: [
+            composite.replace(recipes[position], new)
+            for position, new in zip(positions, replacements)
+        ],
+        number=1,
+    )
+    print(f"{nb_objects} objects, {nb_updates} updates over 3 indexes")
+    print(f"initial build:      {initial * 1000:10.2f} ms")
+    print(f"full rebuilds:      {rebuild_time * 1000:10.2f} ms ({rebuild_time / nb_updates * 1e6:.1f} µs/update)")
+    print(
+        f"incremental update: {incremental_time * 1000:10.2f} ms "
+        f"({incremental_time / nb_updates * 1e6:.1f} µs/update)"
+    )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,79 @@
+"""Benchmark the optimizer backends on the same random scenarios.
+
+Run with: PYTHONPATH=src python benchmarks/optimizer_backends.py [nb_items ...]
+
+Each scenario has layers of items: every unit makes one item from a few items of the layers below, so the
+targets on the last layer are always reachable.
+"""
+import contextlib
+import io
+import random
+import sys
+import time
+
+import immutables
+
+import propt.adapters.optimizers as optimizers
+import propt.domain.optimizer.model as model_opt
+
+NB_LAYERS = 8
+UNITS_BY_ITEM = 3
+
+
+def make_scenario(
+    nb_items: int, rng: random.Random
+) -> tuple[model_opt.ProductionMap, list[tuple[model_opt.Item, float]]]:
+    items = [model_opt.Item(name=f"item-{idx}") for idx in range(nb_items)]
+    layer_size = max(1, nb_items // NB_LAYERS)
+    prod_units = []
+    for idx, item in enumerate(items):
+        lower_items = items[: idx - idx % layer_size]
+        for variant in range(UNITS_BY_ITEM):
+            ingredients = rng.sample(lower_items, min(len(lower_items), rng.randint(1, 4)))
+            prod_units.append(
+                model_opt.ProductionUnit(
+                    recipe_name=f"{item.name}-{variant}",
+                    building_name="assembler",
+                    ingredients=immutables.Map({ingredient: rng.uniform(0.5, 3) for ingredient in ingredients}),
+                    products=immutables.Map({item: rng.uniform(0.5, 2)}),
+                )
+            )
+    targets = [(item, rng.uniform(1, 10)) for item in rng.sample(items[-layer_size:], min(5, layer_size))]
+    return model_opt.ProductionMap(prod_units), targets
+
+
+def run(optimizer: model_opt.Optimizer) -> tuple[float, float, float]:
+    """Return the build time, the solve time and the objective."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        optimizer._build_model()  # type: ignore
+        built = time.perf_counter()
+        result = optimizer.optimize()
+        solved = time.perf_counter()
+    return built - start, solved - built, sum(prod_unit.quantity for prod_unit in result.production_units)
+
+
+def main(*sizes: int) -> None:
+    backends = {
+        "ortools-clp": lambda prod_map, targets: optimizers.ORToolsOptimizer(prod_map, targets, []),
+        **{
+            method: (lambda prod_map, targets, method=method: optimizers.HiGHSOptimizer(prod_map, targets, [], method))
+            for method in optimizers.HiGHSOptimizer.METHODS
+        },
+    }
+    rng = random.Random(42)
+    print(f"{'items':>7} {'units':>7} {'backend':>12} {'build ms':>10} {'solve ms':>10} {'objective':>14} {'gap':>9}")
+    for nb_items in sizes or (500, 5_000, 50_000):
+        prod_map, targets = make_scenario(nb_items, rng)
+        reference = None
+        for name, backend in backends.items():
+            build_time, solve_time, objective = run(backend(prod_map, targets))
+            reference = objective if reference is None else reference
+            print(
+                f"{nb_items:>7} {len(prod_map.production_units):>7} {name:>12} {build_time * 1000:>10.1f} "
+                f"{solve_time * 1000:>10.1f} {objective:>14.4f} {abs(objective - reference) / max(1, reference):>9.1e}"
+            )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -1,9 +1,10 @@
 import pathlib
-import pickle
 
 import more_itertools
 
 import propt.adapters.debug as debug
+import propt.adapters.graph_export as graph_export
+import propt.adapters.map_file as map_file
 import propt.adapters.factorio_repositories.json.buildings as building_repos
 import propt.adapters.factorio_repositories.json.objects as obj_repos
 import propt.adapters.factorio_repositories.json.recipes as recipe_repos
@@ -12,6 +13,7 @@ import propt.adapters.optimizers as optimizers
 import propt.data.pyanodons as factorio_data
 import propt.domain.factorio.object_set
 import propt.domain.factorio.prototypes
+import propt.domain.factorio.technology_graph as technology_graph
 import propt.domain.optimizer.model as new_opt_model
 
 
@@ -35,7 +37,7 @@ def add_mining_constraint(
     ]
     return [*array1, *array2]
 
-def main():
+def main() -> new_opt_model.ProductionMap:
     data_path = pathlib.Path(more_itertools.first(factorio_data.__path__))
     # buildings
     building_repo = building_repos.JSONFactorioAggregateBuildingRepository(
@@ -64,10 +66,12 @@ def main():
     # Techno
     tech_repo = tech_repos.JSONFactorioTechnologyRepository(data_path, recipe_repo)
 
+    tech_graph = technology_graph.TechnologyGraph(tech_repo)
     with open("techno.txt", "r") as f:
-        technologies = propt.domain.factorio.object_set.TechnologySet(
-            tech_repo[code.strip()] for code in f.readlines()
-        )
+        researched = [code.strip() for code in f.readlines() if code.strip()]
+    if missing := tech_graph.missing_prerequisites(researched):
+        print(f"techno.txt misses prerequisites: {sorted(tech.name for tech in missing)}")
+    technologies = tech_graph.closure(researched)
     # filter available recipes/buildings
     available_recipes = (
         propt.domain.factorio.object_set.RecipeSet.from_factorio_repositories(
@@ -186,12 +190,10 @@ def main():
     result = optim.optimize()
     debug.dump("results", result.production_units)
 
-    graph_begin = optimizers.NetworkXProductionGraph(prod_map)
-    graph_begin.write_dot(pathlib.Path("all.dot"))
-    graph = optimizers.NetworkXProductionGraph(result)
-    graph.write_dot(pathlib.Path("newnew.dot"))
-    with open("graphou", "wb") as f:
-        pickle.dump(graph.graph, f)
+    graph_export.export(prod_map, pathlib.Path("all.dot"))
+    graph_export.export(result, pathlib.Path("newnew.dot"))
+    map_file.write(result, pathlib.Path("solved.pmap"))
+    return result
 
 
 if __name__ == "__main__":
@@ -0,0 +1,113 @@
+"""Solve simple production chains without a linear program.
+
+When every item needed by the targets has a single producer and the units needed form no cycle, the
+number of each unit is fixed by the rates: going from the targets to the raw resources, a unit is needed
+as many times as its most demanded product requires, and its ingredients are demanded in turn. That is
+also the optimum of the LP, as any plan needs at least those units.
+"""
+from __future__ import annotations
+
+import collections
+from typing import Iterable, Optional
+
+import propt.adapters.solver_parameters as solver_parameters
+import propt.domain.optimizer.model as model_opt
+from propt.adapters.optimizers import ORToolsOptimizer
+
+CHAIN = "chain"
+LP = "lp"
+
+
+class ChainOptimizer(model_opt.Optimizer):
+    """Optimizer back-substituting along simple chains, and using ORToolsOptimizer for the others.
+
+    path tells which way the last optimize went: CHAIN or LP.
+    """
+
+    def __init__(
+        self,
+        production_map: model_opt.ProductionMap,
+        item_constraints: Iterable[tuple[model_opt.Item, float]],
+        prod_unit_constraints: Iterable[tuple[model_opt.ProductionUnit, float]],
+        parameters: solver_parameters.SolverParameters | None = None,
+    ):
+        super().__init__(production_map, item_constraints, prod_unit_constraints)
+        self.parameters = parameters
+        self.path: Optional[str] = None
+        self._producers: dict[model_opt.Item, list[model_opt.ProductionUnit]] | None = None
+
+    def add_production_units(self, production_units: Iterable[model_opt.ProductionUnit]) -> None:
+        super().add_production_units(production_units)
+        self._producers = None
+
+    @property
+    def producers(self) -> dict[model_opt.Item, list[model_opt.ProductionUnit]]:
+        """The units making each item, built once."""
+        if self._producers is None:
+            self._producers = collections.defaultdict(list)
+            for prod_unit in self._production_map.production_units:
+                for item in prod_unit.products:
+                    self._producers[item].append(prod_unit)
+        return self._producers
+
+    def chain(self) -> Optional[list[model_opt.ProductionUnit]]:
+        """Return the units needed by the targets, consumers first, None if they aren't a simple chain."""
+        producers = self.producers
+        consumers: dict[model_opt.ProductionUnit, set[model_opt.ProductionUnit]] = {}
+        queue = collections.deque(item for item, qty in self._item_constraints if qty > 0)
+        seen_items = set(queue)
+        while queue:
+            item = queue.popleft()
+            if len(item_producers := producers.get(item, [])) != 1:
+                return None
+            (prod_unit,) = item_producers
+            if prod_unit in consumers:
+                continue
+            consumers[prod_unit] = set()
+            if any(ingredient in prod_unit.products for ingredient in prod_unit.ingredients):
+                return None  # a catalyst is a loop on the unit
+            for ingredient in prod_unit.ingredients:
+                if ingredient not in seen_items:
+                    seen_items.add(ingredient)
+                    queue.append(ingredient)
+        for prod_unit in consumers:
+            for ingredient in prod_unit.ingredients:
+                (producer,) = producers[ingredient]
+                consumers[producer].add(prod_unit)
+        # Kahn: a unit comes once all its consumers are there
+        nb_consumers = {prod_unit: len(units) for prod_unit, units in consumers.items()}
+        ordered = [prod_unit for prod_unit, nb in nb_consumers.items() if nb == 0]
+        for prod_unit in ordered:
+            for ingredient in prod_unit.ingredients:
+                (producer,) = producers[ingredient]
+                nb_consumers[producer] -= 1
+                if nb_consumers[producer] == 0:
+                    ordered.append(producer)
+        return ordered if len(ordered) == len(consumers) else None
+
+    def _back_substitute(self, chain: list[model_opt.ProductionUnit]) -> Optional[model_opt.ProductionMap]:
+        """Return the map of the units of the chain, None if a cap is exceeded."""
+        demands: dict[model_opt.Item, float] = collections.defaultdict(float)
+        for item, qty in self._item_constraints:
+            demands[item] += qty
+        caps = dict(self._prod_unit_constraints)
+        prod_units = []
+        for prod_unit in chain:
+            qty = max(demands[item] / rate for item, rate in prod_unit.products.items())
+            if qty > caps.get(prod_unit, qty):
+                return None
+            for ingredient, rate in prod_unit.ingredients.items():
+                demands[ingredient] += rate * qty
+            if qty > 0.00001:
+                prod_units.append(prod_unit.with_quantity(qty))
+        return model_opt.ProductionMap(production_units=prod_units)
+
+    def optimize(self) -> model_opt.ProductionMap:
+        chain = self.chain()
+        if chain is not None and (result := self._back_substitute(chain)) is not None:
+            self.path = CHAIN
+            return result
+        self.path = LP
+        return ORToolsOptimizer(
+            self._production_map, self._item_constraints, self._prod_unit_constraints, parameters=self.parameters
+        ).optimize()
@@ -0,0 +1,122 @@
+"""Find in which order to build the production units of a production graph.
+
+The strongly connected components (production loops) are condensed once and built in topological order.
+Inside a loop, the units are built in a breadth-first order starting where the loop is fed from outside;
+the units built before one of their ingredients is produced need a bootstrap supply of it.
+Everything is O(V+E).
+"""
+from __future__ import annotations
+
+import collections
+import pathlib
+from typing import Optional
+
+import networkx as nx  # type: ignore
+import pydantic
+
+import propt.adapters.optimizers as optimizers
+import propt.domain.optimizer.columnar as columnar
+import propt.domain.optimizer.model as model_opt
+
+
+class ConstructionStep(pydantic.BaseModel):
+    """One production unit to build."""
+
+    node: str
+    """The node of the production unit in the graph."""
+    production_unit: Optional[model_opt.ProductionUnit | columnar.ProductionUnitView]
+    component: int
+    """The index of its production loop (strongly connected component) in the construction order."""
+    bootstrap_items: tuple[str, ...] = ()
+    """The item nodes it consumes that nothing built before makes: they have to be brought in."""
+
+    class Config:
+        frozen = True
+        arbitrary_types_allowed = True
+
+    @property
+    def bootstrap(self) -> bool:
+        """True if the unit can't start with what is already built."""
+        return bool(self.bootstrap_items)
+
+    @property
+    def label(self) -> str:
+        """The unit node name on a single line."""
+        return " ".join(self.node.split("\n")[1:])
+
+
+class ConstructionOrder:
+    """The construction order of the production units of a graph."""
+
+    def __init__(self, production_graph: optimizers.NetworkXProductionGraph):
+        self.graph: nx.DiGraph = production_graph.graph
+
+    @classmethod
+    def from_production_map(cls, production_map: model_opt.ProductionMap) -> ConstructionOrder:
+        return cls(optimizers.NetworkXProductionGraph(production_map))
+
+    def _components(self) -> tuple[nx.DiGraph, dict[str, int], dict[int, list[str]]]:
+        """Condense the graph; the members of each component are in the graph node order."""
+        condensed = nx.condensation(self.graph)
+        mapping: dict[str, int] = condensed.graph["mapping"]
+        members: dict[int, list[str]] = collections.defaultdict(list)
+        for node in self.graph:
+            members[mapping[node]].append(node)
+        return condensed, mapping, members
+
+    def _component_order(
+        self, component: int, members: list[str], mapping: dict[str, int]
+    ) -> list[str]:
+        """Breadth-first order of a component from its nodes fed from outside (or its first node)."""
+        if len(members) == 1:
+            return members
+        entries = [
+            node
+            for node in members
+            if any(mapping[pred] != component for pred in self.graph.pred[node])
+        ] or members[:1]
+        visited = set(entries)
+        queue = collections.deque(entries)
+        order = []
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for succ in self.graph.succ[node]:
+                if mapping[succ] == component and succ not in visited:
+                    visited.add(succ)
+                    queue.append(succ)
+        return order
+
+    def steps(self) -> list[ConstructionStep]:
+        """Return the production units in the order to build them."""
+        condensed, mapping, members = self._components()
+        nodes = self.graph.nodes
+        # the item nodes made by units already built, or by nothing at all
+        available = {node for node in self.graph if not self.graph.pred[node]}
+        steps: list[ConstructionStep] = []
+        for position, component in enumerate(nx.topological_sort(condensed)):
+            for node in self._component_order(component, members[component], mapping):
+                if nodes[node].get("node_type") != "pu":
+                    continue
+                steps.append(
+                    ConstructionStep(
+                        node=node,
+                        production_unit=nodes[node].get("production_unit"),
+                        component=position,
+                        bootstrap_items=tuple(
+                            item for item in self.graph.pred[node] if item not in available
+                        ),
+                    )
+                )
+                available.update(self.graph.succ[node])
+        return steps
+
+    def write(self, filepath: pathlib.Path) -> None:
+        """Write the construction order, one unit per line, bootstrapped items in brackets."""
+        with open(filepath, "w") as f:
+            for step in self.steps():
+                line = step.label
+                if step.bootstrap:
+                    items = (item.split("\n")[-1] for item in step.bootstrap_items)
+                    line += f" [{', '.join(items)}]"
+                f.write(f"{line}\n")
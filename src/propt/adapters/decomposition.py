@@ -0,0 +1,215 @@
+"""Solve production maps by parts: the loops of the production graph become sub-factories.
+
+The strongly connected components of the graph (items -> units -> items) that hold several units are
+the loops (water/steam, ash, syngas...). Each loop is solved alone, once for each item it makes: the
+solution is a sub-factory making that item from the items it imports (those the map makes outside of the
+loop), used in the top-level model as a single unit whose quantity is its nb of buildings. The rest of
+the map is kept as it is.
+
+Sub-factories are cached by the content of their loop and its imports, so a new target only solves the top-level model.
+The top-level plan is optimal among the sub-factories found: one using the fewest buildings and one using
+the least of each import, for each item. A plan mixing loop units in another way can be better.
+"""
+from __future__ import annotations
+
+import collections
+from typing import Iterable, Optional
+
+import immutables
+import networkx as nx  # type: ignore
+import pydantic
+
+import propt.adapters.solver_parameters as solver_parameters
+import propt.domain.optimizer.model as model_opt
+from propt.adapters.optimizers import ORToolsOptimizer
+
+SUB_FACTORY_BUILDING = "sub-factory"
+IMPORT_BUILDING = "import"
+
+Loop = frozenset[model_opt.ProductionUnit]
+
+
+class SubFactory(pydantic.BaseModel):
+    """A way of running a loop: its units by building of the sub-factory, and the unit standing for it."""
+
+    units: immutables.Map[model_opt.ProductionUnit, float]
+    production_unit: model_opt.ProductionUnit
+    """The input (ingredients) and output (products) vectors of one building of the sub-factory."""
+
+    class Config:
+        frozen = True
+        arbitrary_types_allowed = True
+
+
+SubFactoryCache = dict[tuple[Loop, frozenset[model_opt.Item], model_opt.Item], list[SubFactory]]
+TopLevel = tuple[list[model_opt.ProductionUnit], dict[model_opt.ProductionUnit, SubFactory]]
+
+
+def loops(production_map: model_opt.ProductionMap) -> list[Loop]:
+    """Return the strongly connected components of the graph with several units."""
+    graph = nx.DiGraph()
+    for idx, prod_unit in enumerate(production_map.production_units):
+        graph.add_edges_from((("item", item), ("unit", idx)) for item in prod_unit.ingredients)
+        graph.add_edges_from((("unit", idx), ("item", item)) for item in prod_unit.products)
+    production_units = production_map.production_units
+    return [
+        loop
+        for component in nx.strongly_connected_components(graph)
+        if len(loop := frozenset(production_units[idx] for kind, idx in component if kind == "unit")) > 1
+    ]
+
+
+def _import_unit(item: model_opt.Item) -> model_opt.ProductionUnit:
+    return model_opt.ProductionUnit(
+        recipe_name=f"import {item.name}-{item.temperature}",
+        building_name=IMPORT_BUILDING,
+        ingredients=immutables.Map(),
+        products=immutables.Map({item: 1.0}),
+    )
+
+
+def solve_loop(
+    loop: Loop,
+    imports: frozenset[model_opt.Item],
+    output: model_opt.Item,
+    parameters: Optional[solver_parameters.SolverParameters] = None,
+) -> list[SubFactory]:
+    """Return the sub-factories of a loop making output: the fewest buildings, then the least of each import."""
+    import_units = {_import_unit(item) for item in imports}
+    buildings = model_opt.Objective(
+        name="buildings", weight=lambda prod_unit: 0.0 if prod_unit in import_units else 1.0
+    )
+    objectives = [[buildings]] + [
+        [model_opt.Objective.production([item], name=f"import {item.name}"), buildings]
+        for item in sorted(imports, key=lambda item: (item.name, item.temperature or 0))
+    ]
+    optimizer = ORToolsOptimizer(
+        model_opt.ProductionMap([*loop, *import_units]), [(output, 1.0)], [], parameters=parameters
+    )
+    sub_factories: list[SubFactory] = []
+    for lexicographic in objectives:
+        try:
+            result = optimizer.optimize_lexicographic(lexicographic)
+        except model_opt.SolutionNotFound:
+            return []
+        units = {prod_unit: prod_unit.quantity for prod_unit in result.production_units}
+        nb_buildings = sum(qty for prod_unit, qty in units.items() if prod_unit.building_name != IMPORT_BUILDING)
+        if nb_buildings < 1e-9:  # the output is imported
+            continue
+        net: dict[model_opt.Item, float] = collections.defaultdict(float)
+        for prod_unit in result.production_units:
+            if prod_unit.building_name == IMPORT_BUILDING:
+                continue
+            for item in prod_unit.items:
+                net[item] += prod_unit.get_item_net_quantity_by_unit_of_time(item) * prod_unit.quantity
+        sub_factory = SubFactory(
+            units=immutables.Map(
+                {
+                    prod_unit.with_quantity(): qty / nb_buildings
+                    for prod_unit, qty in units.items()
+                    if prod_unit.building_name != IMPORT_BUILDING
+                }
+            ),
+            production_unit=model_opt.ProductionUnit(
+                recipe_name=f"{output.name}-{output.temperature} {len(sub_factories)}",
+                building_name=SUB_FACTORY_BUILDING,
+                ingredients=immutables.Map(
+                    {item: -qty / nb_buildings for item, qty in net.items() if qty < -1e-9}
+                ),
+                products=immutables.Map({item: qty / nb_buildings for item, qty in net.items() if qty > 1e-9}),
+            ),
+        )
+        if not any(_same_vectors(sub_factory.production_unit, other.production_unit) for other in sub_factories):
+            sub_factories.append(sub_factory)
+    return sub_factories
+
+
+def _same_vectors(prod_unit: model_opt.ProductionUnit, other: model_opt.ProductionUnit) -> bool:
+    """Whether two units have the same rates, up to the tolerance of the objectives."""
+    return all(
+        set(rates.keys()) == set(other_rates.keys())
+        and all(abs(rate - other_rates[item]) <= 1e-4 * max(1.0, abs(rate)) for item, rate in rates.items())
+        for rates, other_rates in (
+            (prod_unit.ingredients, other.ingredients),
+            (prod_unit.products, other.products),
+        )
+    )
+
+
+class DecomposedOptimizer(model_opt.Optimizer):
+    """Optimizer replacing the loops of the map by sub-factories, then solving the top-level model.
+
+    The cache can be shared between optimizers. Loops with a capped unit are kept as they are.
+    """
+
+    def __init__(
+        self,
+        production_map: model_opt.ProductionMap,
+        item_constraints: Iterable[tuple[model_opt.Item, float]],
+        prod_unit_constraints: Iterable[tuple[model_opt.ProductionUnit, float]],
+        cache: Optional[SubFactoryCache] = None,
+        parameters: Optional[solver_parameters.SolverParameters] = None,
+    ):
+        super().__init__(production_map, item_constraints, prod_unit_constraints)
+        self.cache: SubFactoryCache = cache if cache is not None else {}
+        self.parameters = parameters
+        self._top_level: Optional[TopLevel] = None
+
+    def add_production_units(self, production_units: Iterable[model_opt.ProductionUnit]) -> None:
+        super().add_production_units(production_units)
+        self._top_level = None
+
+    def sub_factories(self, loop: Loop, imports: frozenset[model_opt.Item]) -> list[SubFactory]:
+        """Return the sub-factories of a loop, for every item it makes, from the cache if they are there."""
+        outputs = {item for prod_unit in loop for item in prod_unit.products}
+        sub_factories = []
+        for output in sorted(outputs, key=lambda item: (item.name, item.temperature or 0)):
+            if (loop, imports, output) not in self.cache:
+                self.cache[loop, imports, output] = solve_loop(loop, imports, output, self.parameters)
+            sub_factories.extend(self.cache[loop, imports, output])
+        return sub_factories
+
+    def top_level(self) -> TopLevel:
+        """Return the units of the top-level model, and the sub-factory of those standing for loops."""
+        if self._top_level is None:
+            capped = {prod_unit for prod_unit, _ in self._prod_unit_constraints}
+            producers: dict[model_opt.Item, set[model_opt.ProductionUnit]] = collections.defaultdict(set)
+            for prod_unit in self._production_map.production_units:
+                for item in prod_unit.products:
+                    producers[item].add(prod_unit)
+            replaced: set[model_opt.ProductionUnit] = set()
+            by_unit: dict[model_opt.ProductionUnit, SubFactory] = {}
+            for loop in loops(self._production_map):
+                if loop & capped:
+                    continue
+                replaced |= loop
+                imports = frozenset(
+                    item for prod_unit in loop for item in prod_unit.ingredients if producers[item] - loop
+                )
+                for sub_factory in self.sub_factories(loop, imports):
+                    by_unit[sub_factory.production_unit] = sub_factory
+            prod_units = [
+                prod_unit for prod_unit in self._production_map.production_units if prod_unit not in replaced
+            ]
+            self._top_level = [*prod_units, *by_unit], by_unit
+        return self._top_level
+
+    def optimize(self) -> model_opt.ProductionMap:
+        prod_units, by_unit = self.top_level()
+        result = ORToolsOptimizer(
+            model_opt.ProductionMap(list(prod_units)),
+            self._item_constraints,
+            self._prod_unit_constraints,
+            parameters=self.parameters,
+        ).optimize()
+        quantities: dict[model_opt.ProductionUnit, float] = collections.defaultdict(float)
+        for prod_unit in result.production_units:
+            template = prod_unit.with_quantity()
+            if (sub_factory := by_unit.get(template)) is None:
+                quantities[template] += prod_unit.quantity
+                continue
+            for loop_unit, qty in sub_factory.units.items():
+                quantities[loop_unit] += qty * prod_unit.quantity
+        return model_opt.ProductionMap(
+            [prod_unit.with_quantity(qty) for prod_unit, qty in quantities.items() if qty > 0.00001]
+        )
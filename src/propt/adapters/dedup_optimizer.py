@@ -0,0 +1,61 @@
+"""Solve production maps with the units of the same rates merged into one column.
+
+The map is merged once by Deduplication and solved by the optimizer of the parameters backend: the caps of
+the aliases are summed on the unit kept, and the plans come back with the original units, each alias filled
+up to its cap.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+import propt.adapters.solver_parameters as solver_parameters
+import propt.domain.optimizer.dedup as dedup
+import propt.domain.optimizer.model as model_opt
+from propt.adapters.optimizers import create_optimizer
+
+
+class DeduplicatedOptimizer(model_opt.Optimizer):
+    """Optimizer solving the map with one column by rate vector.
+
+    The merge is done by the first optimize and kept until units are added.
+    """
+
+    def __init__(
+        self,
+        production_map: model_opt.ProductionMap,
+        item_constraints: Iterable[tuple[model_opt.Item, float]],
+        prod_unit_constraints: Iterable[tuple[model_opt.ProductionUnit, float]],
+        parameters: Optional[solver_parameters.SolverParameters] = None,
+        digits: int = 9,
+    ):
+        super().__init__(production_map, item_constraints, prod_unit_constraints)
+        self.parameters = parameters
+        self.digits = digits
+        self._deduplication: Optional[dedup.Deduplication] = None
+
+    def add_production_units(self, production_units: Iterable[model_opt.ProductionUnit]) -> None:
+        super().add_production_units(production_units)
+        self._deduplication = None
+
+    @property
+    def deduplication(self) -> dedup.Deduplication:
+        if self._deduplication is None:
+            self._deduplication = dedup.Deduplication(self._production_map, self.digits)
+        return self._deduplication
+
+    @property
+    def nb_saved(self) -> int:
+        """The nb of columns the merge saved."""
+        return self.deduplication.nb_saved
+
+    def summary(self) -> str:
+        return self.deduplication.summary()
+
+    def optimize(self) -> model_opt.ProductionMap:
+        result = create_optimizer(
+            self.deduplication.production_map,
+            self._item_constraints,
+            self.deduplication.canonical_constraints(self._prod_unit_constraints),
+            parameters=self.parameters,
+        ).optimize()
+        return self.deduplication.expand(result, self._prod_unit_constraints)
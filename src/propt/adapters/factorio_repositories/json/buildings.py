@@ -42,6 +42,7 @@ class JSONFactorioAssemblingMachineRepository(
         key, energy_data = next(iter(data["energy_source"].items()))
         return propt.domain.factorio.prototypes.Building(
             name=data["name"],
+            pollution=data.get("pollution", 0.0),
             energy_usage=data["energy_usage"],
             speed_coefficient=self.override_speed.get(data["name"], data["crafting_speed"]),
             crafting_categories=tuple(
@@ -64,6 +65,7 @@ class JSONFactorioBoilerBuildingRepository(
         key, energy_data = next(iter(data["energy_source"].items()))
         return propt.domain.factorio.prototypes.Building(
             name=data["name"],
+            pollution=data.get("pollution", 0.0),
             energy_usage=data["max_energy_usage"],
             speed_coefficient=1.0,
             crafting_categories=(f"boiling-{data['name']}",),
@@ -84,6 +86,7 @@ class JSONFactorioFurnaceRepository(
         key, energy_data = next(iter(data["energy_source"].items()))
         return propt.domain.factorio.prototypes.Building(
             name=data["name"],
+            pollution=data.get("pollution", 0.0),
             energy_usage=data["energy_usage"],
             speed_coefficient=data["crafting_speed"],
             crafting_categories=tuple(
@@ -105,6 +108,7 @@ class JSONFactorioGeneratorRepository(
         assert len(data["energy_source"].keys()) < 2
         return propt.domain.factorio.prototypes.Building(
             name=data["name"],
+            pollution=data.get("pollution", 0.0),
             energy_usage=0,
             speed_coefficient=1.0,
             crafting_categories=(data["name"],),
@@ -126,6 +130,7 @@ class JSONFactorioMiningDrillRepository(
         try:
             return propt.domain.factorio.prototypes.Building(
                 name=data["name"],
+                pollution=data.get("pollution", 0.0),
                 energy_usage=data["energy_usage"],
                 speed_coefficient=data["mining_speed"],
                 crafting_categories=tuple(
@@ -152,6 +157,7 @@ class JSONFactorioReactorRepository(
         print(data)
         return propt.domain.factorio.prototypes.Building(
             name=data["name"],
+            pollution=data.get("pollution", 0.0),
             max_energy_usage=data["max_energy_usage"],
             neighbour_bonus=data["neighbour_bonus"],
             energy_source=more_itertools.first(data["energy_source"].keys()),
@@ -184,6 +190,7 @@ class JSONFactorioRocketSiloRepository(
         key, energy_data = next(iter(data["energy_source"].items()))
         return propt.domain.factorio.prototypes.Building(
             name=data["name"],
+            pollution=data.get("pollution", 0.0),
             energy_usage=data["energy_usage"],
             speed_coefficient=data["crafting_speed"],
             crafting_categories=tuple(
@@ -245,7 +245,7 @@ class JSONFactorioBoilerRecipeRepository(
 
 
 class JSONFactorioGeneratorRecipeRepository(
-    repo_models.RecipeRepository,
+    repo_models.DerivedRecipeRepository,
 ):
     def __init__(
         self,
@@ -270,19 +270,37 @@ class JSONFactorioGeneratorRecipeRepository(
 
     def _load_file(self, json_directory: pathlib.Path) -> None:
         with open(json_directory / self._filename) as f:
-            data = json.load(f)
-        for data_item in data.values():
-            for obj in self.build_objects(data_item):
-                self[obj.name] = obj
+            self._data: dict[str, Any] = json.load(f)
+        self.refresh(self._available_recipe)
+
+    def derive_recipes(self, available_recipes: RecipeSet) -> list[prototypes.Recipe]:
+        return [
+            recipe
+            for data_item in self._data.values()
+            for recipe in self.build_objects(data_item, available_recipes)
+        ]
+
+    def refresh(self, available_recipes: RecipeSet) -> list[prototypes.Recipe]:
+        self._available_recipe = available_recipes
+        new_recipes = [
+            recipe for recipe in self.derive_recipes(available_recipes) if recipe.name not in self
+        ]
+        for recipe in new_recipes:
+            self[recipe.name] = recipe
+            for product in recipe.products:
+                self._recipe_per_product[product.obj.name].add(recipe)
+        return new_recipes
 
-    def build_objects(self, data: dict[str, Any]) -> Iterator[prototypes.Recipe]:
+    def build_objects(
+        self, data: dict[str, Any], available_recipes: RecipeSet | None = None
+    ) -> Iterator[prototypes.Recipe]:
         assert len(data["energy_source"].keys()) < 2
         liquid = self._liquids[data["name"]]
-        temps = {
-            temp
-            for temp in self._available_recipe.product_temperatures[liquid]
-            if temp > 60 and temp < data["maximum_temperature"]
-        }
+        if available_recipes is None:
+            available_recipes = self._available_recipe
+        temps = available_recipes.product_temperatures_between(
+            liquid, 61, data["maximum_temperature"] - 1
+        )
         for temp in temps:
             amount = data["max_energy_production"] / (
                 data["maximum_temperature"] * liquid.heat_capacity * data["effectivity"]
@@ -312,8 +330,6 @@ class JSONFactorioGeneratorRecipeRepository(
                 available_from_start=True,
                 category=data["name"],
             )
-            for product in products:
-                self._recipe_per_product[product.obj.name].add(recipe)
             yield recipe
 
     def get_recipes_making_stuff(
@@ -29,7 +29,9 @@ class JSONFactorioTechnologyRepository(
                 if effect["type"] == "unlock-recipe"
             )
             return prototypes.Technology(
-                name=data["name"], recipe_unlocked=recipe_unlocked
+                name=data["name"],
+                recipe_unlocked=recipe_unlocked,
+                prerequisites=tuple(data.get("prerequisites", ())),
             )
         except KeyError:
             print(data)
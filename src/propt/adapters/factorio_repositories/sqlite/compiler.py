@@ -0,0 +1,273 @@
+"""Compile the Factorio data directory into a SQLite file.
+
+The JSON repositories build the prototypes once (boiler and resource recipes included), then they are written
+row by row: a table by prototype kind, recipe ingredients and products, building categories and technology
+effects, with indexes on the lookups the SQLite repositories make (product, ingredient and category).
+Generator recipes depend on the available recipes, they stay with JSONFactorioGeneratorRecipeRepository.
+"""
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import sqlite3
+from typing import Any, Iterable
+
+import propt.adapters.factorio_repositories.json.buildings as building_repos
+import propt.adapters.factorio_repositories.json.objects as obj_repos
+import propt.adapters.factorio_repositories.json.recipes as recipe_repos
+import propt.adapters.factorio_repositories.json.technologies as tech_repos
+import propt.domain.factorio.energy as energy
+import propt.domain.factorio.prototypes as prototypes
+import propt.domain.factorio.repositories as repo_models
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE buildings (
+    name TEXT PRIMARY KEY,
+    energy_usage INTEGER NOT NULL,
+    speed_coefficient REAL NOT NULL,
+    pollution REAL NOT NULL,
+    energy_type TEXT NOT NULL,
+    energy_info TEXT NOT NULL
+);
+CREATE TABLE building_categories (
+    building TEXT NOT NULL REFERENCES buildings(name),
+    position INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    PRIMARY KEY (building, position)
+);
+CREATE INDEX building_categories_category ON building_categories(category);
+CREATE TABLE items (
+    name TEXT PRIMARY KEY,
+    fuel_category TEXT,
+    fuel_value INTEGER,
+    place_result TEXT REFERENCES buildings(name)
+);
+CREATE TABLE fluids (
+    name TEXT PRIMARY KEY,
+    default_temperature INTEGER NOT NULL,
+    max_temperature INTEGER NOT NULL,
+    fuel_value INTEGER NOT NULL,
+    heat_capacity INTEGER NOT NULL
+);
+CREATE TABLE recipes (
+    name TEXT PRIMARY KEY,
+    category TEXT NOT NULL,
+    available_from_start INTEGER NOT NULL,
+    hidden_from_player_crafting INTEGER NOT NULL,
+    base_time REAL NOT NULL
+);
+CREATE INDEX recipes_category ON recipes(category);
+CREATE TABLE ingredients (
+    recipe TEXT NOT NULL REFERENCES recipes(name),
+    position INTEGER NOT NULL,
+    fluid INTEGER NOT NULL,
+    object TEXT NOT NULL,
+    amount REAL NOT NULL,
+    energy_ingredient INTEGER NOT NULL,
+    min_temperature INTEGER,
+    max_temperature INTEGER,
+    PRIMARY KEY (recipe, position)
+);
+CREATE INDEX ingredients_object ON ingredients(object);
+CREATE TABLE products (
+    recipe TEXT NOT NULL REFERENCES recipes(name),
+    position INTEGER NOT NULL,
+    fluid INTEGER NOT NULL,
+    object TEXT NOT NULL,
+    amount REAL NOT NULL,
+    min_amount REAL NOT NULL,
+    max_amount REAL NOT NULL,
+    probability REAL NOT NULL,
+    temperature INTEGER,
+    PRIMARY KEY (recipe, position)
+);
+CREATE INDEX products_object ON products(object);
+CREATE TABLE technologies (
+    name TEXT PRIMARY KEY
+);
+CREATE TABLE technology_prerequisites (
+    technology TEXT NOT NULL REFERENCES technologies(name),
+    position INTEGER NOT NULL,
+    prerequisite TEXT NOT NULL,
+    PRIMARY KEY (technology, position)
+);
+CREATE TABLE technology_effects (
+    technology TEXT NOT NULL REFERENCES technologies(name),
+    position INTEGER NOT NULL,
+    recipe TEXT NOT NULL REFERENCES recipes(name),
+    PRIMARY KEY (technology, position)
+);
+"""
+
+
+def _energy_row(energy_info: energy.Energy) -> tuple[str, str]:
+    energy_type = next(key for key, cls in energy.ENERGY_TYPES.items() if type(energy_info) is cls)
+    data: dict[str, Any] = {
+        key: sorted(value) if isinstance(value, frozenset) else value for key, value in energy_info.dict().items()
+    }
+    return energy_type, json.dumps(data)
+
+
+def _write_buildings(connection: sqlite3.Connection, buildings: Iterable[prototypes.Building]) -> None:
+    for building in buildings:
+        connection.execute(
+            "INSERT INTO buildings VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                building.name,
+                building.energy_usage,
+                building.speed_coefficient,
+                building.pollution,
+                *_energy_row(building.energy_info),
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO building_categories VALUES (?, ?, ?)",
+            ((building.name, position, category) for position, category in enumerate(building.crafting_categories)),
+        )
+
+
+def _write_recipes(connection: sqlite3.Connection, recipes: Iterable[prototypes.Recipe]) -> None:
+    for recipe in recipes:
+        connection.execute(
+            "INSERT INTO recipes VALUES (?, ?, ?, ?, ?)",
+            (
+                recipe.name,
+                recipe.category,
+                recipe.available_from_start,
+                recipe.hidden_from_player_crafting,
+                recipe.base_time,
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO ingredients VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    recipe.name,
+                    position,
+                    isinstance(ingredient, prototypes.FluidIngredient),
+                    ingredient.obj.name,
+                    ingredient.amount,
+                    ingredient.energy_ingredient,
+                    getattr(ingredient, "min_temperature", None),
+                    getattr(ingredient, "max_temperature", None),
+                )
+                for position, ingredient in enumerate(recipe.ingredients)
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    recipe.name,
+                    position,
+                    isinstance(product, prototypes.ProductFluid),
+                    product.obj.name,
+                    product.amount,
+                    product.min_amount,
+                    product.max_amount,
+                    product.probability,
+                    getattr(product, "temperature", None),
+                )
+                for position, product in enumerate(recipe.products)
+            ),
+        )
+
+
+def _write_technologies(connection: sqlite3.Connection, technologies: Iterable[prototypes.Technology]) -> None:
+    for technology in technologies:
+        connection.execute("INSERT INTO technologies VALUES (?)", (technology.name,))
+        connection.executemany(
+            "INSERT INTO technology_prerequisites VALUES (?, ?, ?)",
+            ((technology.name, position, name) for position, name in enumerate(technology.prerequisites)),
+        )
+        connection.executemany(
+            "INSERT INTO technology_effects VALUES (?, ?, ?)",
+            ((technology.name, position, recipe.name) for position, recipe in enumerate(technology.recipe_unlocked)),
+        )
+
+
+def compile_repositories(
+    database: pathlib.Path,
+    building_repo: repo_models.BuildingRepository,
+    item_repo: repo_models.ItemRepository,
+    fluid_repo: repo_models.FluidRepository,
+    recipe_repo: repo_models.RecipeRepository,
+    tech_repo: repo_models.TechnologyRepository,
+) -> None:
+    """Write the prototypes of the repositories in a new SQLite file, replacing database once it is complete."""
+    tmp_database = database.with_name(f"{database.name}.tmp")
+    tmp_database.unlink(missing_ok=True)
+    connection = sqlite3.connect(tmp_database)
+    try:
+        with connection:
+            connection.executescript(SCHEMA)
+            _write_buildings(connection, building_repo.values())
+            connection.executemany(
+                "INSERT INTO items VALUES (?, ?, ?, ?)",
+                (
+                    (item.name, item.fuel_category, item.fuel_value, item.place_result and item.place_result.name)
+                    for item in item_repo.values()
+                ),
+            )
+            connection.executemany(
+                "INSERT INTO fluids VALUES (?, ?, ?, ?, ?)",
+                (
+                    (
+                        fluid.name,
+                        fluid.default_temperature,
+                        fluid.max_temperature,
+                        fluid.fuel_value,
+                        fluid.heat_capacity,
+                    )
+                    for fluid in fluid_repo.values()
+                ),
+            )
+            _write_recipes(connection, recipe_repo.values())
+            _write_technologies(connection, tech_repo.values())
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    finally:
+        connection.close()
+    os.replace(tmp_database, database)
+
+
+def compile_directory(json_directory: pathlib.Path, database: pathlib.Path) -> None:
+    """Load the JSON files of a data directory and compile them into database."""
+    building_repo = building_repos.JSONFactorioAggregateBuildingRepository(
+        (
+            building_repos.JSONFactorioAssemblingMachineRepository(json_directory),
+            building_repos.JSONFactorioFurnaceRepository(json_directory),
+            building_repos.JSONFactorioMiningDrillRepository(json_directory),
+            building_repos.JSONFactorioRocketSiloRepository(json_directory),
+            building_repos.JSONFactorioBoilerBuildingRepository(json_directory),
+            building_repos.JSONFactorioGeneratorRepository(json_directory),
+        )
+    )
+    item_repo = obj_repos.JSONFactorioItemRepository(json_directory, building_repo)
+    fluid_repo = obj_repos.JSONFactorioFluidRepository(json_directory)
+    recipe_repo = recipe_repos.JSONFactorioAggregateRecipeRepository(
+        (
+            recipe_repos.JSONFactorioRecipeRepository(json_directory, item_repo, fluid_repo),
+            recipe_repos.JSONFactorioResourceRepository(json_directory, item_repo, fluid_repo),
+            recipe_repos.JSONFactorioBoilerRecipeRepository(json_directory, fluid_repo),
+        )
+    )
+    tech_repo = tech_repos.JSONFactorioTechnologyRepository(json_directory, recipe_repo)
+    compile_repositories(database, building_repo, item_repo, fluid_repo, recipe_repo, tech_repo)
+
+
+def is_up_to_date(json_directory: pathlib.Path, database: pathlib.Path) -> bool:
+    """Whether database exists with the current schema and is newer than every JSON file of the directory."""
+    if not database.exists():
+        return False
+    connection = sqlite3.connect(database)
+    try:
+        (version,) = connection.execute("PRAGMA user_version").fetchone()
+    finally:
+        connection.close()
+    modified = database.stat().st_mtime
+    return version == SCHEMA_VERSION and all(
+        path.stat().st_mtime <= modified for path in json_directory.glob("*.json")
+    )
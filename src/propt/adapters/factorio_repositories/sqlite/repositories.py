@@ -0,0 +1,276 @@
+"""SQLite repositories for Factorio, loading their rows lazily.
+
+They are the dicts of the repository ABCs, used as caches: a prototype is read from the database the first time
+it is looked up, and the whole table only when values() or items() is asked for. A tool needing a few recipes
+reads a few rows, the lookups by product, ingredient and category go through the indexes.
+"""
+from __future__ import annotations
+
+import abc
+import json
+import pathlib
+import sqlite3
+from typing import Any, Iterator, Optional, TypeVar
+
+import propt.adapters.factorio_repositories.sqlite.compiler as compiler
+import propt.domain.factorio.energy as energy
+import propt.domain.factorio.prototypes as prototypes
+import propt.domain.factorio.repositories as repo_models
+
+T = TypeVar("T", bound=prototypes.Prototype)
+
+
+class SQLiteFactorioRepository(repo_models.Repository[T], metaclass=abc.ABCMeta):
+    """A table of prototypes, read by name."""
+
+    _TABLE: str = ""
+
+    def __init__(self, connection: sqlite3.Connection):
+        super().__init__()
+        self._connection = connection
+        self._complete = False
+
+    @abc.abstractmethod
+    def build_object(self, row: sqlite3.Row) -> T:
+        """Build a Factorio object from its row."""
+
+    def _fetch(self, name: str) -> Optional[T]:
+        row = self._connection.execute(f"SELECT * FROM {self._TABLE} WHERE name = ?", (name,)).fetchone()
+        return None if row is None else self.build_object(row)
+
+    def _load_all(self) -> None:
+        if not self._complete:
+            for row in self._connection.execute(f"SELECT * FROM {self._TABLE}"):
+                if not super().__contains__(row["name"]):
+                    self[row["name"]] = self.build_object(row)
+            self._complete = True
+
+    def __missing__(self, name: str) -> T:
+        if self._complete or (obj := self._fetch(name)) is None:
+            raise KeyError(name)
+        self[name] = obj
+        return obj
+
+    def get(self, name: str, default: Any = None) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def __contains__(self, name: object) -> bool:
+        return super().__contains__(name) or (
+            not self._complete
+            and self._connection.execute(f"SELECT 1 FROM {self._TABLE} WHERE name = ?", (name,)).fetchone()
+            is not None
+        )
+
+    def __len__(self) -> int:
+        if self._complete:
+            return super().__len__()
+        return self._connection.execute(f"SELECT COUNT(*) FROM {self._TABLE}").fetchone()[0]
+
+    def __iter__(self) -> Iterator[str]:
+        if self._complete:
+            return super().__iter__()
+        return (row[0] for row in self._connection.execute(f"SELECT name FROM {self._TABLE}").fetchall())
+
+    def keys(self):  # type: ignore
+        self._load_all()
+        return super().keys()
+
+    def values(self):  # type: ignore
+        self._load_all()
+        return super().values()
+
+    def items(self):  # type: ignore
+        self._load_all()
+        return super().items()
+
+    @property
+    def nb_loaded(self) -> int:
+        """The nb of prototypes read from the database so far."""
+        return super().__len__()
+
+
+class SQLiteFactorioBuildingRepository(
+    repo_models.BuildingRepository,
+    SQLiteFactorioRepository[prototypes.Building],
+):
+    _TABLE = "buildings"
+
+    def build_object(self, row: sqlite3.Row) -> prototypes.Building:
+        categories = self._connection.execute(
+            "SELECT category FROM building_categories WHERE building = ? ORDER BY position", (row["name"],)
+        )
+        return prototypes.Building(
+            name=row["name"],
+            energy_usage=row["energy_usage"],
+            speed_coefficient=row["speed_coefficient"],
+            pollution=row["pollution"],
+            crafting_categories=tuple(category for (category,) in categories),
+            energy_info=energy.ENERGY_TYPES[row["energy_type"]](**json.loads(row["energy_info"])),
+        )
+
+    def get_buildings_by_category(self, category: str) -> set[prototypes.Building]:
+        """Return the buildings with a given crafting category."""
+        rows = self._connection.execute(
+            "SELECT DISTINCT building FROM building_categories WHERE category = ?", (category,)
+        ).fetchall()
+        return {self[name] for (name,) in rows}
+
+
+class SQLiteFactorioFluidRepository(
+    repo_models.FluidRepository,
+    SQLiteFactorioRepository[prototypes.Fluid],
+):
+    _TABLE = "fluids"
+
+    def build_object(self, row: sqlite3.Row) -> prototypes.Fluid:
+        return prototypes.Fluid(
+            name=row["name"],
+            default_temperature=row["default_temperature"],
+            max_temperature=row["max_temperature"],
+            fuel_value=row["fuel_value"],
+            heat_capacity=row["heat_capacity"],
+        )
+
+
+class SQLiteFactorioItemRepository(
+    repo_models.ItemRepository,
+    SQLiteFactorioRepository[prototypes.Item],
+):
+    _TABLE = "items"
+
+    def __init__(self, connection: sqlite3.Connection, building_repo: repo_models.BuildingRepository):
+        super().__init__(connection)
+        self._building_repo = building_repo
+
+    def build_object(self, row: sqlite3.Row) -> prototypes.Item:
+        return prototypes.Item(
+            name=row["name"],
+            fuel_category=row["fuel_category"],
+            fuel_value=row["fuel_value"],
+            place_result=self._building_repo.get(row["place_result"]) if row["place_result"] else None,
+        )
+
+
+class SQLiteFactorioRecipeRepository(
+    repo_models.RecipeRepository,
+    SQLiteFactorioRepository[prototypes.Recipe],
+):
+    _TABLE = "recipes"
+
+    def __init__(
+        self,
+        connection: sqlite3.Connection,
+        item_repo: repo_models.ItemRepository,
+        fluid_repo: repo_models.FluidRepository,
+    ):
+        super().__init__(connection)
+        self._item_repo = item_repo
+        self._fluid_repo = fluid_repo
+
+    def _build_ingredient(self, row: sqlite3.Row) -> prototypes.Ingredient:
+        if row["fluid"]:
+            return prototypes.FluidIngredient(
+                obj=self._fluid_repo[row["object"]],
+                amount=row["amount"],
+                energy_ingredient=row["energy_ingredient"],
+                min_temperature=row["min_temperature"],
+                max_temperature=row["max_temperature"],
+            )
+        return prototypes.ItemIngredient(
+            obj=self._item_repo[row["object"]], amount=row["amount"], energy_ingredient=row["energy_ingredient"]
+        )
+
+    def _build_product(self, row: sqlite3.Row) -> prototypes.Product:
+        common = {
+            "amount": row["amount"],
+            "min_amount": row["min_amount"],
+            "max_amount": row["max_amount"],
+            "probability": row["probability"],
+        }
+        if row["fluid"]:
+            return prototypes.ProductFluid(
+                obj=self._fluid_repo[row["object"]], temperature=row["temperature"], **common
+            )
+        return prototypes.ProductItem(obj=self._item_repo[row["object"]], **common)
+
+    def build_object(self, row: sqlite3.Row) -> prototypes.Recipe:
+        ingredients = self._connection.execute(
+            "SELECT * FROM ingredients WHERE recipe = ? ORDER BY position", (row["name"],)
+        )
+        products = self._connection.execute(
+            "SELECT * FROM products WHERE recipe = ? ORDER BY position", (row["name"],)
+        )
+        return prototypes.Recipe(
+            name=row["name"],
+            category=row["category"],
+            available_from_start=row["available_from_start"],
+            hidden_from_player_crafting=row["hidden_from_player_crafting"],
+            base_time=row["base_time"],
+            ingredients=tuple(self._build_ingredient(ingredient) for ingredient in ingredients.fetchall()),
+            products=tuple(self._build_product(product) for product in products.fetchall()),
+        )
+
+    def _recipes(self, query: str, name: str) -> set[prototypes.Recipe]:
+        return {self[recipe] for (recipe,) in self._connection.execute(query, (name,)).fetchall()}
+
+    def get_recipes_making_stuff(self, stuff: prototypes.Object) -> set[prototypes.Recipe]:
+        return self._recipes("SELECT DISTINCT recipe FROM products WHERE object = ?", stuff.name)
+
+    def get_recipes_using_stuff(self, stuff: prototypes.Object) -> set[prototypes.Recipe]:
+        """Return the recipes having a given stuff as ingredient."""
+        return self._recipes("SELECT DISTINCT recipe FROM ingredients WHERE object = ?", stuff.name)
+
+    def get_recipes_by_category(self, category: str) -> set[prototypes.Recipe]:
+        """Return the recipes of a crafting category."""
+        return self._recipes("SELECT name FROM recipes WHERE category = ?", category)
+
+
+class SQLiteFactorioTechnologyRepository(
+    repo_models.TechnologyRepository,
+    SQLiteFactorioRepository[prototypes.Technology],
+):
+    _TABLE = "technologies"
+
+    def __init__(self, connection: sqlite3.Connection, recipe_repo: repo_models.RecipeRepository):
+        super().__init__(connection)
+        self._recipe_repo = recipe_repo
+
+    def build_object(self, row: sqlite3.Row) -> prototypes.Technology:
+        effects = self._connection.execute(
+            "SELECT recipe FROM technology_effects WHERE technology = ? ORDER BY position", (row["name"],)
+        )
+        prerequisites = self._connection.execute(
+            "SELECT prerequisite FROM technology_prerequisites WHERE technology = ? ORDER BY position",
+            (row["name"],),
+        )
+        return prototypes.Technology(
+            name=row["name"],
+            recipe_unlocked=tuple(self._recipe_repo[recipe] for (recipe,) in effects.fetchall()),
+            prerequisites=tuple(prerequisite for (prerequisite,) in prerequisites.fetchall()),
+        )
+
+
+class SQLiteFactorioDataset:
+    """The repositories of a compiled data directory, sharing one connection."""
+
+    def __init__(self, database: pathlib.Path):
+        self.connection = sqlite3.connect(database)
+        self.connection.row_factory = sqlite3.Row
+        self.building_repo = SQLiteFactorioBuildingRepository(self.connection)
+        self.item_repo = SQLiteFactorioItemRepository(self.connection, self.building_repo)
+        self.fluid_repo = SQLiteFactorioFluidRepository(self.connection)
+        self.recipe_repo = SQLiteFactorioRecipeRepository(self.connection, self.item_repo, self.fluid_repo)
+        self.tech_repo = SQLiteFactorioTechnologyRepository(self.connection, self.recipe_repo)
+
+    @classmethod
+    def from_directory(cls, json_directory: pathlib.Path, database: pathlib.Path) -> SQLiteFactorioDataset:
+        """Open database, compiling the data directory first if it is missing or older than the JSON files."""
+        if not compiler.is_up_to_date(json_directory, database):
+            compiler.compile_directory(json_directory, database)
+        return cls(database)
+
+    def close(self) -> None:
+        self.connection.close()
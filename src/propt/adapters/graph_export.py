@@ -0,0 +1,156 @@
+"""Write production graphs straight from a ProductionMap, without building a networkx graph.
+
+The nodes and edges are those of NetworkXProductionGraph and are written while walking the production units
+once: the only memory used is the set of item nodes already written.
+"""
+from __future__ import annotations
+
+import json
+import pathlib
+from typing import IO, Iterable, Iterator, Union
+from xml.sax.saxutils import escape, quoteattr
+
+import networkx as nx  # type: ignore
+
+import propt.domain.optimizer.model as model_opt
+from propt.adapters.optimizers import UBIQUITOUS_ITEMS, NetworkXProductionGraph
+
+Attributes = dict[str, Union[str, float]]
+Element = Union[tuple[str, Attributes], tuple[str, str, Attributes]]
+"""A node (name, attributes) or an edge (source, target, attributes)."""
+
+
+def iter_elements(
+    production_map: model_opt.ProductionMap,
+    ubiquitous_items: Iterable[model_opt.Item] = UBIQUITOUS_ITEMS,
+) -> Iterator[Element]:
+    """Yield the nodes and edges of the graph of a map; a node always comes before its edges."""
+    ubiquitous_items = frozenset(ubiquitous_items)
+    written_items: set[model_opt.Item] = set()
+
+    def item_node(item: model_opt.Item) -> Iterator[Element]:
+        if item not in written_items:
+            written_items.add(item)
+            yield NetworkXProductionGraph._item_node_name(item), Attributes(node_type="item")
+
+    for prod_unit in production_map.production_units:
+        pu_node = f"Prod unit\n{prod_unit.name}\nqty {prod_unit.quantity}"
+        yield pu_node, Attributes(node_type="pu")
+        for ingredient, rate in prod_unit.ingredients.items():
+            if ingredient in ubiquitous_items:
+                continue
+            yield from item_node(ingredient)
+            item_name = NetworkXProductionGraph._item_node_name(ingredient)
+            qty = -rate * prod_unit.quantity
+            yield item_name, pu_node, {"headlabel": f"{item_name[5:]}\n{qty:.3f}", "rate": qty}
+        for product, rate in prod_unit.products.items():
+            yield from item_node(product)
+            item_name = NetworkXProductionGraph._item_node_name(product)
+            qty = rate * prod_unit.quantity
+            yield pu_node, item_name, {"taillabel": f"{item_name[5:]}\n{qty:.3f}", "rate": qty}
+
+
+def graph_elements(graph: nx.DiGraph) -> Iterator[Element]:
+    """Yield the nodes then the edges of a networkx graph, keeping the attributes that can be written."""
+    for node, data in graph.nodes(data=True):
+        yield node, _writable(data)
+    for source, target, data in graph.edges(data=True):
+        yield source, target, _writable(data)
+
+
+def _writable(data: dict) -> Attributes:
+    return {key: value for key, value in data.items() if isinstance(value, (str, int, float))}
+
+
+def _dot_id(string: str) -> str:
+    return '"' + string.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+
+def _dot_attributes(attributes: Attributes) -> str:
+    """Quote every value: bare exponents, inf, nan or True are not valid DOT ids."""
+    return ", ".join(f"{key}={_dot_id(str(value))}" for key, value in attributes.items())
+
+
+def write_dot(elements: Iterable[Element], f: IO[str]) -> None:
+    f.write('strict digraph {\ngraph [splines="false"];\n')
+    for element in elements:
+        if len(element) == 2:
+            f.write(f"{_dot_id(element[0])} [{_dot_attributes(element[1])}];\n")
+        else:
+            f.write(f"{_dot_id(element[0])} -> {_dot_id(element[1])} [{_dot_attributes(element[2])}];\n")
+    f.write("}\n")
+
+
+_GRAPHML_KEYS = {
+    "node_type": ("node", "string"),
+    "nb_units": ("node", "int"),
+    "label": ("all", "string"),
+    "headlabel": ("edge", "string"),
+    "taillabel": ("edge", "string"),
+    "rate": ("edge", "double"),
+}
+"""The attributes written in GraphML, with what they apply to and their type."""
+
+
+def _graphml_data(attributes: Attributes) -> str:
+    return "".join(
+        f'<data key="{key}">{escape(str(value))}</data>'
+        for key, value in attributes.items()
+        if key in _GRAPHML_KEYS
+    )
+
+
+def write_graphml(elements: Iterable[Element], f: IO[str]) -> None:
+    f.write(
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+    )
+    for key, (domain, type_) in _GRAPHML_KEYS.items():
+        f.write(f'<key id="{key}" for="{domain}" attr.name="{key}" attr.type="{type_}"/>\n')
+    f.write('<graph edgedefault="directed">\n')
+    for element in elements:
+        if len(element) == 2:
+            f.write(f"<node id={quoteattr(element[0])}>{_graphml_data(element[1])}</node>\n")
+        else:
+            f.write(
+                f"<edge source={quoteattr(element[0])} target={quoteattr(element[1])}>"
+                f"{_graphml_data(element[2])}</edge>\n"
+            )
+    f.write("</graph>\n</graphml>\n")
+
+
+def write_json(elements: Iterable[Element], f: IO[str]) -> None:
+    """Write Cytoscape.js elements: a list of nodes and edges with their data."""
+    f.write("[\n")
+    for idx, element in enumerate(elements):
+        if len(element) == 2:
+            data = {"id": element[0], **element[1]}
+            group = "nodes"
+        else:
+            data = {"source": element[0], "target": element[1], **element[2]}
+            group = "edges"
+        f.write(f"{',' if idx else ''}{json.dumps({'group': group, 'data': data})}\n")
+    f.write("]\n")
+
+
+WRITERS = {".dot": write_dot, ".gv": write_dot, ".graphml": write_graphml, ".json": write_json}
+"""The writer of each file extension."""
+
+
+def write_elements(elements: Iterable[Element], filepath: pathlib.Path) -> None:
+    """Write graph elements, in the format given by the file extension."""
+    try:
+        writer = WRITERS[filepath.suffix]
+    except KeyError:
+        raise ValueError(f"Unknown graph format: {filepath.suffix}") from None
+    with open(filepath, "w") as f:
+        writer(elements, f)
+
+
+def export(
+    production_map: model_opt.ProductionMap,
+    filepath: pathlib.Path,
+    ubiquitous_items: Iterable[model_opt.Item] = UBIQUITOUS_ITEMS,
+) -> None:
+    """Write the graph of a map, in the format given by the file extension."""
+    write_elements(iter_elements(production_map, ubiquitous_items), filepath)
@@ -0,0 +1,132 @@
+"""Extract small, readable parts of a production graph.
+
+Queries are chained and each one returns a new GraphQuery, e.g.::
+
+    GraphQuery.from_production_map(result).around([titanium_plate], hops=2).min_rate(0.1).collapse_loops()
+"""
+from __future__ import annotations
+
+import collections
+import pathlib
+from typing import Iterable
+
+import networkx as nx  # type: ignore
+
+import propt.adapters.graph_export as graph_export
+import propt.domain.optimizer.model as model_opt
+from propt.adapters.optimizers import UBIQUITOUS_ITEMS, NetworkXProductionGraph
+
+
+class GraphQuery:
+    """A production graph (NetworkXProductionGraph nodes and edges) to narrow down."""
+
+    def __init__(self, graph: nx.DiGraph):
+        self.graph = graph
+
+    @classmethod
+    def from_production_map(
+        cls,
+        production_map: model_opt.ProductionMap,
+        ubiquitous_items: Iterable[model_opt.Item] = UBIQUITOUS_ITEMS,
+    ) -> GraphQuery:
+        return cls(NetworkXProductionGraph(production_map, ubiquitous_items).graph)
+
+    def _reachable(self, sources: list[str], hops: int, neighbours) -> set[str]:
+        """Nodes at most hops production units away, going through neighbours (pred or succ)."""
+        nodes = set(sources)
+        queue = collections.deque((node, 0) for node in sources)
+        while queue:
+            node, nb_units = queue.popleft()
+            for neighbour in neighbours[node]:
+                if neighbour in nodes:
+                    continue
+                neighbour_units = nb_units + (self.graph.nodes[neighbour].get("node_type") != "item")
+                if neighbour_units > hops:
+                    continue
+                nodes.add(neighbour)
+                queue.append((neighbour, neighbour_units))
+        return nodes
+
+    def around(
+        self,
+        items: Iterable[model_opt.Item],
+        hops: int = 1,
+        upstream: bool = True,
+        downstream: bool = True,
+    ) -> GraphQuery:
+        """Keep the items and what is at most hops production units upstream and/or downstream of them.
+
+        The ingredients of the farthest upstream units and the products of the farthest downstream ones are
+        kept, so every unit kept has its edges.
+        """
+        sources = [NetworkXProductionGraph._item_node_name(item) for item in items]
+        if missing := [source for source in sources if source not in self.graph]:
+            raise KeyError(f"Not in the graph: {missing}")
+        nodes = set(sources)
+        if upstream:
+            nodes |= self._reachable(sources, hops, self.graph.pred)
+        if downstream:
+            nodes |= self._reachable(sources, hops, self.graph.succ)
+        units = [node for node in nodes if self.graph.nodes[node].get("node_type") != "item"]
+        for unit in units:
+            nodes.update(self.graph.pred[unit])
+            nodes.update(self.graph.succ[unit])
+        return GraphQuery(self.graph.subgraph(nodes).copy())
+
+    def min_rate(self, threshold: float) -> GraphQuery:
+        """Drop the edges carrying less than threshold (in absolute value), then the isolated nodes."""
+        graph = self.graph.copy()
+        graph.remove_edges_from(
+            [
+                (source, target)
+                for source, target, rate in graph.edges(data="rate")
+                if rate is not None and abs(rate) < threshold
+            ]
+        )
+        graph.remove_nodes_from([node for node, degree in graph.degree if degree == 0])
+        return GraphQuery(graph)
+
+    def collapse_loops(self) -> GraphQuery:
+        """Replace each production loop (strongly connected component) by a single node.
+
+        Edges between the same nodes are merged, adding their rates.
+        """
+        condensed = nx.condensation(self.graph)
+        names: dict[int, str] = {}
+        graph = nx.DiGraph(**self.graph.graph)
+        for component, members in condensed.nodes(data="members"):
+            if len(members) == 1:
+                (node,) = members
+                names[component] = node
+                graph.add_node(node, **self.graph.nodes[node])
+            else:
+                units = sorted(
+                    node.split("\n")[1]
+                    for node in members
+                    if self.graph.nodes[node].get("node_type") != "item"
+                )
+                name = names[component] = f"loop {component}\n{len(units)} units"
+                graph.add_node(
+                    name,
+                    node_type="loop",
+                    nb_units=len(units),
+                    label="\n".join([name, *units[:5], *(["..."] if len(units) > 5 else [])]),
+                )
+        mapping = condensed.graph["mapping"]
+        for source, target, data in self.graph.edges(data=True):
+            new_source, new_target = names[mapping[source]], names[mapping[target]]
+            if new_source == new_target:
+                continue
+            if graph.has_edge(new_source, new_target):
+                edge = graph.edges[new_source, new_target]
+                edge["rate"] = edge.get("rate", 0.0) + data.get("rate", 0.0)
+                edge["label"] = f"{edge['rate']:.3f}"
+                edge.pop("headlabel", None)
+                edge.pop("taillabel", None)
+            else:
+                graph.add_edge(new_source, new_target, **data)
+        return GraphQuery(graph)
+
+    def write(self, filepath: pathlib.Path) -> None:
+        """Write the graph, in the format given by the file extension (see graph_export)."""
+        graph_export.write_elements(graph_export.graph_elements(self.graph), filepath)
@@ -1,41 +1,247 @@
-"""An indexer to store collection and easily look for object given a key."""
+"""An indexer to store collection and easily look for object given a key.
+
+Indexers can be filled at once with set_collection, or kept up to date with add, remove and replace.
+Objects are tracked by identity, so they don't need to be hashable.
+"""
 from __future__ import annotations
 
+import abc
+import bisect
 from collections import defaultdict
-from typing import Callable, Hashable, TypeVar, Iterable
+from typing import Any, Callable, Generic, Hashable, TypeVar, Iterable
 
 TKey = TypeVar("TKey", bound=Hashable)
 """Type of the key"""
 TObj = TypeVar("TObj")
 """Type of the objects in the collection."""
+TValue = TypeVar("TValue", bound=Any)
+"""Type of the sortable values of a range index."""
 OneToOneGetter = Callable[[TObj], TKey]
 """Function returning the key for an object."""
 MultiToMultiGetter = Callable[[TObj], Iterable[TKey]]
 """Function returning the keys for an object."""
+RangeGetter = Callable[[TObj], Iterable[tuple[TKey, TValue]]]
+"""Function returning the (key, value) pairs for an object."""
+
+
+class IncrementalIndexer(Generic[TObj], metaclass=abc.ABCMeta):
+    """An index that can be updated one object at a time.
+
+    Meant to be mixed in with a dict.
+    """
+
+    @abc.abstractmethod
+    def add(self, obj: TObj) -> None:
+        """Index an object."""
+
+    @abc.abstractmethod
+    def remove(self, obj: TObj) -> None:
+        """Remove an object from the index. Raise KeyError if it isn't indexed."""
+
+    @abc.abstractmethod
+    def is_indexed(self, obj: TObj) -> bool:
+        """True if this very object is in the index."""
+
+    def replaced_by(self, obj: TObj) -> list[TObj]:
+        """The indexed objects that adding obj would replace."""
+        return []
+
+    def set_collection(self, collection: Iterable[TObj]) -> None:
+        self.clear()  # type: ignore[attr-defined]
+        for obj in collection:
+            self.add(obj)
+
+    def replace(self, old: TObj, new: TObj) -> None:
+        """Replace old by new in the index.
 
+        old and new can be the same object, to re-index an object modified in place.
+        """
+        self.remove(old)
+        self.add(new)
 
-class OneToOneIndexer(dict[TKey, TObj]):
+
+class OneToOneIndexer(IncrementalIndexer[TObj], dict[TKey, TObj], Generic[TKey, TObj]):
     """Index a collection where the object has one key and one key matches one object only."""
 
     def __init__(self, idx_getter: OneToOneGetter):
         super().__init__()
         self._idx_getter = idx_getter
+        self._keys: dict[int, TKey] = {}
+        """The key of each indexed object, by object id."""
 
-    def set_collection(self, collection: Iterable[TObj]) -> None:
-        self.clear()
-        for obj in collection:
-            self[self._idx_getter(obj)] = obj
+    def clear(self) -> None:
+        super().clear()
+        self._keys.clear()
+
+    def add(self, obj: TObj) -> None:
+        key = self._idx_getter(obj)
+        if key in self:  # the previous object is replaced
+            self._keys.pop(id(self[key]), None)
+        self[key] = obj
+        self._keys[id(obj)] = key
+
+    def remove(self, obj: TObj) -> None:
+        del self[self._keys.pop(id(obj))]
 
+    def is_indexed(self, obj: TObj) -> bool:
+        return id(obj) in self._keys
 
-class MultiToMultiIndexer(defaultdict[TKey, list[TObj]]):
-    """Index a collection where an object must index under several keys and keys have several objects."""
+    def replaced_by(self, obj: TObj) -> list[TObj]:
+        key = self._idx_getter(obj)
+        return [self[key]] if key in self and self[key] is not obj else []
+
+
+class MultiToMultiIndexer(IncrementalIndexer[TObj], defaultdict[TKey, list[TObj]], Generic[TKey, TObj]):
+    """Index a collection where an object must index under several keys and keys have several objects.
+
+    Removing an object moves the last object of each of its lists in its place.
+    """
 
     def __init__(self, idx_getter: MultiToMultiGetter):
         super().__init__(list)
         self._idx_getter = idx_getter
+        self._positions: dict[int, dict[TKey, int]] = {}
+        """The position of each indexed object in the list of each of its keys, by object id."""
+
+    def clear(self) -> None:
+        super().clear()
+        self._positions.clear()
+
+    def add(self, obj: TObj) -> None:
+        if id(obj) in self._positions:
+            raise ValueError(f"{obj} is already indexed")
+        positions = self._positions[id(obj)] = {}
+        for key in self._idx_getter(obj):
+            if key not in positions:
+                objects = self[key]
+                positions[key] = len(objects)
+                objects.append(obj)
+
+    def remove(self, obj: TObj) -> None:
+        for key, position in self._positions.pop(id(obj)).items():
+            objects = self[key]
+            last = objects.pop()
+            if position < len(objects):
+                objects[position] = last
+                self._positions[id(last)][key] = position
+            elif not objects:
+                del self[key]
+
+    def is_indexed(self, obj: TObj) -> bool:
+        return id(obj) in self._positions
+
+
+class RangeIndexer(IncrementalIndexer[TObj], dict[TKey, list[TObj]], Generic[TKey, TValue, TObj]):
+    """Index a collection under (key, value) pairs, to look for objects with a value in a range.
+
+    For each key, objects are sorted by value so range queries are done by bisection.
+    """
+
+    def __init__(self, idx_getter: RangeGetter):
+        super().__init__()
+        self._idx_getter = idx_getter
+        self._values: dict[TKey, list[TValue]] = {}
+        self._pairs: dict[int, list[tuple[TKey, TValue]]] = {}
+        """The (key, value) pairs of each indexed object, by object id."""
+
+    def clear(self) -> None:
+        super().clear()
+        self._values.clear()
+        self._pairs.clear()
 
     def set_collection(self, collection: Iterable[TObj]) -> None:
         self.clear()
+        entries: dict[TKey, list[tuple[TValue, TObj]]] = defaultdict(list)
         for obj in collection:
-            for key in self._idx_getter(obj):
-                self[key].append(obj)
+            pairs = self._pairs[id(obj)] = list(self._idx_getter(obj))
+            for key, value in pairs:
+                entries[key].append((value, obj))
+        for key, key_entries in entries.items():
+            key_entries.sort(key=lambda entry: entry[0])
+            self._values[key] = [value for value, _ in key_entries]
+            self[key] = [obj for _, obj in key_entries]
+
+    def add(self, obj: TObj) -> None:
+        if id(obj) in self._pairs:
+            raise ValueError(f"{obj} is already indexed")
+        pairs = self._pairs[id(obj)] = list(self._idx_getter(obj))
+        for key, value in pairs:
+            values = self._values.setdefault(key, [])
+            position = bisect.bisect_right(values, value)
+            values.insert(position, value)
+            self.setdefault(key, []).insert(position, obj)
+
+    def remove(self, obj: TObj) -> None:
+        for key, value in self._pairs.pop(id(obj)):
+            values, objects = self._values[key], self[key]
+            position = bisect.bisect_left(values, value)
+            while objects[position] is not obj:
+                position += 1
+            del values[position], objects[position]
+            if not objects:
+                del self._values[key], self[key]
+
+    def is_indexed(self, obj: TObj) -> bool:
+        return id(obj) in self._pairs
+
+    def _bounds(self, key: TKey, low: TValue | None, high: TValue | None) -> tuple[int, int]:
+        values = self._values.get(key, [])
+        start = 0 if low is None else bisect.bisect_left(values, low)
+        end = len(values) if high is None else bisect.bisect_right(values, high)
+        return start, end
+
+    def between(self, key: TKey, low: TValue | None = None, high: TValue | None = None) -> list[TObj]:
+        """Return the objects indexed under key with low <= value <= high, sorted by value.
+
+        A None bound is unbounded.
+        """
+        start, end = self._bounds(key, low, high)
+        return self.get(key, [])[start:end]
+
+    def values_between(
+        self, key: TKey, low: TValue | None = None, high: TValue | None = None
+    ) -> list[TValue]:
+        """Return the distinct values indexed under key with low <= value <= high, sorted."""
+        start, end = self._bounds(key, low, high)
+        values = self._values.get(key, [])[start:end]
+        return [value for idx, value in enumerate(values) if idx == 0 or values[idx - 1] != value]
+
+
+class CompositeIndexer(dict[str, IncrementalIndexer[TObj]]):
+    """Several named indexes over one collection, kept in sync.
+
+    An object replaced in one index (a one-to-one key taken by a new object) is removed from all of them.
+    """
+
+    def __init__(self, **indexers: IncrementalIndexer[TObj]):
+        super().__init__(indexers)
+
+    def set_collection(self, collection: Iterable[TObj]) -> None:
+        collection = list(collection)
+        for indexer in self.values():
+            indexer.set_collection(collection)
+        for obj in collection:  # drop the objects a later one replaced somewhere
+            if not all(indexer.is_indexed(obj) for indexer in self.values()):
+                for indexer in self.values():
+                    if indexer.is_indexed(obj):
+                        indexer.remove(obj)
+
+    def add(self, obj: TObj) -> None:
+        if any(indexer.is_indexed(obj) for indexer in self.values()):
+            raise ValueError(f"{obj} is already indexed")
+        for indexer in self.values():
+            for replaced in indexer.replaced_by(obj):
+                self.remove(replaced)
+        for indexer in self.values():
+            indexer.add(obj)
+
+    def remove(self, obj: TObj) -> None:
+        if not all(indexer.is_indexed(obj) for indexer in self.values()):
+            raise KeyError(obj)
+        for indexer in self.values():
+            indexer.remove(obj)
+
+    def replace(self, old: TObj, new: TObj) -> None:
+        """Replace old by new in every index."""
+        self.remove(old)
+        self.add(new)
@@ -0,0 +1,130 @@
+"""The optimal basis of a solved OR-Tools linear model, factorized for sensitivity analysis."""
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import scipy.sparse as sparse  # type: ignore
+import scipy.sparse.linalg as sparse_linalg  # type: ignore
+from ortools.linear_solver import linear_solver_pb2, pywraplp  # type: ignore
+
+_EPSILON = 1e-12
+
+
+class LPBasis:
+    """The basis matrix of a solved (minimization) model, LU-factorized once.
+
+    The model is seen as ``A x - s = 0`` with bounds on x (the columns) and s (the row activities).
+    The basis picks the basic columns of A and the basic rows (whose s is basic, as -e_i).
+    """
+
+    def __init__(self, solver: pywraplp.Solver):
+        proto = linear_solver_pb2.MPModelProto()
+        solver.ExportModelToProto(proto)
+        self.nb_rows = len(proto.constraint)
+        self.nb_columns = len(proto.variable)
+        row_idx, col_idx, coefficients = [], [], []
+        for idx, constraint in enumerate(proto.constraint):
+            row_idx.extend([idx] * len(constraint.var_index))
+            col_idx.extend(constraint.var_index)
+            coefficients.extend(constraint.coefficient)
+        self.matrix = sparse.csc_matrix(
+            (coefficients, (row_idx, col_idx)), shape=(self.nb_rows, self.nb_columns)
+        )
+        self.costs = np.array([var.objective_coefficient for var in proto.variable])
+        variables, constraints = solver.variables(), solver.constraints()
+        self.column_status = np.array([var.basis_status() for var in variables])
+        self.row_status = np.array([constraint.basis_status() for constraint in constraints])
+        self.column_values = np.array([var.solution_value() for var in variables])
+        self.row_values = self.matrix @ self.column_values
+        self.column_bounds = np.array([(var.lower_bound, var.upper_bound) for var in proto.variable])
+        self.row_bounds = np.array([(row.lower_bound, row.upper_bound) for row in proto.constraint])
+        self.basic_columns = np.flatnonzero(self.column_status == pywraplp.Solver.BASIC)
+        self.basic_rows = np.flatnonzero(self.row_status == pywraplp.Solver.BASIC)
+        if len(self.basic_columns) + len(self.basic_rows) != self.nb_rows:
+            raise ValueError("The solver didn't return a complete basis")
+        slacks = -sparse.identity(self.nb_rows, format="csc")[:, self.basic_rows]
+        self._lu = sparse_linalg.splu(sparse.hstack([self.matrix[:, self.basic_columns], slacks], format="csc"))
+        self._basic_values = np.concatenate(
+            [self.column_values[self.basic_columns], self.row_values[self.basic_rows]]
+        )
+        self._basic_bounds = np.concatenate(
+            [self.column_bounds[self.basic_columns], self.row_bounds[self.basic_rows]]
+        )
+        self._basic_position = {int(column): pos for pos, column in enumerate(self.basic_columns)}
+        self._row_duals: np.ndarray | None = None
+
+    def duals(self, column_costs: np.ndarray) -> np.ndarray:
+        """Return the row duals y of B^T y = c_B for a cost on each column (slacks cost nothing).
+
+        y[i] is how much the cost changes when the bound of row i moves by 1 and the basis stays optimal.
+        """
+        basic_costs = np.concatenate([column_costs[self.basic_columns], np.zeros(len(self.basic_rows))])
+        return self._lu.solve(basic_costs, trans="T")
+
+    def solve(self, rhs: np.ndarray) -> np.ndarray:
+        """Return z of B z = rhs: how the basic variables move for a change of the row activities."""
+        return self._lu.solve(rhs)
+
+    @property
+    def row_duals(self) -> np.ndarray:
+        """The duals for the objective of the model."""
+        if self._row_duals is None:
+            self._row_duals = self.duals(self.costs)
+        return self._row_duals
+
+    def rhs(self, row: int) -> float:
+        """The bound that is the right-hand side of a row: its lower bound if it has one, else its upper."""
+        low, high = self.row_bounds[row]
+        return low if low > -math.inf else high
+
+    def rhs_ranging(self, row: int) -> tuple[float, float]:
+        """Return how far the right-hand side of a row can move (low, high) keeping the basis optimal."""
+        rhs = self.rhs(row)
+        low, high = self.row_bounds[row]
+        if self.row_status[row] == pywraplp.Solver.BASIC:  # not binding: up to the activity
+            return (-math.inf, self.row_values[row]) if rhs == low else (self.row_values[row], math.inf)
+        unit = np.zeros(self.nb_rows)
+        unit[row] = 1.0
+        moves = self.solve(unit)
+        delta_low, delta_high = -math.inf, math.inf
+        for move, value, (bound_low, bound_high) in zip(moves, self._basic_values, self._basic_bounds):
+            if abs(move) < _EPSILON:
+                continue
+            first, second = (bound_low - value) / move, (bound_high - value) / move
+            delta_low = max(delta_low, min(first, second))
+            delta_high = min(delta_high, max(first, second))
+        return rhs + delta_low, rhs + delta_high
+
+    def cost_ranging(self, column: int) -> tuple[float, float]:
+        """Return how far the objective coefficient of a column can move (low, high) keeping the basis optimal."""
+        cost = self.costs[column]
+        reduced_costs = cost - self.matrix[:, column].T @ self.row_duals
+        status = self.column_status[column]
+        if status == pywraplp.Solver.AT_LOWER_BOUND:
+            return cost - float(reduced_costs[0]), math.inf
+        if status == pywraplp.Solver.AT_UPPER_BOUND:
+            return -math.inf, cost - float(reduced_costs[0])
+        if status != pywraplp.Solver.BASIC:
+            return -math.inf, math.inf
+        unit = np.zeros(self.nb_rows)
+        unit[self._basic_position[column]] = 1.0
+        w = self._lu.solve(unit, trans="T")
+        # the reduced costs of the non basic columns then rows, and how they move with the cost
+        column_alphas = self.matrix.T @ w
+        all_reduced = np.concatenate([self.costs - self.matrix.T @ self.row_duals, self.row_duals])
+        all_alphas = np.concatenate([column_alphas, -w])
+        all_status = np.concatenate([self.column_status, self.row_status])
+        delta_low, delta_high = -math.inf, math.inf
+        for reduced, alpha, nonbasic_status in zip(all_reduced, all_alphas, all_status):
+            if abs(alpha) < _EPSILON or nonbasic_status not in (
+                pywraplp.Solver.AT_LOWER_BOUND,
+                pywraplp.Solver.AT_UPPER_BOUND,
+            ):
+                continue
+            limit = reduced / alpha
+            if (alpha > 0) == (nonbasic_status == pywraplp.Solver.AT_LOWER_BOUND):
+                delta_high = min(delta_high, limit)
+            else:
+                delta_low = max(delta_low, limit)
+        return cost + delta_low, cost + delta_high
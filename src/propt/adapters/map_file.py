@@ -0,0 +1,156 @@
+"""A compact, versioned file format for (solved) production maps and their graph.
+
+Layout, little-endian::
+
+    magic (8 bytes) | version (uint32) | header size (uint32) | JSON header | padding | arrays
+
+The JSON header holds the string table, the item table (name ID, temperature, energy ingredient) and,
+for each array, its dtype, offset and length. Arrays start on 8 bytes boundaries so they are memory-mapped
+as is on load: only the header is parsed.
+
+Graph nodes are integers: the items are 0..nb_items-1, the production units follow. Edges go from an item
+to the units consuming it and from a unit to the items it makes, with the rate of the unit times its
+quantity.
+"""
+from __future__ import annotations
+
+import json
+import pathlib
+import struct
+from typing import Any
+
+import numpy as np
+
+import propt.domain.optimizer.columnar as columnar
+import propt.domain.optimizer.model as model_opt
+
+MAGIC = b"PROPTMAP"
+VERSION = 1
+_PREFIX = struct.Struct("<8sII")
+_ALIGNMENT = 8
+
+
+class InvalidMapFile(Exception):
+    """Raised when a file isn't a production map file this version can read."""
+
+
+def _edges(prod_map: columnar.ColumnarProductionMap) -> dict[str, np.ndarray]:
+    """Build the edge table from the ingredient and product columns."""
+    nb_items = len(prod_map.items_by_id)
+    quantities = np.asarray(prod_map.quantities, dtype="<f8")
+    sources, targets, rates = [], [], []
+    for kind in ("ingredient", "product"):
+        offsets = np.asarray(getattr(prod_map, f"{kind}_offsets"), dtype="<i8")
+        item_ids = np.asarray(getattr(prod_map, f"{kind}_item_ids"), dtype="<i8")
+        unit_nodes = np.repeat(np.arange(len(quantities), dtype="<i8"), np.diff(offsets)) + nb_items
+        sources.append(item_ids if kind == "ingredient" else unit_nodes)
+        targets.append(unit_nodes if kind == "ingredient" else item_ids)
+        rates.append(
+            np.asarray(getattr(prod_map, f"{kind}_rates"), dtype="<f8")
+            * quantities[unit_nodes - nb_items]
+        )
+    return {
+        "edge_sources": np.concatenate(sources),
+        "edge_targets": np.concatenate(targets),
+        "edge_rates": np.concatenate(rates),
+    }
+
+
+def write(production_map: model_opt.ProductionMap, filepath: pathlib.Path) -> None:
+    """Write a production map and its graph."""
+    prod_map = columnar.ColumnarProductionMap.from_production_map(production_map)
+    strings: dict[str, int] = {}
+
+    def string_id(string: str) -> int:
+        return strings.setdefault(string, len(strings))
+
+    items = [
+        [string_id(item.name), item.temperature, item.energy_ingredient]
+        for item in prod_map.items_by_id
+    ]
+    arrays: dict[str, np.ndarray] = {
+        "recipe_names": np.array([string_id(name) for name in prod_map.recipe_names], dtype="<i4"),
+        "building_names": np.array([string_id(name) for name in prod_map.building_names], dtype="<i4"),
+        **{
+            name: np.asarray(getattr(prod_map, name), dtype="<f8" if typecode == "d" else "<i8")
+            for name, typecode in columnar.ColumnarProductionMap.ARRAY_COLUMNS
+        },
+        **_edges(prod_map),
+    }
+    sections: dict[str, dict[str, Any]] = {}
+    offset = 0
+    for name, values in arrays.items():
+        sections[name] = {"dtype": values.dtype.str, "offset": offset, "length": len(values)}
+        offset += -(-values.nbytes // _ALIGNMENT) * _ALIGNMENT
+    header = json.dumps(
+        {"strings": list(strings), "items": items, "nb_units": len(prod_map.recipe_names), "arrays": sections},
+        separators=(",", ":"),
+    ).encode()
+    data_start = -(-(_PREFIX.size + len(header)) // _ALIGNMENT) * _ALIGNMENT
+    with open(filepath, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        f.write(b"\0" * (data_start - _PREFIX.size - len(header)))
+        for name, values in arrays.items():
+            f.write(values.tobytes())
+            f.write(b"\0" * (-values.nbytes % _ALIGNMENT))
+
+
+class MapFile:
+    """A production map file opened with its arrays memory-mapped."""
+
+    def __init__(self, filepath: pathlib.Path):
+        with open(filepath, "rb") as f:
+            prefix = f.read(_PREFIX.size)
+            if len(prefix) < _PREFIX.size:
+                raise InvalidMapFile(f"{filepath} is too short")
+            magic, version, header_size = _PREFIX.unpack(prefix)
+            if magic != MAGIC:
+                raise InvalidMapFile(f"{filepath} isn't a production map file")
+            if version != VERSION:
+                raise InvalidMapFile(f"{filepath} has version {version}, only {VERSION} is supported")
+            header = json.loads(f.read(header_size))
+        data_start = -(-(_PREFIX.size + header_size) // _ALIGNMENT) * _ALIGNMENT
+        self._buffer = np.memmap(filepath, dtype=np.uint8, mode="r")
+        self.strings: list[str] = header["strings"]
+        self.items = [
+            model_opt.Item(name=self.strings[name_id], temperature=temperature, energy_ingredient=energy)
+            for name_id, temperature, energy in header["items"]
+        ]
+        self.nb_units: int = header["nb_units"]
+        self.arrays: dict[str, np.ndarray] = {
+            name: np.frombuffer(
+                self._buffer,
+                dtype=section["dtype"],
+                count=section["length"],
+                offset=data_start + section["offset"],
+            )
+            for name, section in header["arrays"].items()
+        }
+
+    @property
+    def production_map(self) -> columnar.ColumnarProductionMap:
+        """The production map, on the memory-mapped columns."""
+        return columnar.ColumnarProductionMap.from_arrays(
+            items=list(self.items),
+            recipe_names=[self.strings[name_id] for name_id in self.arrays["recipe_names"].tolist()],
+            building_names=[self.strings[name_id] for name_id in self.arrays["building_names"].tolist()],
+            **{name: self.arrays[name] for name, _ in columnar.ColumnarProductionMap.ARRAY_COLUMNS},
+        )
+
+    @property
+    def nb_nodes(self) -> int:
+        return len(self.items) + self.nb_units
+
+    @property
+    def edges(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """The sources, targets and rates of the edges."""
+        return self.arrays["edge_sources"], self.arrays["edge_targets"], self.arrays["edge_rates"]
+
+    def is_item_node(self, node: int) -> bool:
+        return node < len(self.items)
+
+
+def read(filepath: pathlib.Path) -> columnar.ColumnarProductionMap:
+    """Open a production map file and return its map."""
+    return MapFile(filepath).production_map
@@ -0,0 +1,56 @@
+"""Solve production maps with the electric network in MW.
+
+The map is rewritten once by EnergyNetwork, with Electricity in MW, and solved by ORToolsOptimizer: the
+Electricity row gets the scale of the item rates, so the LP is better conditioned. Plans come back with the
+original units, and the power balance of the last one is kept.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+import propt.adapters.solver_parameters as solver_parameters
+import propt.domain.optimizer.energy_network as energy_network
+import propt.domain.optimizer.model as model_opt
+from propt.adapters.optimizers import ORToolsOptimizer
+
+
+class EnergyNetworkOptimizer(model_opt.Optimizer):
+    """Optimizer solving the map with Electricity in MW, through ORToolsOptimizer.
+
+    The network is built by the first optimize and kept until units are added.
+    """
+
+    def __init__(
+        self,
+        production_map: model_opt.ProductionMap,
+        item_constraints: Iterable[tuple[model_opt.Item, float]],
+        prod_unit_constraints: Iterable[tuple[model_opt.ProductionUnit, float]],
+        parameters: Optional[solver_parameters.SolverParameters] = None,
+    ):
+        super().__init__(production_map, item_constraints, prod_unit_constraints)
+        self.parameters = parameters
+        self.power_balance: Optional[energy_network.PowerBalance] = None
+        """The power made and used by the last plan."""
+        self._network: Optional[energy_network.EnergyNetwork] = None
+
+    def add_production_units(self, production_units: Iterable[model_opt.ProductionUnit]) -> None:
+        super().add_production_units(production_units)
+        self._network = None
+
+    @property
+    def network(self) -> energy_network.EnergyNetwork:
+        if self._network is None:
+            self._network = energy_network.EnergyNetwork(self._production_map)
+        return self._network
+
+    def optimize(self) -> model_opt.ProductionMap:
+        item_constraints, prod_unit_constraints = self.network.scale_constraints(
+            self._item_constraints, self._prod_unit_constraints
+        )
+        result = self.network.unscale(
+            ORToolsOptimizer(
+                self.network.production_map, item_constraints, prod_unit_constraints, parameters=self.parameters
+            ).optimize()
+        )
+        self.power_balance = self.network.power_balance(result)
+        return result
@@ -1,117 +1,235 @@
 """Implementations of optimization."""
 import collections
 import itertools
+import math
 import pathlib
+from typing import Iterable, Sequence
 
 import networkx as nx  # type: ignore
+import numpy as np
+import scipy.optimize as sp_optimize  # type: ignore
+import scipy.sparse as sparse  # type: ignore
 from networkx.drawing.nx_agraph import write_dot  # type: ignore
 from ortools.linear_solver import pywraplp  # type: ignore
 
+import propt.adapters.lp_basis as lp_basis
+import propt.adapters.solver_parameters as solver_parameters
+import propt.adapters.sparse_model as sparse_model
 import propt.domain.optimizer.model as model_opt
 
 
 class ORToolsOptimizer(model_opt.Optimizer):
-    """Optimizer using Google OR-Tools."""
-
-    def _build_item_index(self) -> dict[model_opt.Item, int]:
-        item_set = {
-            item
-            for prod_unit in self._production_map.production_units
-            for item in itertools.chain(
-                prod_unit.ingredients.keys(), prod_unit.products.keys()
-            )
-        }
-        return {item: idx for idx, item in enumerate(item_set)}
+    """Optimizer using Google OR-Tools.
 
-    def _build_prod_unit_index(self) -> dict[model_opt.ProductionUnit, int]:
-        return {
-            prod_unit: idx
-            for idx, prod_unit in enumerate(self._production_map.production_units)
-        }
+    The model is built by the first optimize and kept: units added later with add_production_units become
+    new columns, and the next optimize starts from the previous solution. evaluate_with adds its units to the
+    model only, as disabled columns (upper bound 0) once, and only enables them for its solve.
 
-    def _build_nb_prod_unit_variables(
-        self, solver: pywraplp.Solver
-    ) -> list[pywraplp.Variable]:
-        """Add the nb of prod unit variables to the solver."""
-        len_prod_unit = len(self._production_map.production_units)
-        infinity = solver.infinity()
-        return [
-            # solver.IntVar(0, infinity, self._production_map.production_units[idx].name)
-            solver.NumVar(0, infinity, self._production_map.production_units[idx].name)
-            for idx in range(len_prod_unit)
-        ]
+    Without parameters, those of the solver profile are used (the defaults if there is no profile file).
+    """
 
-    def _build_constraints(
+    def __init__(
         self,
-        solver: pywraplp.Solver,
-        nb_prod_unit_vars: list[pywraplp.Variable],
-    ) -> list[pywraplp.Constraint]:
-        prod_unit_index = self._build_prod_unit_index()
-        # Create the collection item -> qty on constraints
+        production_map: model_opt.ProductionMap,
+        item_constraints: Iterable[tuple[model_opt.Item, float]],
+        prod_unit_constraints: Iterable[tuple[model_opt.ProductionUnit, float]],
+        parameters: solver_parameters.SolverParameters | None = None,
+    ):
+        super().__init__(production_map, item_constraints, prod_unit_constraints)
+        self.parameters = parameters or solver_parameters.SolverParameters.load()
+        self._solver: pywraplp.Solver | None = None
+        self._solve_parameters: pywraplp.MPSolverParameters | None = None
+        self._nb_prod_unit_vars: list[pywraplp.Variable] = []
+        self._item_rows: dict[model_opt.Item, pywraplp.Constraint] = {}
+        self._candidate_vars: dict[model_opt.ProductionUnit, pywraplp.Variable] = {}
+        """The disabled columns of the units evaluate_with tried, which aren't in the map."""
+        self._prod_unit_rows: list[tuple[model_opt.ProductionUnit, pywraplp.Constraint]] = []
+        self._elastic_vars: dict[int, pywraplp.Variable] = {}
+        """The elastic variable relaxing each row (by index), at 0 outside of diagnose_infeasibility."""
+        self._objective_rows: dict[str, pywraplp.Constraint] = {}
+        """The row bounding each objective (by name) in the lexicographic solves, free between them."""
+        self._result: model_opt.ProductionMap | None = None
+        """The map returned by the last optimize."""
+        self._optimized = False
+        """Whether the solver still holds the solution of the last optimize (no other solve since)."""
+
+    @classmethod
+    def from_stream(
+        cls,
+        production_units: Iterable[model_opt.ProductionUnit],
+        item_constraints: Iterable[tuple[model_opt.Item, float]],
+        prod_unit_constraints: Iterable[tuple[model_opt.ProductionUnit, float]] = (),
+        parameters: solver_parameters.SolverParameters | None = None,
+    ) -> "ORToolsOptimizer":
+        """Build the model while the units are generated (see ProductionMap.iter_production_units).
+
+        The units are read once: the map of the optimizer is the list of the units read.
+        """
+        optimizer = cls(model_opt.ProductionMap([]), item_constraints, prod_unit_constraints, parameters=parameters)
+        production_units = optimizer._add_columns(optimizer._new_solver(), production_units)
+        optimizer._production_map = model_opt.ProductionMap(production_units)
+        optimizer._add_prod_unit_rows()
+        return optimizer
+
+    def _new_solver(self) -> pywraplp.Solver:
+        """Start the kept model with the objective (min nb buildings), without columns or rows."""
+        self._solver, self._solve_parameters = self.parameters.create_ortools_solver()
+        self._solver.Objective().SetMinimization()
+        return self._solver
+
+    def _add_columns(
+        self, solver: pywraplp.Solver, production_units: Iterable[model_opt.ProductionUnit]
+    ) -> list[model_opt.ProductionUnit]:
+        """Add the columns of the units of the map in one pass, the item rows as they appear; return the units."""
+        added = []
+        for prod_unit in production_units:
+            self._nb_prod_unit_vars.append(self._add_column(prod_unit, solver.infinity()))
+            added.append(prod_unit)
+        return added
+
+    def _add_prod_unit_rows(self) -> None:
+        """Add the rows capping the nb of units."""
+        variables = dict(zip(self._production_map.production_units, self._nb_prod_unit_vars))
+        for prod_unit, max_units in self._prod_unit_constraints:
+            row = self.solver.Add(variables[prod_unit] <= max_units, name=f"{prod_unit.name}-chier")
+            self._prod_unit_rows.append((prod_unit, row))
+
+    def _build_model(self) -> pywraplp.Solver:
+        solver = self._new_solver()
+        self._add_columns(solver, self._production_map.production_units)
+        self._add_prod_unit_rows()
+        return solver
+
+    @property
+    def solver(self) -> pywraplp.Solver:
+        """The kept model, built the first time it is needed."""
+        return self._solver if self._solver is not None else self._build_model()
+
+    def _add_column(self, prod_unit: model_opt.ProductionUnit, upper_bound: float) -> pywraplp.Variable:
+        """Add the variable of a unit to the built model, with its coefficients in the item rows."""
+        solver = self.solver
+        var = solver.NumVar(0, upper_bound, prod_unit.name)
+        solver.Objective().SetCoefficient(var, 1)
         external_constraints = dict(self._item_constraints)
-        # Create a collection item -> index of prod unit using those
-        map_item_prod_unit: dict[model_opt.Item, list[int]] = collections.defaultdict(
-            list
-        )
-        for prod_unit in self._production_map.production_units:
-            for item in itertools.chain(
-                prod_unit.ingredients.keys(), prod_unit.products.keys()
-            ):
-                map_item_prod_unit[item].append(prod_unit_index[prod_unit])
-        # Create the variables for each item IN ORDER
-        constraints: list[pywraplp.Constraint] = []
-        for item, prod_unit_indexes in map_item_prod_unit.items():
-            lhs_constraints = [
-                nb_prod_unit_vars[prod_unit_idx]
-                * self._production_map.production_units[
-                    prod_unit_idx
-                ].get_item_net_quantity_by_unit_of_time(item)
-                for prod_unit_idx in prod_unit_indexes
-            ]
-            min_items = external_constraints.get(item, 0.0)
-            if min_items == 0.0:
-                constraint = solver.Add(sum(lhs_constraints) >= min_items, name=f"{item.name}-{item.temperature}")
-                #constraint = solver.Add(sum(lhs_constraints) == min_items, name=f"{item.name}-{item.temperature}")
-            else:  # Target constraints
-                constraint = solver.Add(sum(lhs_constraints) >= min_items, name=item.name)
-            constraints.append(constraint)
-            if min_items == 0.0:
-                constraint.set_is_lazy(True)
-        # prod_unit_constraints
-        for prod_unit_constraint in self._prod_unit_constraints:
-            constraint = solver.Add(
-                nb_prod_unit_vars[prod_unit_index[prod_unit_constraint[0]]]
-                <= prod_unit_constraint[1],
-                name=f"{prod_unit_constraint[0].name}-chier",
-            )
-            constraints.append(constraint)
-        return constraints
+        for item in dict.fromkeys(itertools.chain(prod_unit.ingredients, prod_unit.products)):
+            if (row := self._item_rows.get(item)) is None:
+                min_items = external_constraints.get(item, 0.0)
+                row = self._item_rows[item] = solver.Constraint(
+                    min_items,
+                    solver.infinity(),
+                    f"{item.name}-{item.temperature}" if min_items == 0.0 else item.name,
+                )
+                row.set_is_lazy(min_items == 0.0)
+            row.SetCoefficient(var, prod_unit.get_item_net_quantity_by_unit_of_time(item))
+        return var
 
-    def _build_objective(
-        self, solver: pywraplp.Solver, nb_prod_unit_vars: list[pywraplp.Variable]
-    ):
-        """Build the objective function (min nb buildings)."""
-        solver.Minimize(sum(nb_prod_unit_vars))
+    def add_production_units(self, production_units: Iterable[model_opt.ProductionUnit]) -> None:
+        """Add units to the map and, if it is built, to the model.
+
+        A unit evaluate_with already tried gets its column enabled.
+        """
+        production_units = list(production_units)
+        super().add_production_units(production_units)
+        self._result, self._optimized = None, False  # the last plan is for other columns
+        if self._solver is None:
+            return
+        for prod_unit in production_units:
+            if (var := self._candidate_vars.pop(prod_unit, None)) is not None:
+                var.SetUb(self._solver.infinity())
+            else:
+                var = self._add_column(prod_unit, self._solver.infinity())
+            self._nb_prod_unit_vars.append(var)
+
+    def evaluate_with(self, production_units: Iterable[model_opt.ProductionUnit]) -> float | None:
+        solver = self.solver
+        variables = []
+        for prod_unit in dict.fromkeys(production_units):
+            if (var := self._candidate_vars.get(prod_unit)) is None:
+                var = self._candidate_vars[prod_unit] = self._add_column(prod_unit, 0)
+            variables.append(var)
+        infinity = solver.infinity()
+        for var in variables:
+            var.SetUb(infinity)
+        self._optimized = False
+        try:
+            if solver.Solve(self._solve_parameters) != pywraplp.Solver.OPTIMAL:
+                return None
+            return solver.Objective().Value()
+        finally:
+            for var in variables:
+                var.SetUb(0)
+
+    def _elastic_var(self, row: pywraplp.Constraint, relaxed: bool) -> pywraplp.Variable:
+        """Return the variable relaxing a row, creating it the first time."""
+        if (var := self._elastic_vars.get(row.index())) is None:
+            var = self._elastic_vars[row.index()] = self.solver.NumVar(0, 0, f"elastic-{row.name()}")
+            # a target row (>=) is relaxed by adding to it, a cap row (<=) by removing from it
+            row.SetCoefficient(var, 1 if row.lb() > -self.solver.infinity() else -1)
+        var.SetUb(self.solver.infinity() if relaxed else 0)
+        return var
+
+    def diagnose_infeasibility(self) -> model_opt.InfeasibilityReport | None:
+        """Return a minimal set of item rows and unit caps in conflict, None if the scenario is feasible.
+
+        An elastic filter first solves with every row relaxed, minimizing the relaxation, and enforces the
+        rows it had to relax until the enforced rows conflict. A deletion filter then relaxes the enforced
+        rows one by one and keeps relaxed those the conflict doesn't need. The model is kept and restored.
+        """
+        solver = self.solver
+        rows: list[tuple[model_opt.Item | model_opt.ProductionUnit, pywraplp.Constraint]] = [
+            *self._item_rows.items(),
+            *self._prod_unit_rows,
+        ]
+        self._optimized = False
+        objective = solver.Objective()
+        for var in self._nb_prod_unit_vars:
+            objective.SetCoefficient(var, 0)
+        elastic_vars = [self._elastic_var(row, relaxed=True) for _, row in rows]
+        for var in elastic_vars:
+            objective.SetCoefficient(var, 1)
+        try:
+            enforced: list[int] = []
+            while solver.Solve(self._solve_parameters) == pywraplp.Solver.OPTIMAL:
+                relaxed = [
+                    idx
+                    for idx, var in enumerate(elastic_vars)
+                    if idx not in enforced and var.solution_value() > 1e-9
+                ]
+                if not relaxed:
+                    return None
+                for idx in relaxed:
+                    elastic_vars[idx].SetUb(0)
+                enforced.extend(relaxed)
+            for var in elastic_vars:
+                objective.SetCoefficient(var, 0)
+            conflict = []
+            for idx in enforced:
+                elastic_vars[idx].SetUb(solver.infinity())
+                if solver.Solve(self._solve_parameters) == pywraplp.Solver.OPTIMAL:  # needed to conflict
+                    elastic_vars[idx].SetUb(0)
+                    conflict.append(rows[idx][0])
+        finally:
+            for var in elastic_vars:
+                var.SetUb(0)
+                objective.SetCoefficient(var, 0)
+            for var in self._nb_prod_unit_vars:
+                objective.SetCoefficient(var, 1)
+        return model_opt.InfeasibilityReport(
+            item_targets=tuple(obj for obj in conflict if isinstance(obj, model_opt.Item)),
+            production_unit_caps=tuple(
+                obj for obj in conflict if isinstance(obj, model_opt.ProductionUnit)
+            ),
+        )
 
     def optimize(self) -> model_opt.ProductionMap:
-        # solver: pywraplp.Solver = pywraplp.Solver.CreateSolver("GLOP")
-        # solver.SetSolverSpecificParametersAsString("display/verblevel=5")
-        # solver.SetSolverSpecificParametersAsString("display/lpiterations/active=2")
-        # solver.SetSolverSpecificParametersAsString("display/lpinfo=TRUE")
-        solver: pywraplp.Solver = pywraplp.Solver.CreateSolver("CLP")
-        solver.EnableOutput()
-        solver.SetNumThreads(3)
-        # solver
-        # solver.set_time_limit(1*60*1000)
-        nb_prod_unit_vars = self._build_nb_prod_unit_variables(solver)
-        constraints = self._build_constraints(solver, nb_prod_unit_vars)
-        self._build_objective(solver, nb_prod_unit_vars)
+        solver = self.solver
+        nb_prod_unit_vars = self._nb_prod_unit_vars
         print("Ready to solve")
         print(type(solver))
         print(f"Number of variables: {len(solver.variables())}")
         print(f"Number of constraints: {len(solver.constraints())}")
         # solver.
-        status = solver.Solve()
+        status = solver.Solve(self._solve_parameters)
         if status != pywraplp.Solver.OPTIMAL:
             raise model_opt.SolutionNotFound
         print()
@@ -124,28 +242,440 @@ class ORToolsOptimizer(model_opt.Optimizer):
         print("Problem solved in %f milliseconds" % solver.wall_time())
         print("Problem solved in %d iterations" % solver.iterations())
         print("Problem solved in %d branch-and-bound nodes" % solver.nodes())
-        # Build the prod map
+        self._result = self._solution_map()
+        self._optimized = True
+        return self._result
 
+    def _last_solution(self) -> model_opt.ProductionMap:
+        """Return the map of the last optimize, with its solution in the solver (solving its model again if needed).
+
+        evaluate_with, diagnose_infeasibility and the lexicographic modes solve other models in between, then
+        restore the model: solving it again gives the solution back.
+        """
+        if self._result is None:
+            raise model_opt.SolutionNotFound("optimize has to succeed first")
+        if not self._optimized:
+            if self.solver.Solve(self._solve_parameters) != pywraplp.Solver.OPTIMAL:
+                raise model_opt.SolutionNotFound("Can't solve the model of the last optimize again")
+            self._optimized = True
+        return self._result
+
+    def _solution_map(self) -> model_opt.ProductionMap:
+        """Build the prod map of the last solve."""
         prod_units: list[model_opt.ProductionUnit] = []
         for idx, prod_unit in enumerate(self._production_map.production_units):
-            if (qty := nb_prod_unit_vars[idx].solution_value()) > 0.00001:
-                prod_units.append(
-                    model_opt.ProductionUnit(
-                        recipe_name=prod_unit.recipe_name,
-                        building_name=prod_unit.building_name,
-                        ingredients=prod_unit.ingredients,
-                        products=prod_unit.products,
-                        quantity=qty,
-                    )
-                )
+            if (qty := self._nb_prod_unit_vars[idx].solution_value()) > 0.00001:
+                prod_units.append(prod_unit.with_quantity(qty))
         return model_opt.ProductionMap(production_units=prod_units)
 
+    def _weights(self, objective: model_opt.Objective) -> list[float]:
+        return [objective.weight(prod_unit) for prod_unit in self._production_map.production_units]
+
+    def _set_objective(self, objective: model_opt.Objective) -> list[float]:
+        """Minimize an objective from now on, and return the weight of each unit."""
+        weights = self._weights(objective)
+        solver_objective = self.solver.Objective()
+        for var, weight in zip(self._nb_prod_unit_vars, weights):
+            solver_objective.SetCoefficient(var, weight)
+        return weights
+
+    def _solve_objective(self, objective: model_opt.Objective) -> tuple[float, list[float]]:
+        """Minimize an objective, starting from the last basis; return its value and the weights."""
+        weights = self._set_objective(objective)
+        self._optimized = False
+        if self.solver.Solve(self._solve_parameters) != pywraplp.Solver.OPTIMAL:
+            raise model_opt.SolutionNotFound(f"Can't minimize {objective.name}")
+        return self.solver.Objective().Value(), weights
+
+    def _bound_objective(
+        self, objective: model_opt.Objective, weights: list[float], value: float, name: str | None = None
+    ) -> pywraplp.Constraint:
+        """Keep an objective at most its value, with its tolerance, in the row of that name (reused)."""
+        name = name or f"objective {objective.name}"
+        row = self._objective_rows.get(name)
+        if row is None:
+            row = self._objective_rows[name] = self.solver.Constraint(
+                -self.solver.infinity(), self.solver.infinity(), name
+            )
+        for var, weight in zip(self._nb_prod_unit_vars, weights):
+            if weight or row.GetCoefficient(var):
+                row.SetCoefficient(var, weight)
+        row.SetUb(value + objective.tolerance * max(1.0, abs(value)))
+        return row
+
+    def _release(self, rows: Iterable[pywraplp.Constraint]) -> None:
+        """Free the bound rows until their next use and minimize buildings again."""
+        for row in rows:
+            row.SetBounds(-self.solver.infinity(), self.solver.infinity())
+        self._set_objective(model_opt.Objective.buildings())
+
+    def _lexicographic(
+        self, objectives: Sequence[model_opt.Objective]
+    ) -> tuple[model_opt.ProductionMap, dict[str, float]]:
+        """Minimize the objectives in priority order; return the map and the value of each objective."""
+        values: dict[str, float] = {}
+        rows: list[pywraplp.Constraint] = []
+        try:
+            for objective in objectives:
+                values[objective.name], weights = self._solve_objective(objective)
+                result = self._solution_map()  # before the model changes
+                rows.append(self._bound_objective(objective, weights, values[objective.name]))
+        finally:
+            self._release(rows)
+        result.objective_values = values
+        return result, values
+
+    def optimize_lexicographic(self, objectives: Sequence[model_opt.Objective]) -> model_opt.ProductionMap:
+        """Minimize the objectives in priority order.
+
+        Each objective is minimized in turn, starting from the previous basis, then kept within its tolerance
+        of that minimum as a constraint for the next ones. The map returned has the objective_values.
+        """
+        return self._lexicographic(objectives)[0]
+
+    def pareto_front(
+        self, first: model_opt.Objective, second: model_opt.Objective, nb_points: int = 10
+    ) -> list[model_opt.ProductionMap]:
+        """Return the plans trading first for second, from the best first to the best second.
+
+        The second objective is bounded by nb_points values between its value at the best first and its
+        minimum, and the first is minimized under each bound (the second is then minimized with the first
+        fixed, so no point is dominated). Every solve reuses the model and the last basis.
+        """
+        best_first = self._lexicographic([first, second])
+        best_second = self._lexicographic([second, first])
+        high, low = best_first[1][second.name], best_second[1][second.name]
+        points = [best_first]
+        for step in range(1, nb_points - 1):
+            bound = high + (low - high) * step / (nb_points - 1)
+            row = self._bound_objective(second, self._weights(second), bound, f"pareto {second.name}")
+            try:
+                points.append(self._lexicographic([first, second]))
+            finally:
+                self._release([row])
+        points.append(best_second)
+        front: list[tuple[model_opt.ProductionMap, dict[str, float]]] = []
+        for point in points:  # the bounds can give the same point several times
+            if not front or any(
+                abs(point[1][name] - front[-1][1][name]) > 1e-6 for name in (first.name, second.name)
+            ):
+                front.append(point)
+        return [production_map for production_map, _ in front]
+
+    def _round_up(
+        self,
+        lp_values: dict[int, float],
+        rows: dict[model_opt.Item, list[tuple[int, float]]],
+        upper_bounds: dict[int, float],
+    ) -> dict[int, int] | None:
+        """Round the LP solution up, then add producers of the items still missing; None if that fails."""
+        min_items = dict(self._item_constraints)
+        counts = {idx: math.ceil(value - 1e-9) for idx, value in lp_values.items()}
+        for _ in range(100 * len(counts)):
+            missing = next(
+                (
+                    (item, missing_qty)
+                    for item, row in rows.items()
+                    if (missing_qty := min_items.get(item, 0.0) - sum(rate * counts[idx] for idx, rate in row)) > 1e-9
+                ),
+                None,
+            )
+            if missing is None:
+                return counts
+            item, missing_qty = missing
+            producers = [(idx, rate) for idx, rate in rows[item] if rate > 0 and counts[idx] < upper_bounds[idx]]
+            if not producers:
+                return None
+            idx, rate = max(producers, key=lambda producer: producer[1])
+            counts[idx] = int(min(upper_bounds[idx], counts[idx] + math.ceil(missing_qty / rate - 1e-9)))
+        return None
+
+    def _solve_integer(
+        self,
+        lp_values: dict[int, float],
+        time_limit: float | None,
+        relative_gap: float,
+    ) -> dict[int, int] | None:
+        """Return the building counts of the units of lp_values (the others are at 0), None if there are none."""
+        production_units = self._production_map.production_units
+        upper_bounds = {
+            idx: math.floor(ub + 1e-9) if math.isfinite(ub := self._nb_prod_unit_vars[idx].ub()) else math.inf
+            for idx in lp_values
+        }
+        prod_unit_index = {production_units[idx]: idx for idx in lp_values}
+        for prod_unit, max_units in self._prod_unit_constraints:
+            if (idx := prod_unit_index.get(prod_unit)) is not None:
+                upper_bounds[idx] = min(upper_bounds[idx], math.floor(max_units + 1e-9))
+        rows: dict[model_opt.Item, list[tuple[int, float]]] = collections.defaultdict(list)
+        for idx in lp_values:
+            for item in production_units[idx].items:
+                rows[item].append((idx, production_units[idx].get_item_net_quantity_by_unit_of_time(item)))
+        incumbent = self._round_up(lp_values, rows, upper_bounds)
+
+        solver = pywraplp.Solver.CreateSolver(self.parameters.mip_backend)
+        infinity = solver.infinity()
+        variables = {
+            idx: solver.IntVar(0, min(upper_bounds[idx], infinity), production_units[idx].name) for idx in lp_values
+        }
+        min_items = dict(self._item_constraints)
+        for item, row in rows.items():
+            solver.Add(
+                sum(rate * variables[idx] for idx, rate in row) >= min_items.get(item, 0.0),
+                name=f"{item.name}-{item.temperature}",
+            )
+        solver.Minimize(sum(variables.values()))
+        if incumbent is not None:
+            solver.SetHint(list(variables.values()), [incumbent[idx] for idx in variables])
+        if time_limit is not None:
+            solver.SetTimeLimit(int(time_limit * 1000))
+        solve_parameters = pywraplp.MPSolverParameters()
+        solve_parameters.SetDoubleParam(solve_parameters.RELATIVE_MIP_GAP, relative_gap)
+        if solver.Solve(solve_parameters) in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+            counts = {idx: round(var.solution_value()) for idx, var in variables.items()}
+            if incumbent is None or sum(counts.values()) <= sum(incumbent.values()):
+                return counts
+        return incumbent
+
+    def optimize_integer(
+        self,
+        time_limit: float | None = None,
+        relative_gap: float | None = None,
+        support_threshold: float = 1e-6,
+    ) -> model_opt.ProductionMap:
+        """Return a plan with whole building counts.
+
+        The LP relaxation is solved first, on the kept model. The units it doesn't use are left out and a MIP
+        (the mip_backend of the parameters) is solved on the others, starting from the LP solution rounded
+        up. That rounded plan is returned when the MIP doesn't find a better one within the time limit. If
+        there is no integer plan on those units, the units sharing an item with them are added, until there
+        is one. time_limit (in seconds, for each MIP) and relative_gap default to those of the parameters.
+        """
+        self.optimize()
+        time_limit = time_limit if time_limit is not None else self.parameters.time_limit
+        relative_gap = relative_gap if relative_gap is not None else self.parameters.relative_gap
+        production_units = self._production_map.production_units
+        lp_values = {
+            idx: value
+            for idx, var in enumerate(self._nb_prod_unit_vars)
+            if (value := var.solution_value()) > support_threshold
+        }
+        units_by_item: dict[model_opt.Item, list[int]] = collections.defaultdict(list)
+        for idx, prod_unit in enumerate(production_units):
+            for item in prod_unit.items:
+                units_by_item[item].append(idx)
+        while (counts := self._solve_integer(lp_values, time_limit, relative_gap)) is None:
+            neighbours = {
+                idx
+                for support_idx in lp_values
+                for item in production_units[support_idx].items
+                for idx in units_by_item[item]
+                if idx not in lp_values
+            }
+            if not neighbours:
+                raise model_opt.SolutionNotFound("No integer plan")
+            lp_values.update(dict.fromkeys(neighbours, 0.0))
+        return model_opt.ProductionMap(
+            production_units=[
+                production_units[idx].with_quantity(count)
+                for idx, count in counts.items()
+                if count > 0
+            ]
+        )
+
+    def marginal_costs(self, raw_resources: Iterable[model_opt.Item] = ()) -> model_opt.MarginalCostTable:
+        """Return the marginal cost of every item from the last optimize, and store it on its result.
+
+        The cost in buildings is the dual value of the item constraint. The cost in raw resources uses the
+        same basis, with the extraction of each resource as the objective.
+        """
+        result, solver = self._last_solution(), self.solver
+        raw_resources = list(raw_resources)
+        raw_duals: list[np.ndarray] = []
+        if raw_resources:
+            basis = lp_basis.LPBasis(solver)
+            production_units = self._production_map.production_units
+            for raw_resource in raw_resources:
+                # a cost by column of the model: elastic and evaluate_with columns are at 0
+                extraction = np.zeros(solver.NumVariables())
+                for idx, var in enumerate(self._nb_prod_unit_vars):
+                    extraction[var.index()] = production_units[idx].get_item_produced_quantity_by_unit_of_time(
+                        raw_resource
+                    )
+                raw_duals.append(basis.duals(extraction))
+        table = model_opt.MarginalCostTable(
+            (
+                item,
+                model_opt.MarginalCost(
+                    buildings=row.dual_value(),
+                    raw_resources={
+                        raw_resource: float(duals[row.index()])
+                        for raw_resource, duals in zip(raw_resources, raw_duals)
+                    },
+                ),
+            )
+            for item, row in self._item_rows.items()
+        )
+        result.marginal_costs = table
+        return table
+
+    def sensitivity(self) -> model_opt.SensitivityReport:
+        """Return the ranging of the last optimize from its basis, and store it on its result.
+
+        Moving a target, a cap or a unit cost inside its range keeps the same units in the plan: the
+        objective then moves linearly, by the dual for targets and caps.
+        """
+        result = self._last_solution()
+        basis = lp_basis.LPBasis(self.solver)
+
+        def constraint_sensitivity(row: pywraplp.Constraint) -> model_opt.ConstraintSensitivity:
+            low, high = basis.rhs_ranging(row.index())
+            return model_opt.ConstraintSensitivity(
+                dual=row.dual_value(),
+                rhs=model_opt.ValueRange(value=basis.rhs(row.index()), low=low, high=high),
+            )
+
+        production_units = self._production_map.production_units
+        unit_costs = {}
+        for idx, var in enumerate(self._nb_prod_unit_vars):
+            low, high = basis.cost_ranging(var.index())
+            unit_costs[production_units[idx]] = model_opt.ValueRange(
+                value=basis.costs[var.index()], low=low, high=high
+            )
+        report = model_opt.SensitivityReport(
+            item_targets={item: constraint_sensitivity(row) for item, row in self._item_rows.items()},
+            production_unit_caps=[
+                (prod_unit, constraint_sensitivity(row)) for prod_unit, row in self._prod_unit_rows
+            ],
+            unit_costs=unit_costs,
+        )
+        result.sensitivity = report
+        return report
+
+
+class HiGHSOptimizer(model_opt.Optimizer):
+    """Optimizer using the HiGHS solver of scipy.optimize.linprog.
+
+    The model is built as sparse arrays by the first optimize and kept. method is a linprog method:
+    "highs-ds" (dual simplex), "highs-ipm" (interior point) or "highs" (let HiGHS choose). Without it, the
+    method is the algorithm of the parameters, which are those of the solver profile if not given.
+    """
+
+    METHODS = ("highs", "highs-ds", "highs-ipm")
+
+    def __init__(
+        self,
+        production_map: model_opt.ProductionMap,
+        item_constraints: Iterable[tuple[model_opt.Item, float]],
+        prod_unit_constraints: Iterable[tuple[model_opt.ProductionUnit, float]],
+        method: str | None = None,
+        parameters: solver_parameters.SolverParameters | None = None,
+    ):
+        self.parameters = parameters or solver_parameters.SolverParameters.load()
+        method = method or self.parameters.linprog_method
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown HiGHS method {method}, expected one of {self.METHODS}")
+        super().__init__(production_map, item_constraints, prod_unit_constraints)
+        self.method = method
+        self._model: tuple[sparse.csr_matrix, np.ndarray, np.ndarray] | None = None
+        self._result: model_opt.ProductionMap | None = None
+        """The map returned by the last optimize."""
+
+    def add_production_units(self, production_units: Iterable[model_opt.ProductionUnit]) -> None:
+        super().add_production_units(production_units)
+        self._model = None
+
+    @classmethod
+    def from_stream(
+        cls,
+        production_units: Iterable[model_opt.ProductionUnit],
+        item_constraints: Iterable[tuple[model_opt.Item, float]],
+        prod_unit_constraints: Iterable[tuple[model_opt.ProductionUnit, float]] = (),
+        method: str | None = None,
+        parameters: solver_parameters.SolverParameters | None = None,
+    ) -> "HiGHSOptimizer":
+        """Build the model while the units are generated (see ProductionMap.iter_production_units).
+
+        The units are read once: the map of the optimizer is the list the builder kept.
+        """
+        prod_unit_constraints = list(prod_unit_constraints)
+        builder = sparse_model.SparseModelBuilder(prod_unit_constraints).extend(production_units)
+        optimizer = cls(
+            model_opt.ProductionMap(builder.production_units),
+            item_constraints,
+            prod_unit_constraints,
+            method=method,
+            parameters=parameters,
+        )
+        optimizer._model = optimizer._model_from(builder)
+        return optimizer
+
+    def _model_from(
+        self, builder: sparse_model.SparseModelBuilder
+    ) -> tuple[sparse.csr_matrix, np.ndarray, np.ndarray]:
+        """Return (A_ub, b_ub, bounds): one row by item, -net rate * nb units <= -min items."""
+        return -builder.matrix(), -builder.min_items(self._item_constraints), builder.bounds()
+
+    def _build_model(self) -> tuple[sparse.csr_matrix, np.ndarray, np.ndarray]:
+        builder = sparse_model.SparseModelBuilder(self._prod_unit_constraints)
+        self._model = self._model_from(builder.extend(self._production_map.production_units))
+        return self._model
+
+    def optimize(self) -> model_opt.ProductionMap:
+        matrix, rhs, bounds = self._model or self._build_model()
+        solution = sp_optimize.linprog(
+            np.ones(matrix.shape[1]),
+            A_ub=matrix,
+            b_ub=rhs,
+            bounds=bounds,
+            method=self.method,
+            options=self.parameters.linprog_options,
+        )
+        if solution.status != 0:
+            raise model_opt.SolutionNotFound(solution.message)
+        self._result = model_opt.ProductionMap(
+            production_units=[
+                prod_unit.with_quantity(qty)
+                for prod_unit, qty in zip(self._production_map.production_units, solution.x)
+                if qty > 0.00001
+            ]
+        )
+        return self._result
+
+
+def create_optimizer(
+    production_map: model_opt.ProductionMap,
+    item_constraints: Iterable[tuple[model_opt.Item, float]],
+    prod_unit_constraints: Iterable[tuple[model_opt.ProductionUnit, float]],
+    parameters: solver_parameters.SolverParameters | None = None,
+) -> model_opt.Optimizer:
+    """Return the optimizer of the backend of the parameters (by default, those of the solver profile)."""
+    parameters = parameters or solver_parameters.SolverParameters.load()
+    if parameters.backend == solver_parameters.SCIPY_BACKEND:
+        return HiGHSOptimizer(production_map, item_constraints, prod_unit_constraints, parameters=parameters)
+    return ORToolsOptimizer(production_map, item_constraints, prod_unit_constraints, parameters=parameters)
+
+
+UBIQUITOUS_ITEMS = frozenset(
+    {
+        model_opt.Item(name="Electricity"),
+        model_opt.Item(name="drill-head"),
+        model_opt.Item(name="water", temperature=15),
+        model_opt.Item(name="pressured-air", temperature=15),
+    }
+)
+"""Ingredients available everywhere: the graphs don't draw the edges to their consumers."""
+
 
 class NetworkXProductionGraph:
     """A production graph."""
 
-    def __init__(self, production_map: model_opt.ProductionMap):
+    def __init__(
+        self,
+        production_map: model_opt.ProductionMap,
+        ubiquitous_items: Iterable[model_opt.Item] = UBIQUITOUS_ITEMS,
+    ):
         self.production_map = production_map
+        self.ubiquitous_items = frozenset(ubiquitous_items)
         self.graph = self._build_graph()
 
     @staticmethod
@@ -160,24 +690,32 @@ class NetworkXProductionGraph:
         )
         for prod_unit in self.production_map.production_units:
             pu_node = f"Prod unit\n{prod_unit.name}\nqty {prod_unit.quantity}"
-            g.add_node(pu_node, node_type="pu")
+            g.add_node(pu_node, node_type="pu", production_unit=prod_unit)
             for ingredient in prod_unit.ingredients.keys():
-                if ingredient in (
-                        model_opt.Item(name="Electricity"),
-                        model_opt.Item(name="drill-head"),
-                        model_opt.Item(name="water", temperature=15),
-                        model_opt.Item(name="pressured-air", temperature=15),
-                ):
+                if ingredient in self.ubiquitous_items:
                     continue  # skipping ubiquitous items
                 qty = -prod_unit.get_item_consumed_quantity_by_unit_of_time(ingredient)*prod_unit.quantity
-                g.add_edge(self._item_node_name(ingredient), pu_node, headlabel=f"{self._item_node_name(ingredient)[5:]}\n{qty:.3f}")
+                g.add_edge(
+                    self._item_node_name(ingredient),
+                    pu_node,
+                    headlabel=f"{self._item_node_name(ingredient)[5:]}\n{qty:.3f}",
+                    rate=qty,
+                )
             for product in prod_unit.products:
 
                 qty = prod_unit.get_item_produced_quantity_by_unit_of_time(product)*prod_unit.quantity
-                g.add_edge(pu_node, self._item_node_name(product), taillabel=f"{self._item_node_name(product)[5:]}\n{qty:.3f}")
+                g.add_edge(
+                    pu_node,
+                    self._item_node_name(product),
+                    taillabel=f"{self._item_node_name(product)[5:]}\n{qty:.3f}",
+                    rate=qty,
+                )
         return g
 
     def write_dot(self, filepath: pathlib.Path) -> None:
-        write_dot(self.graph, filepath)
+        graph = self.graph.copy()
+        for node in graph:
+            graph.nodes[node].pop("production_unit", None)  # not a DOT attribute
+        write_dot(graph, filepath)
 
 
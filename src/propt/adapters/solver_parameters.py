@@ -0,0 +1,110 @@
+"""Solver parameters, and the profile file they are loaded from.
+
+The profile is a JSON file written by the tuning command (see solver_tuning). Optimizers created without
+parameters load it, from $PROPT_SOLVER_PROFILE or solver_profile.json in the working directory, and fall
+back on the defaults when there is none.
+"""
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+from typing import Literal, Optional
+
+import pydantic
+from ortools.linear_solver import pywraplp  # type: ignore
+
+PROFILE_ENV = "PROPT_SOLVER_PROFILE"
+DEFAULT_PROFILE = pathlib.Path("solver_profile.json")
+
+ORTOOLS_BACKENDS = ("CLP", "GLOP", "PDLP", "HIGHS")
+SCIPY_BACKEND = "scipy-highs"
+
+Backend = Literal["CLP", "GLOP", "PDLP", "HIGHS", "scipy-highs"]
+Algorithm = Literal["primal", "dual", "barrier"]
+
+
+def profile_path() -> pathlib.Path:
+    return pathlib.Path(os.environ.get(PROFILE_ENV, DEFAULT_PROFILE))
+
+
+class SolverParameters(pydantic.BaseModel):
+    """How to solve: the backend, its algorithm and its limits. None leaves the backend default."""
+
+    backend: Backend = "CLP"
+    algorithm: Optional[Algorithm] = None
+    """Primal or dual simplex, or barrier (interior point)."""
+    threads: int = 3
+    time_limit: Optional[float] = None
+    """In seconds."""
+    primal_tolerance: Optional[float] = None
+    dual_tolerance: Optional[float] = None
+    verbose: bool = True
+    mip_backend: Literal["SCIP", "CBC", "CP-SAT"] = "SCIP"
+    """The OR-Tools backend of the integer mode."""
+    relative_gap: float = 1e-4
+    """The integer mode stops once its plan is proven this close to the best one."""
+
+    class Config:
+        frozen = True
+
+    @classmethod
+    def load(cls, filepath: Optional[pathlib.Path] = None) -> SolverParameters:
+        """Load the profile, or return the defaults if there is no profile file."""
+        filepath = filepath or profile_path()
+        if not filepath.exists():
+            return cls()
+        with open(filepath) as f:
+            return cls(**json.load(f))
+
+    def save(self, filepath: Optional[pathlib.Path] = None) -> None:
+        with open(filepath or profile_path(), "w") as f:
+            json.dump(self.dict(), f, indent=2)
+
+    def create_ortools_solver(self) -> tuple[pywraplp.Solver, pywraplp.MPSolverParameters]:
+        """Return an OR-Tools solver set up with the parameters, and the parameters to give to each Solve."""
+        if self.backend not in ORTOOLS_BACKENDS:
+            raise ValueError(f"{self.backend} isn't an OR-Tools backend")
+        solver = pywraplp.Solver.CreateSolver(self.backend)
+        if solver is None:
+            raise ValueError(f"OR-Tools wasn't built with {self.backend}")
+        if self.verbose:
+            solver.EnableOutput()
+        else:
+            solver.SuppressOutput()
+        solver.SetNumThreads(self.threads)  # not all backends are multi-threaded
+        if self.time_limit is not None:
+            solver.SetTimeLimit(int(self.time_limit * 1000))
+        solve_parameters = pywraplp.MPSolverParameters()
+        if self.algorithm is not None:
+            solve_parameters.SetIntegerParam(
+                solve_parameters.LP_ALGORITHM,
+                {
+                    "primal": solve_parameters.PRIMAL,
+                    "dual": solve_parameters.DUAL,
+                    "barrier": solve_parameters.BARRIER,
+                }[self.algorithm],
+            )
+        if self.primal_tolerance is not None:
+            solve_parameters.SetDoubleParam(solve_parameters.PRIMAL_TOLERANCE, self.primal_tolerance)
+        if self.dual_tolerance is not None:
+            solve_parameters.SetDoubleParam(solve_parameters.DUAL_TOLERANCE, self.dual_tolerance)
+        return solver, solve_parameters
+
+    @property
+    def linprog_method(self) -> str:
+        """The scipy.optimize.linprog method for the algorithm; linprog has no primal simplex."""
+        if self.algorithm == "primal":
+            raise ValueError("scipy's HiGHS only has the dual simplex and the interior point")
+        return {None: "highs", "dual": "highs-ds", "barrier": "highs-ipm"}[self.algorithm]
+
+    @property
+    def linprog_options(self) -> dict[str, object]:
+        options: dict[str, object] = {"disp": self.verbose}
+        if self.time_limit is not None:
+            options["time_limit"] = self.time_limit
+        if self.primal_tolerance is not None:
+            options["primal_feasibility_tolerance"] = self.primal_tolerance
+        if self.dual_tolerance is not None:
+            options["dual_feasibility_tolerance"] = self.dual_tolerance
+        return options
@@ -0,0 +1,116 @@
+"""Find the fastest solver parameters for a scenario.
+
+Every configuration of a grid builds and solves the scenario from scratch; the fastest one whose objective
+agrees with the best objective found is the one to save as the solver profile.
+"""
+from __future__ import annotations
+
+import contextlib
+import io
+import itertools
+import time
+from typing import Iterable, Optional, Sequence
+
+import pydantic
+
+import propt.adapters.optimizers as optimizers
+import propt.adapters.solver_parameters as solver_parameters
+import propt.domain.optimizer.model as model_opt
+
+BACKENDS = (*solver_parameters.ORTOOLS_BACKENDS, solver_parameters.SCIPY_BACKEND)
+ALGORITHMS = (None, "primal", "dual", "barrier")
+
+
+class Trial(pydantic.BaseModel):
+    """The run of a configuration; seconds is None if it failed or didn't find the optimum."""
+
+    parameters: solver_parameters.SolverParameters
+    seconds: Optional[float] = None
+    objective: Optional[float] = None
+
+    class Config:
+        frozen = True
+
+
+def grid(
+    backends: Iterable[str] = BACKENDS,
+    algorithms: Iterable[Optional[str]] = ALGORITHMS,
+    threads: Iterable[int] = (1, 3),
+    time_limit: Optional[float] = None,
+) -> list[solver_parameters.SolverParameters]:
+    """Return the quiet parameters for every combination."""
+    return [
+        solver_parameters.SolverParameters(
+            backend=backend,
+            algorithm=algorithm,
+            threads=nb_threads,
+            time_limit=time_limit,
+            verbose=False,
+        )
+        for backend, algorithm, nb_threads in itertools.product(backends, algorithms, threads)
+    ]
+
+
+def _run(
+    parameters: solver_parameters.SolverParameters,
+    production_map: model_opt.ProductionMap,
+    item_constraints: Sequence[tuple[model_opt.Item, float]],
+    prod_unit_constraints: Sequence[tuple[model_opt.ProductionUnit, float]],
+) -> tuple[float, float]:
+    """Return the time to build and solve, and the objective."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        optimizer = optimizers.create_optimizer(
+            production_map, item_constraints, prod_unit_constraints, parameters=parameters
+        )
+        result = optimizer.optimize()
+        seconds = time.perf_counter() - start
+    return seconds, sum(prod_unit.quantity for prod_unit in result.production_units)
+
+
+def tune(
+    production_map: model_opt.ProductionMap,
+    item_constraints: Iterable[tuple[model_opt.Item, float]],
+    prod_unit_constraints: Iterable[tuple[model_opt.ProductionUnit, float]] = (),
+    configurations: Iterable[solver_parameters.SolverParameters] = (),
+    repeat: int = 1,
+    rel_tolerance: float = 1e-6,
+) -> list[Trial]:
+    """Run every configuration (the default grid if none) repeat times and return the trials, fastest first.
+
+    The time of a configuration is its fastest run. A configuration whose objective is above the best
+    objective (rel_tolerance relatively) failed, like one that raised.
+    """
+    item_constraints, prod_unit_constraints = list(item_constraints), list(prod_unit_constraints)
+    runs: list[tuple[solver_parameters.SolverParameters, Optional[float], Optional[float]]] = []
+    for parameters in list(configurations) or grid():
+        try:
+            seconds, objective = min(
+                _run(parameters, production_map, item_constraints, prod_unit_constraints)
+                for _ in range(repeat)
+            )
+        except (model_opt.SolutionNotFound, ValueError):
+            runs.append((parameters, None, None))
+        else:
+            runs.append((parameters, seconds, objective))
+    objectives = [objective for _, _, objective in runs if objective is not None]
+    best = min(objectives, default=0.0)
+    trials = [
+        Trial(
+            parameters=parameters,
+            seconds=seconds if objective <= best + rel_tolerance * max(1.0, abs(best)) else None,
+            objective=objective,
+        )
+        if objective is not None
+        else Trial(parameters=parameters)
+        for parameters, seconds, objective in runs
+    ]
+    return sorted(trials, key=lambda trial: (trial.seconds is None, trial.seconds or 0.0))
+
+
+def fastest(trials: Iterable[Trial]) -> solver_parameters.SolverParameters:
+    """Return the parameters of the fastest trial that succeeded, made verbose again."""
+    for trial in trials:
+        if trial.seconds is not None:
+            return trial.parameters.copy(update={"verbose": True})
+    raise model_opt.SolutionNotFound("No configuration solved the scenario")
@@ -0,0 +1,76 @@
+"""Build the sparse LP of production units while they are generated.
+
+Each unit gets the next column as it comes, and its net rates go straight into compact coefficient arrays
+(rows are items, numbered as they are first seen): the units are read once and nothing else is kept.
+"""
+from __future__ import annotations
+
+import array
+from typing import Iterable
+
+import numpy as np
+import scipy.sparse as sparse  # type: ignore
+
+import propt.domain.optimizer.model as model_opt
+
+
+class SparseModelBuilder:
+    """The matrix of net rates (items x units), the column bounds and the units, filled one unit at a time.
+
+    Caps are given first, so the bound of a unit is set when it streams by.
+    """
+
+    def __init__(self, prod_unit_constraints: Iterable[tuple[model_opt.ProductionUnit, float]] = ()):
+        self.item_rows: dict[model_opt.Item, int] = {}
+        self.production_units: list[model_opt.ProductionUnit] = []
+        self._caps: dict[model_opt.ProductionUnit, float] = {}
+        for prod_unit, max_units in prod_unit_constraints:
+            self._caps[prod_unit] = min(self._caps.get(prod_unit, max_units), max_units)
+        self._rows = array.array("q")
+        self._columns = array.array("q")
+        self._coefficients = array.array("d")
+        self._upper_bounds = array.array("d")
+
+    def add(self, prod_unit: model_opt.ProductionUnit) -> int:
+        """Add the column of a unit, and return it."""
+        column = len(self.production_units)
+        self.production_units.append(prod_unit)
+        for item in prod_unit.items:
+            self._rows.append(self.item_rows.setdefault(item, len(self.item_rows)))
+            self._columns.append(column)
+            self._coefficients.append(prod_unit.get_item_net_quantity_by_unit_of_time(item))
+        self._upper_bounds.append(self._caps.get(prod_unit, np.inf) if self._caps else np.inf)
+        return column
+
+    def extend(self, production_units: Iterable[model_opt.ProductionUnit]) -> SparseModelBuilder:
+        for prod_unit in production_units:
+            self.add(prod_unit)
+        return self
+
+    @property
+    def nb_nonzeros(self) -> int:
+        return len(self._coefficients)
+
+    def matrix(self) -> sparse.csr_matrix:
+        """The net rate of each item (row) for each unit (column)."""
+        return sparse.csr_matrix(
+            (
+                np.frombuffer(self._coefficients, dtype=np.float64),
+                (np.frombuffer(self._rows, dtype=np.int64), np.frombuffer(self._columns, dtype=np.int64)),
+            ),
+            shape=(len(self.item_rows), len(self.production_units)),
+        )
+
+    def bounds(self) -> np.ndarray:
+        """The (lower, upper) bounds of the columns."""
+        bounds = np.zeros((len(self.production_units), 2))
+        bounds[:, 1] = np.frombuffer(self._upper_bounds, dtype=np.float64)
+        return bounds
+
+    def min_items(self, item_constraints: Iterable[tuple[model_opt.Item, float]]) -> np.ndarray:
+        """The minimum of each row: the targets of the items of the map, 0 for the others."""
+        min_items = np.zeros(len(self.item_rows))
+        for item, qty in item_constraints:
+            if (row := self.item_rows.get(item)) is not None:
+                min_items[row] = qty
+        return min_items
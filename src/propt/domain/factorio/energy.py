@@ -16,14 +16,7 @@ class Energy(pydantic.BaseModel, metaclass=abc.ABCMeta):
 
     @classmethod
     def create(cls, energy_type: str, data: dict[str, Any]) -> Energy:
-        children: dict[str, Type[Energy]] = {
-            "void": Void,
-            "electric": Electricity,
-            "heat": Heat,
-            "fluid": FluidEnergy,
-            "burner": Burner,
-        }
-        return children[energy_type].from_data(data)
+        return ENERGY_TYPES[energy_type].from_data(data)
 
     @classmethod
     @abc.abstractmethod
@@ -185,9 +178,12 @@ class FluidEnergy(Energy):
                 )
             elif not self.burns_fluid:
                 valid_temps = {
-                    temp
-                    for temp in available_recipes.product_temperatures[fluid]
-                    if temp == fluid.default_temperature or temp > self.max_temperature
+                    *available_recipes.product_temperatures_between(
+                        fluid, fluid.default_temperature, fluid.default_temperature
+                    ),
+                    *available_recipes.product_temperatures_between(
+                        fluid, self.max_temperature + 1
+                    ),
                 }
                 for temp in valid_temps:
                     print(f"AMOUNT {building.energy_usage / (temp * fluid.heat_capacity * self.effectivity)}")
@@ -202,3 +198,13 @@ class FluidEnergy(Energy):
                         )
                     )
         return ingredients
+
+
+ENERGY_TYPES: dict[str, Type[Energy]] = {
+    "void": Void,
+    "electric": Electricity,
+    "heat": Heat,
+    "fluid": FluidEnergy,
+    "burner": Burner,
+}
+"""The energy source of each type of the Factorio data."""
@@ -3,11 +3,13 @@ from __future__ import annotations
 import functools
 from collections import defaultdict
 
-from typing import Iterable, TYPE_CHECKING
+from typing import Any, Iterable, TYPE_CHECKING
 
+from propt.adapters.indexer import RangeIndexer
 from propt.domain.factorio.prototypes import Technology, Recipe, Fluid, ProductFluid
 if TYPE_CHECKING:
     from propt.domain.factorio import repositories as repo_models
+    from propt.domain.factorio.technology_graph import TechnologyGraph
 
 
 class TechnologySet(set[Technology]):
@@ -19,6 +21,23 @@ class TechnologySet(set[Technology]):
             recipe for technology in self for recipe in technology.recipe_unlocked
         }
 
+    def unlock(self, technologies: Iterable[Technology]) -> set[Recipe]:
+        """Add technologies and return the recipes they newly unlock."""
+        new_technologies = [technology for technology in technologies if technology not in self]
+        new_recipes = {
+            recipe for technology in new_technologies for recipe in technology.recipe_unlocked
+        }.difference(self.unlocked_recipes)
+        self.update(new_technologies)
+        self.unlocked_recipes.update(new_recipes)
+        return new_recipes
+
+    def check_prerequisites(self, graph: TechnologyGraph) -> None:
+        """Raise ValueError if a technology of the set needs one that isn't in it."""
+        if missing := graph.missing_prerequisites(self):
+            raise ValueError(
+                f"Missing prerequisites: {sorted(technology.name for technology in missing)}"
+            )
+
 
 class RecipeSet(set[Recipe]):
     @classmethod
@@ -27,15 +46,41 @@ class RecipeSet(set[Recipe]):
         recipe_repo: repo_models.RecipeRepository,
         available_tech: TechnologySet,
     ):
-        def recipe_to_include(recipe: Recipe) -> bool:
-            return not recipe.category.startswith("recycle-")
-
         available_factorio_recipes: set[Recipe] = {
             recipe for recipe in recipe_repo.values() if recipe.available_from_start
         }.union(available_tech.unlocked_recipes)
-        available_recipes = set(filter(recipe_to_include, available_factorio_recipes))
+        available_recipes = set(filter(cls.recipe_to_include, available_factorio_recipes))
         return cls(available_recipes)
 
+    @staticmethod
+    def recipe_to_include(recipe: Recipe) -> bool:
+        """False for the recipes we never want to use (the recycling ones)."""
+        return not recipe.category.startswith("recycle-")
+
+    def add_recipes(self, recipes: Iterable[Recipe]) -> dict[Fluid, set[int]]:
+        """Add recipes, keeping the cached properties up to date.
+
+        Return the fluid temperatures that weren't produced before. When there are some, the ingredient
+        expansions are dropped as they may miss them.
+        """
+        new_recipes = [recipe for recipe in recipes if recipe not in self]
+        new_temperatures: dict[Fluid, set[int]] = defaultdict(set)
+        for recipe in new_recipes:
+            for product in recipe.products:
+                if isinstance(product, ProductFluid) and not self.product_temperatures_between(
+                    product.obj, product.temperature, product.temperature
+                ):
+                    new_temperatures[product.obj].add(product.temperature)
+        self.update(new_recipes)
+        if "product_temperatures" in self.__dict__:
+            for fluid, temperatures in new_temperatures.items():
+                self.product_temperatures[fluid].update(temperatures)
+        for recipe in new_recipes:
+            self.product_temperature_index.add(recipe)
+        if new_temperatures:
+            self.__dict__.pop("ingredient_expansions", None)
+        return new_temperatures
+
     @functools.cached_property
     def product_temperatures(self) -> dict[Fluid, set[int]]:
         temperatures: dict[Fluid, set[int]] = defaultdict(set)
@@ -44,3 +89,35 @@ class RecipeSet(set[Recipe]):
                 if isinstance(product, ProductFluid):
                     temperatures[product.obj].add(product.temperature)
         return temperatures
+
+    @functools.cached_property
+    def product_temperature_index(self) -> RangeIndexer[Fluid, int, Recipe]:
+        """The recipes indexed by the fluids they produce and their temperature."""
+        index: RangeIndexer[Fluid, int, Recipe] = RangeIndexer(
+            lambda recipe: (
+                (product.obj, product.temperature)
+                for product in recipe.products
+                if isinstance(product, ProductFluid)
+            )
+        )
+        index.set_collection(self)
+        return index
+
+    def product_temperatures_between(
+        self,
+        fluid: Fluid,
+        min_temperature: int | None = None,
+        max_temperature: int | None = None,
+    ) -> list[int]:
+        """Return the sorted temperatures fluid is produced at, within [min, max]."""
+        return self.product_temperature_index.values_between(
+            fluid, min_temperature, max_temperature
+        )
+
+    @functools.cached_property
+    def ingredient_expansions(self) -> dict[str, Any]:
+        """Ingredients expanded on temperature, per recipe name.
+
+        Filled by ProductionUnit, lives as long as the set.
+        """
+        return {}
@@ -30,6 +30,8 @@ class Building(Prototype):
     speed_coefficient: float
     crafting_categories: tuple[str, ...]
     energy_info: Energy
+    pollution: float = 0.0
+    """Emitted by minute while working."""
 
 
 class Item(Object):
@@ -142,5 +144,7 @@ class Technology(Prototype):
     """A factorio technology."""
 
     recipe_unlocked: tuple[Recipe, ...]
+    prerequisites: tuple[str, ...] = ()
+    """The names of the technologies to research first."""
 
 
@@ -1,9 +1,14 @@
 """The repositories for the prototypes."""
+from __future__ import annotations
+
 import abc
-from typing import TypeVar
+from typing import TypeVar, TYPE_CHECKING
 
 import propt.domain.factorio.prototypes as prototypes
 
+if TYPE_CHECKING:
+    from propt.domain.factorio.object_set import RecipeSet
+
 T = TypeVar("T", bound=prototypes.Prototype)
 
 
@@ -32,5 +37,17 @@ class RecipeRepository(Repository[prototypes.Recipe]):
         """Return the recipe that can make a given stuff."""
 
 
+class DerivedRecipeRepository(RecipeRepository):
+    """Recipes depending on the available recipes (e.g. generators and the temperatures they get)."""
+
+    @abc.abstractmethod
+    def derive_recipes(self, available_recipes: RecipeSet) -> list[prototypes.Recipe]:
+        """Return the recipes existing when available_recipes are available, without storing them."""
+
+    @abc.abstractmethod
+    def refresh(self, available_recipes: RecipeSet) -> list[prototypes.Recipe]:
+        """Store the recipes existing when available_recipes are available and return the new ones."""
+
+
 class TechnologyRepository(Repository[prototypes.Technology]):
     """A repository for factorio technologies."""
@@ -0,0 +1,147 @@
+"""The technology prerequisite graph, with its transitive closures precomputed as bitsets."""
+from __future__ import annotations
+
+from typing import Iterable, Mapping
+
+from propt.domain.factorio.object_set import TechnologySet
+from propt.domain.factorio.prototypes import Recipe, Technology
+
+
+class TechnologyGraph:
+    """The prerequisites of the technologies.
+
+    Each technology gets a bit; the closure of its prerequisites is an int with the bits of every technology
+    needed to research it. The recipes get a bit too, so the recipes available after a research are a mask.
+    """
+
+    def __init__(self, technologies: Mapping[str, Technology]):
+        self.technologies: list[Technology] = self._topological_order(technologies)
+        """The technologies, each one after its prerequisites."""
+        self._index: dict[str, int] = {
+            technology.name: idx for idx, technology in enumerate(self.technologies)
+        }
+        self.recipes: list[Recipe] = list(
+            dict.fromkeys(
+                recipe for technology in self.technologies for recipe in technology.recipe_unlocked
+            )
+        )
+        recipe_index = {recipe: idx for idx, recipe in enumerate(self.recipes)}
+        self._requirements: list[int] = []
+        self._recipe_masks: list[int] = []
+        for technology in self.technologies:
+            requirements = 0
+            recipe_mask = 0
+            for recipe in technology.recipe_unlocked:
+                recipe_mask |= 1 << recipe_index[recipe]
+            for name in technology.prerequisites:
+                idx = self._index[name]
+                requirements |= self._requirements[idx] | 1 << idx
+                recipe_mask |= self._recipe_masks[idx]
+            self._requirements.append(requirements)
+            self._recipe_masks.append(recipe_mask)
+        self._requirement_sets: dict[int, frozenset[Technology]] = {}
+        self._recipe_sets: dict[int, frozenset[Recipe]] = {}
+
+    @staticmethod
+    def _topological_order(technologies: Mapping[str, Technology]) -> list[Technology]:
+        """Sort the technologies so prerequisites come first (Kahn's algorithm)."""
+        missing = {
+            name
+            for technology in technologies.values()
+            for name in technology.prerequisites
+            if name not in technologies
+        }
+        if missing:
+            raise KeyError(f"Unknown prerequisites: {sorted(missing)}")
+        nb_prerequisites = {
+            name: len(set(technology.prerequisites)) for name, technology in technologies.items()
+        }
+        successors: dict[str, list[str]] = {name: [] for name in technologies}
+        for name, technology in technologies.items():
+            for prerequisite in set(technology.prerequisites):
+                successors[prerequisite].append(name)
+        ready = [name for name, nb in nb_prerequisites.items() if nb == 0]
+        order: list[Technology] = []
+        while ready:
+            name = ready.pop()
+            order.append(technologies[name])
+            for successor in successors[name]:
+                nb_prerequisites[successor] -= 1
+                if nb_prerequisites[successor] == 0:
+                    ready.append(successor)
+        if len(order) != len(technologies):
+            cycle = sorted(name for name, nb in nb_prerequisites.items() if nb)
+            raise ValueError(f"Cycle in the technology prerequisites: {cycle}")
+        return order
+
+    @staticmethod
+    def _decode(mask: int) -> Iterable[int]:
+        """Yield the index of each bit set in mask."""
+        while mask:
+            low_bit = mask & -mask
+            yield low_bit.bit_length() - 1
+            mask ^= low_bit
+
+    def _idx(self, technology: Technology | str) -> int:
+        return self._index[technology if isinstance(technology, str) else technology.name]
+
+    def mask(self, technologies: Iterable[Technology | str]) -> int:
+        """Return the bitset of some technologies."""
+        mask = 0
+        for technology in technologies:
+            mask |= 1 << self._idx(technology)
+        return mask
+
+    def requirements_mask(self, technology: Technology | str) -> int:
+        """Return the bitset of every technology needed to research technology (itself excluded)."""
+        return self._requirements[self._idx(technology)]
+
+    def recipes_mask(self, technology: Technology | str) -> int:
+        """Return the bitset of the recipes available once technology and its requirements are researched."""
+        return self._recipe_masks[self._idx(technology)]
+
+    def requirements(self, technology: Technology | str) -> frozenset[Technology]:
+        """Return every technology needed to research technology (itself excluded)."""
+        idx = self._idx(technology)
+        if idx not in self._requirement_sets:
+            self._requirement_sets[idx] = frozenset(
+                self.technologies[req_idx] for req_idx in self._decode(self._requirements[idx])
+            )
+        return self._requirement_sets[idx]
+
+    def recipes_unlocked_by(self, technology: Technology | str) -> frozenset[Recipe]:
+        """Return the recipes available once technology and all its requirements are researched."""
+        idx = self._idx(technology)
+        if idx not in self._recipe_sets:
+            self._recipe_sets[idx] = frozenset(
+                self.recipes[recipe_idx] for recipe_idx in self._decode(self._recipe_masks[idx])
+            )
+        return self._recipe_sets[idx]
+
+    def closure(self, technologies: Iterable[Technology | str]) -> TechnologySet:
+        """Return the technologies plus every technology they need."""
+        mask = self.mask(technologies)
+        for idx in list(self._decode(mask)):
+            mask |= self._requirements[idx]
+        return TechnologySet(self.technologies[idx] for idx in self._decode(mask))
+
+    def missing_prerequisites(self, technologies: Iterable[Technology | str]) -> set[Technology]:
+        """Return the technologies needed by some technologies but not among them."""
+        mask = self.mask(technologies)
+        needed = 0
+        for idx in self._decode(mask):
+            needed |= self._requirements[idx]
+        return {self.technologies[idx] for idx in self._decode(needed & ~mask)}
+
+    def researchable(self, technologies: Iterable[Technology | str]) -> list[Technology]:
+        """Return the technologies not researched yet whose requirements are all researched."""
+        mask = self.mask(technologies)
+        return [
+            technology
+            for idx, technology in enumerate(self.technologies)
+            if not mask >> idx & 1 and not self._requirements[idx] & ~mask
+        ]
+
+    def is_closed(self, technologies: Iterable[Technology | str]) -> bool:
+        """True if every prerequisite of the technologies is among them."""
+        return not self.missing_prerequisites(technologies)
@@ -0,0 +1,461 @@
+"""Compact, array-backed storage for production maps."""
+from __future__ import annotations
+
+import array
+import itertools
+import sys
+from collections import defaultdict
+from collections.abc import Sequence
+from typing import Any, Iterable, Iterator, cast, overload
+
+import immutables
+import numpy as np
+
+import propt.domain.factorio.prototypes as prototypes
+import propt.domain.factorio.repositories as repo_models
+import propt.domain.optimizer.model as opt_model
+from propt.domain.factorio.object_set import RecipeSet
+
+
+class ProductionUnitView:
+    """A production unit living in a ColumnarProductionMap.
+
+    It only holds the map and its position in it, so hashing and equality are O(1).
+    """
+
+    __slots__ = ("_map", "index")
+
+    def __init__(self, production_map: ColumnarProductionMap, index: int):
+        self._map = production_map
+        self.index = index
+
+    @property
+    def recipe_name(self) -> str:
+        return self._map.recipe_names[self.index]
+
+    @property
+    def building_name(self) -> str:
+        return self._map.building_names[self.index]
+
+    @property
+    def quantity(self) -> float:
+        return self._map.quantities[self.index]
+
+    @property
+    def name(self) -> str:
+        return f"{self.recipe_name}\n{self.building_name}"
+
+    @property
+    def ingredients(self) -> immutables.Map[opt_model.Item, float]:
+        return immutables.Map(self._map.iter_ingredients(self.index))
+
+    @property
+    def products(self) -> immutables.Map[opt_model.Item, float]:
+        return immutables.Map(self._map.iter_products(self.index))
+
+    @property
+    def items(self) -> set[opt_model.Item]:
+        return {
+            *(item for item, _ in self._map.iter_ingredients(self.index)),
+            *(item for item, _ in self._map.iter_products(self.index)),
+        }
+
+    def get_item_consumed_quantity_by_unit_of_time(self, item: opt_model.Item) -> float:
+        """Return the amount of item required/produced by unit of time."""
+        return self._map.consumed_quantity(self.index, item)
+
+    def get_item_produced_quantity_by_unit_of_time(self, item: opt_model.Item) -> float:
+        """Return the amount of item required/produced by unit of time."""
+        return self._map.produced_quantity(self.index, item)
+
+    def get_item_net_quantity_by_unit_of_time(self, item: opt_model.Item) -> float:
+        """Return the amount of item required/produced by unit of time."""
+        return self.get_item_produced_quantity_by_unit_of_time(
+            item
+        ) - self.get_item_consumed_quantity_by_unit_of_time(item)
+
+    def with_quantity(self, quantity: float = 0) -> opt_model.ProductionUnit:
+        """Return a standalone ProductionUnit with the same rates and another quantity."""
+        return opt_model.ProductionUnit(
+            recipe_name=self.recipe_name,
+            building_name=self.building_name,
+            ingredients=self.ingredients,
+            products=self.products,
+            quantity=quantity,
+        )
+
+    def to_production_unit(self) -> opt_model.ProductionUnit:
+        """Return a standalone ProductionUnit with the same content."""
+        return self.with_quantity(self.quantity)
+
+    def __eq__(self, other):
+        return (
+            self._map is other._map and self.index == other.index
+            if isinstance(other, ProductionUnitView)
+            else False
+        )
+
+    def __hash__(self):
+        return hash((id(self._map), self.index))
+
+    def __repr__(self):
+        return f"ProductionUnitView({self.recipe_name!r}, {self.building_name!r}, index={self.index})"
+
+
+class ProductionUnitViews(Sequence[opt_model.ProductionUnit]):
+    """The production units of a ColumnarProductionMap, as a list-like object.
+
+    The units are ProductionUnitView, standing for ProductionUnit: they have its attributes and methods.
+    """
+
+    def __init__(self, production_map: ColumnarProductionMap):
+        self._map = production_map
+
+    def __len__(self) -> int:
+        return len(self._map.recipe_names)
+
+    @overload
+    def __getitem__(self, idx: int) -> opt_model.ProductionUnit:
+        ...
+
+    @overload
+    def __getitem__(self, idx: slice) -> list[opt_model.ProductionUnit]:
+        ...
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [ProductionUnitView(self._map, i) for i in range(len(self))[idx]]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        return ProductionUnitView(self._map, idx)
+
+    def __iter__(self) -> Iterator[opt_model.ProductionUnit]:
+        return (cast(opt_model.ProductionUnit, ProductionUnitView(self._map, idx)) for idx in range(len(self)))
+
+    def append(self, prod_unit: opt_model.ProductionUnit | ProductionUnitView) -> None:
+        self._map.append(prod_unit)
+
+    def extend(self, prod_units: Iterable[opt_model.ProductionUnit | ProductionUnitView]) -> None:
+        for prod_unit in prod_units:
+            self._map.append(prod_unit)
+
+
+class ColumnarProductionMap(opt_model.ProductionMap):
+    """A ProductionMap storing its units as item-ID/rate pairs in contiguous arrays.
+
+    Unit ``i`` consumes ``ingredient_item_ids[ingredient_offsets[i]:ingredient_offsets[i + 1]]``
+    at the rates found in the same slice of ``ingredient_rates``. Products use the same layout.
+    Items are interned once in ``items_by_id``.
+    """
+
+    def __init__(
+        self,
+        production_units: Iterable[opt_model.ProductionUnit | ProductionUnitView] = (),
+    ):
+        self.items_by_id: list[opt_model.Item] = []
+        self.item_ids: dict[opt_model.Item, int] = {}
+        self.recipe_names: list[str] = []
+        self.building_names: list[str] = []
+        self.quantities = array.array("d")
+        self.ingredient_offsets = array.array("q", [0])
+        self.ingredient_item_ids = array.array("q")
+        self.ingredient_rates = array.array("d")
+        self.product_offsets = array.array("q", [0])
+        self.product_item_ids = array.array("q")
+        self.product_rates = array.array("d")
+        for prod_unit in production_units:
+            self.append(prod_unit)
+
+    ARRAY_COLUMNS = (
+        ("quantities", "d"),
+        ("ingredient_offsets", "q"),
+        ("ingredient_item_ids", "q"),
+        ("ingredient_rates", "d"),
+        ("product_offsets", "q"),
+        ("product_item_ids", "q"),
+        ("product_rates", "d"),
+    )
+    """The array columns with their array typecode."""
+
+    @classmethod
+    def from_production_map(cls, production_map: opt_model.ProductionMap) -> ColumnarProductionMap:
+        return cls(production_map.production_units)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        *,
+        items: list[opt_model.Item],
+        recipe_names: list[str],
+        building_names: list[str],
+        **columns: Sequence[Any] | np.ndarray,
+    ) -> ColumnarProductionMap:
+        """Build a map on existing columns (e.g. numpy arrays mapped from a file) without copying them.
+
+        The columns are copied into Python arrays only if a unit is appended.
+        """
+        prod_map = cls()
+        prod_map.items_by_id = items
+        prod_map.item_ids = {item: idx for idx, item in enumerate(items)}
+        prod_map.recipe_names = recipe_names
+        prod_map.building_names = building_names
+        for name, _ in cls.ARRAY_COLUMNS:
+            setattr(prod_map, name, columns[name])
+        return prod_map
+
+    def _ensure_appendable(self) -> None:
+        for name, typecode in self.ARRAY_COLUMNS:
+            if not isinstance(column := getattr(self, name), array.array):
+                setattr(self, name, array.array(typecode, column))
+
+    @classmethod
+    def from_repositories(
+        cls,
+        available_recipes: RecipeSet,
+        available_buildings: opt_model.BuildingSet,
+        item_repo: repo_models.ItemRepository,
+        fluid_repo: repo_models.FluidRepository,
+    ) -> ColumnarProductionMap:
+        """Build the map one crafting category at a time, with array operations.
+
+        Produce the same units as ProductionMap.from_repositories.
+        """
+        prod_map = cls()
+        recipes_per_category: dict[str, list[prototypes.Recipe]] = defaultdict(list)
+        for recipe in available_recipes:
+            recipes_per_category[recipe.category].append(recipe)
+        energy_ingredients: dict[prototypes.Building, tuple[tuple[opt_model.Item, float], ...]] = {}
+        for category, recipes in recipes_per_category.items():
+            buildings = [
+                building
+                for building in available_buildings
+                if category in building.crafting_categories
+            ]
+            if not buildings:
+                for recipe in recipes:
+                    if recipe.handcraftable:
+                        prod_map.append(opt_model.ProductionUnit.from_recipe_and_character(recipe))
+                continue
+            for building in buildings:
+                if building not in energy_ingredients:
+                    energy_ingredients[building] = opt_model.ProductionUnit._energy_ingredients(
+                        building, available_recipes, item_repo, fluid_repo
+                    )
+            RecipeRateMatrix(prod_map, recipes, available_recipes).add_units(
+                buildings, [energy_ingredients[building] for building in buildings]
+            )
+        return prod_map
+
+    @property
+    def production_units(self) -> ProductionUnitViews:
+        return ProductionUnitViews(self)
+
+    def add_production_units(self, production_units: Iterable[opt_model.ProductionUnit]) -> None:
+        for prod_unit in production_units:
+            self.append(prod_unit)
+
+    @property
+    def items(self) -> set[opt_model.Item]:
+        return set(self.items_by_id)
+
+    def item_id(self, item: opt_model.Item) -> int:
+        """Return the ID of an item, registering it if needed."""
+        try:
+            return self.item_ids[item]
+        except KeyError:
+            item_id = self.item_ids[item] = len(self.items_by_id)
+            self.items_by_id.append(item)
+            return item_id
+
+    def append(
+        self,
+        prod_unit: opt_model.ProductionUnit | ProductionUnitView,
+    ) -> ProductionUnitView:
+        """Store a production unit at the end of the map and return its view."""
+        ingredients = prod_unit.ingredients.items()
+        products = prod_unit.products.items()
+        return self.append_rates(
+            recipe_name=prod_unit.recipe_name,
+            building_name=prod_unit.building_name,
+            ingredient_item_ids=[self.item_id(item) for item, _ in ingredients],
+            ingredient_rates=[rate for _, rate in ingredients],
+            product_item_ids=[self.item_id(item) for item, _ in products],
+            product_rates=[rate for _, rate in products],
+            quantity=prod_unit.quantity,
+        )
+
+    def append_rates(
+        self,
+        *,
+        recipe_name: str,
+        building_name: str,
+        ingredient_item_ids: Iterable[int],
+        ingredient_rates: Iterable[float],
+        product_item_ids: Iterable[int],
+        product_rates: Iterable[float],
+        quantity: float = 0.0,
+    ) -> ProductionUnitView:
+        """Store a production unit given as item IDs and rates and return its view."""
+        self._ensure_appendable()
+        self.ingredient_item_ids.extend(ingredient_item_ids)
+        self.ingredient_rates.extend(ingredient_rates)
+        self.ingredient_offsets.append(len(self.ingredient_item_ids))
+        self.product_item_ids.extend(product_item_ids)
+        self.product_rates.extend(product_rates)
+        self.product_offsets.append(len(self.product_item_ids))
+        self.recipe_names.append(sys.intern(recipe_name))
+        self.building_names.append(sys.intern(building_name))
+        self.quantities.append(quantity)
+        return ProductionUnitView(self, len(self.recipe_names) - 1)
+
+    def iter_ingredients(self, index: int) -> Iterator[tuple[opt_model.Item, float]]:
+        start, end = self.ingredient_offsets[index], self.ingredient_offsets[index + 1]
+        for pos in range(start, end):
+            yield self.items_by_id[self.ingredient_item_ids[pos]], self.ingredient_rates[pos]
+
+    def iter_products(self, index: int) -> Iterator[tuple[opt_model.Item, float]]:
+        start, end = self.product_offsets[index], self.product_offsets[index + 1]
+        for pos in range(start, end):
+            yield self.items_by_id[self.product_item_ids[pos]], self.product_rates[pos]
+
+    def consumed_quantity(self, index: int, item: opt_model.Item) -> float:
+        """Return the amount of item consumed by a unit by unit of time."""
+        if (item_id := self.item_ids.get(item)) is None:
+            return 0.0
+        for pos in range(self.ingredient_offsets[index], self.ingredient_offsets[index + 1]):
+            if self.ingredient_item_ids[pos] == item_id:
+                return self.ingredient_rates[pos]
+        return 0.0
+
+    def produced_quantity(self, index: int, item: opt_model.Item) -> float:
+        """Return the amount of item produced by a unit by unit of time."""
+        if (item_id := self.item_ids.get(item)) is None:
+            return 0.0
+        for pos in range(self.product_offsets[index], self.product_offsets[index + 1]):
+            if self.product_item_ids[pos] == item_id:
+                return self.product_rates[pos]
+        return 0.0
+
+
+class RecipeRateMatrix:
+    """Ingredient and product rates of some recipes, for a building with a speed of 1.
+
+    Each row is an ingredient combination (a recipe with its fluid temperatures picked) stored in CSR
+    form, using the item IDs of a ColumnarProductionMap. Products only depend on the recipe.
+    """
+
+    def __init__(
+        self,
+        production_map: ColumnarProductionMap,
+        recipes: Sequence[prototypes.Recipe],
+        available_recipes: RecipeSet,
+    ):
+        self._map = production_map
+        self.recipes = list(recipes)
+        self.row_recipes: list[int] = []
+        """Index of the recipe of each row."""
+        self.row_combinations: list[int] = []
+        """Index of the ingredient combination of each row, within its recipe."""
+        ingredient_indptr = [0]
+        ingredient_item_ids: list[int] = []
+        ingredient_rates: list[float] = []
+        product_indptr = [0]
+        product_item_ids: list[int] = []
+        product_rates: list[float] = []
+        for recipe_idx, recipe in enumerate(self.recipes):
+            expended_ingredients = tuple(
+                filter(
+                    None,
+                    opt_model.ProductionUnit._expend_ingredients_on_temperature(
+                        recipe, available_recipes
+                    ),
+                )
+            )
+            for combination_idx, combination in enumerate(
+                itertools.product(*expended_ingredients)
+            ):
+                rates: dict[int, float] = {}
+                for item, amount in combination:
+                    item_id = production_map.item_id(item)
+                    rates[item_id] = rates.get(item_id, 0.0) + amount / recipe.base_time
+                ingredient_item_ids.extend(rates.keys())
+                ingredient_rates.extend(rates.values())
+                ingredient_indptr.append(len(ingredient_item_ids))
+                self.row_recipes.append(recipe_idx)
+                self.row_combinations.append(combination_idx)
+            products: dict[int, float] = {}
+            for product in recipe.products:
+                if product.avg_amount != 0.0:
+                    item = opt_model.Item(
+                        name=product.obj.name,
+                        temperature=product.temperature
+                        if isinstance(product, prototypes.ProductFluid)
+                        else None,
+                    )
+                    products[production_map.item_id(item)] = product.avg_amount / recipe.base_time
+            product_item_ids.extend(products.keys())
+            product_rates.extend(products.values())
+            product_indptr.append(len(product_item_ids))
+        self.ingredient_indptr = np.array(ingredient_indptr, dtype=np.int64)
+        self.ingredient_item_ids = np.array(ingredient_item_ids, dtype=np.int64)
+        self.ingredient_rates = np.array(ingredient_rates, dtype=np.float64)
+        self.product_indptr = np.array(product_indptr, dtype=np.int64)
+        self.product_item_ids = np.array(product_item_ids, dtype=np.int64)
+        self.product_rates = np.array(product_rates, dtype=np.float64)
+
+    def add_units(
+        self,
+        buildings: Sequence[prototypes.Building],
+        energy_ingredients: Sequence[tuple[tuple[opt_model.Item, float], ...]],
+    ) -> None:
+        """Add to the map the units of every recipe for every building.
+
+        The rates of all the buildings come from a single broadcast against their speed coefficients.
+        """
+        speeds = np.array([building.speed_coefficient for building in buildings], dtype=np.float64)
+        all_ingredient_rates = np.multiply.outer(speeds, self.ingredient_rates)
+        all_product_rates = np.multiply.outer(speeds, self.product_rates)
+        ingredient_item_ids = self.ingredient_item_ids.tolist()
+        ingredient_indptr = self.ingredient_indptr.tolist()
+        product_item_ids = self.product_item_ids.tolist()
+        product_indptr = self.product_indptr.tolist()
+        for building, ingredient_rates, product_rates, energy in zip(
+            buildings,
+            all_ingredient_rates.tolist(),
+            all_product_rates.tolist(),
+            energy_ingredients,
+        ):
+            energy_ids = [(self._map.item_id(item), amount) for item, amount in energy]
+            for row, (recipe_idx, combination_idx) in enumerate(
+                zip(self.row_recipes, self.row_combinations)
+            ):
+                recipe = self.recipes[recipe_idx]
+                start, end = ingredient_indptr[row], ingredient_indptr[row + 1]
+                row_ids = ingredient_item_ids[start:end]
+                row_rates = ingredient_rates[start:end]
+                start, end = product_indptr[recipe_idx], product_indptr[recipe_idx + 1]
+                products = [
+                    (item_id, rate)
+                    for item_id, rate in zip(product_item_ids[start:end], product_rates[start:end])
+                    if rate != 0.0
+                ]
+                for energy_idx, energy_ingredient in enumerate(energy_ids or (None,)):
+                    ids, rates = row_ids, row_rates
+                    if energy_ingredient is not None:
+                        energy_id, amount = energy_ingredient
+                        if energy_id in ids:
+                            rates = list(rates)
+                            rates[ids.index(energy_id)] += amount
+                        else:
+                            ids, rates = [*ids, energy_id], [*rates, amount]
+                    nb = combination_idx * len(energy_ids) + energy_idx if energy_ids else combination_idx
+                    self._map.append_rates(
+                        recipe_name=f"{recipe.name}-{nb}",
+                        building_name=building.name,
+                        ingredient_item_ids=ids,
+                        ingredient_rates=rates,
+                        product_item_ids=(item_id for item_id, _ in products),
+                        product_rates=(rate for _, rate in products),
+                    )
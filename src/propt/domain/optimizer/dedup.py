@@ -0,0 +1,95 @@
+"""Merge the production units that have the same rates into one LP column.
+
+Temperature expansion, fuel variants, and boiler or generator recipes that differ only by name give many
+units with the same ingredient and product rates. For the optimizer they are the same column (a building
+of either costs 1), so only the first one is kept and the others become its aliases. DeduplicatedOptimizer
+solves a map this way.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+import immutables
+
+import propt.domain.optimizer.model as opt_model
+
+RateKey = tuple[tuple[tuple[str, int, float], ...], tuple[tuple[str, int, float], ...]]
+
+
+def rate_key(prod_unit: opt_model.ProductionUnit, digits: int = 9) -> RateKey:
+    """The normalized rate vector of a unit: sorted items with rounded rates, names and buildings left out."""
+
+    def normalized(rates: immutables.Map[opt_model.Item, float]) -> tuple[tuple[str, int, float], ...]:
+        return tuple(
+            sorted(
+                (item.name, -1 if item.temperature is None else item.temperature, round(rate, digits))
+                for item, rate in rates.items()
+            )
+        )
+
+    return normalized(prod_unit.ingredients), normalized(prod_unit.products)
+
+
+class Deduplication:
+    """The units of a map merged by rates: production_map has one unit by rate vector."""
+
+    def __init__(self, production_map: opt_model.ProductionMap, digits: int = 9):
+        canonical: dict[RateKey, opt_model.ProductionUnit] = {}
+        self.aliases: dict[opt_model.ProductionUnit, list[opt_model.ProductionUnit]] = {}
+        """The units merged into each unit kept, itself first."""
+        self._canonical: dict[opt_model.ProductionUnit, opt_model.ProductionUnit] = {}
+        for prod_unit in production_map.production_units:
+            kept = canonical.setdefault(rate_key(prod_unit, digits), prod_unit)
+            self.aliases.setdefault(kept, []).append(prod_unit)
+            self._canonical[prod_unit] = kept
+        self.production_map = opt_model.ProductionMap(list(self.aliases))
+        self.nb_units = len(production_map.production_units)
+
+    @property
+    def nb_saved(self) -> int:
+        """The nb of columns the merge saved."""
+        return self.nb_units - len(self.aliases)
+
+    def canonical(self, prod_unit: opt_model.ProductionUnit) -> opt_model.ProductionUnit:
+        return self._canonical[prod_unit]
+
+    def canonical_constraints(
+        self, prod_unit_constraints: Iterable[tuple[opt_model.ProductionUnit, float]]
+    ) -> list[tuple[opt_model.ProductionUnit, float]]:
+        """Return the caps on the units kept: the sum of the caps of their aliases if they all have one.
+
+        An alias without a cap leaves the merged unit without one.
+        """
+        caps: dict[opt_model.ProductionUnit, float] = {}
+        for prod_unit, max_units in prod_unit_constraints:
+            caps[prod_unit] = min(caps.get(prod_unit, max_units), max_units)
+        return [
+            (kept, sum(caps[alias] for alias in aliases))
+            for kept, aliases in self.aliases.items()
+            if all(alias in caps for alias in aliases)
+        ]
+
+    def expand(
+        self,
+        result: opt_model.ProductionMap,
+        prod_unit_constraints: Iterable[tuple[opt_model.ProductionUnit, float]] = (),
+    ) -> opt_model.ProductionMap:
+        """Return a solution of the merged map with the original units, each alias filled up to its cap."""
+        caps = dict(prod_unit_constraints)
+        prod_units = []
+        for prod_unit in result.production_units:
+            aliases = self.aliases.get(prod_unit.with_quantity(), [prod_unit])
+            remaining = prod_unit.quantity
+            for idx, alias in enumerate(aliases):
+                cap: Optional[float] = caps.get(alias)
+                quantity = remaining if cap is None or idx == len(aliases) - 1 else min(remaining, cap)
+                if quantity > 0.00001:
+                    prod_units.append(alias.with_quantity(quantity))
+                remaining -= quantity
+                if remaining <= 0.00001:
+                    break
+        return opt_model.ProductionMap(prod_units)
+
+    def summary(self) -> str:
+        return f"{self.nb_units} units merged into {len(self.aliases)} columns, {self.nb_saved} saved"
+
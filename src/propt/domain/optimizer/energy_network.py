@@ -0,0 +1,121 @@
+"""The electric network as a single power balance in MW.
+
+Electric buildings consume Electricity in W (their energy usage) and generators make it in W, while the
+other rates are a few items by second: the Electricity row is the densest of the model and its coefficients
+are 5 or 6 orders of magnitude above the others. The network rewrites the units once with Electricity in
+MW, keeps the supply of each generator and the demand of each building, and maps solutions back.
+
+It is for the conditioning, not the build time: the electric units are copied once. EnergyNetworkOptimizer
+(adapters.network_optimizer) solves maps through it.
+"""
+from __future__ import annotations
+
+import collections
+from typing import Iterable
+
+import immutables
+import pydantic
+
+import propt.domain.optimizer.model as opt_model
+
+ELECTRICITY = opt_model.Item(name="Electricity")
+MW = 1e6
+
+
+class PowerBalance(pydantic.BaseModel):
+    """The power made and used by a plan, in MW."""
+
+    supply: dict[str, float]
+    """By generator unit."""
+    demand: dict[str, float]
+    """By building."""
+
+    class Config:
+        frozen = True
+
+    @property
+    def total_supply(self) -> float:
+        return sum(self.supply.values())
+
+    @property
+    def total_demand(self) -> float:
+        return sum(self.demand.values())
+
+    @property
+    def surplus(self) -> float:
+        return self.total_supply - self.total_demand
+
+
+def _scale(rates: immutables.Map[opt_model.Item, float], scale: float) -> immutables.Map[opt_model.Item, float]:
+    if ELECTRICITY not in rates:
+        return rates
+    with rates.mutate() as mutable:
+        # set the key of the map, it can be the energy ingredient
+        key = next(item for item in rates if item == ELECTRICITY)
+        mutable[key] = rates[key] * scale
+    return mutable.finish()
+
+
+class EnergyNetwork:
+    """The units of a map with Electricity in MW, and the power of each one for a building."""
+
+    def __init__(self, production_map: opt_model.ProductionMap, unit: float = MW):
+        self.unit = unit
+        self.supply: dict[opt_model.ProductionUnit, float] = {}
+        """The MW made by a building of each generator unit."""
+        self.demand: dict[opt_model.ProductionUnit, float] = {}
+        """The MW used by a building of each electric unit."""
+        self._originals: dict[opt_model.ProductionUnit, opt_model.ProductionUnit] = {}
+        self._scaled: dict[opt_model.ProductionUnit, opt_model.ProductionUnit] = {}
+        prod_units = []
+        for prod_unit in production_map.production_units:
+            if ELECTRICITY in prod_unit.ingredients or ELECTRICITY in prod_unit.products:
+                scaled = opt_model.ProductionUnit(
+                    recipe_name=prod_unit.recipe_name,
+                    building_name=prod_unit.building_name,
+                    ingredients=_scale(prod_unit.ingredients, 1 / unit),
+                    products=_scale(prod_unit.products, 1 / unit),
+                )
+                if (supply := scaled.products.get(ELECTRICITY, 0.0)) > 0:
+                    self.supply[scaled] = supply
+                if (demand := scaled.ingredients.get(ELECTRICITY, 0.0)) > 0:
+                    self.demand[scaled] = demand
+                self._originals[scaled] = prod_unit
+                self._scaled[prod_unit] = scaled
+                prod_units.append(scaled)
+            else:
+                prod_units.append(prod_unit)
+        self.production_map = opt_model.ProductionMap(prod_units)
+        """The map to optimize."""
+
+    def scale_constraints(
+        self,
+        item_constraints: Iterable[tuple[opt_model.Item, float]],
+        prod_unit_constraints: Iterable[tuple[opt_model.ProductionUnit, float]] = (),
+    ) -> tuple[list[tuple[opt_model.Item, float]], list[tuple[opt_model.ProductionUnit, float]]]:
+        """Return the constraints on the map to optimize: an Electricity target in MW, caps on scaled units."""
+        return (
+            [(item, qty / self.unit if item == ELECTRICITY else qty) for item, qty in item_constraints],
+            [(self._scaled.get(prod_unit, prod_unit), qty) for prod_unit, qty in prod_unit_constraints],
+        )
+
+    def unscale(self, result: opt_model.ProductionMap) -> opt_model.ProductionMap:
+        """Return a solution of the map to optimize with the original units."""
+        prod_units = []
+        for prod_unit in result.production_units:
+            original = self._originals.get(prod_unit.with_quantity())
+            prod_units.append(prod_unit if original is None else original.with_quantity(prod_unit.quantity))
+        return opt_model.ProductionMap(prod_units)
+
+    def power_balance(self, result: opt_model.ProductionMap) -> PowerBalance:
+        """Return the power made and used by a solution (of the map to optimize or unscaled)."""
+        supply: dict[str, float] = collections.defaultdict(float)
+        demand: dict[str, float] = collections.defaultdict(float)
+        for prod_unit in result.production_units:
+            template = prod_unit.with_quantity()
+            scaled = self._scaled.get(template, template)
+            if scaled in self.supply:
+                supply[prod_unit.name] += self.supply[scaled] * prod_unit.quantity
+            if scaled in self.demand:
+                demand[prod_unit.building_name] += self.demand[scaled] * prod_unit.quantity
+        return PowerBalance(supply=dict(supply), demand=dict(demand))
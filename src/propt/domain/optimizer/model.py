@@ -4,7 +4,7 @@ from __future__ import annotations
 import abc
 import itertools
 from collections import defaultdict
-from typing import Iterable, Optional, Iterator
+from typing import Callable, Iterable, Mapping, Optional, Iterator, Sequence
 
 import immutables
 import pydantic
@@ -58,6 +58,21 @@ class BuildingSet(set[propt.domain.factorio.prototypes.Building]):
                             available_buildings.add(building)
         return cls(available_buildings)
 
+    @staticmethod
+    def buildings_placed_by(
+        recipes: Iterable[prototypes.Recipe],
+        building_repository: repo_models.BuildingRepository,
+    ) -> set[propt.domain.factorio.prototypes.Building]:
+        """Return the buildings placed by the items some recipes make."""
+        return {
+            building_repository[product.obj.place_result.name]
+            for recipe in recipes
+            for product in recipe.products
+            if isinstance(product.obj, prototypes.Item)
+            and product.obj.place_result
+            and product.obj.place_result.name in building_repository
+        }
+
 
 class ProductionUnit(pydantic.BaseModel):
     """Represent a unit of production (recipe+building)."""
@@ -83,20 +98,8 @@ class ProductionUnit(pydantic.BaseModel):
             recipe, available_recipes
         )
         # add energy
-        energy_ingredients = tuple(
-            (
-                Item(
-                    name=ingredient.obj.name,
-                    temperature=ingredient.min_temperature
-                    if isinstance(ingredient, prototypes.FluidIngredient)
-                    else None,
-                    energy_ingredient=True,
-                ),
-                ingredient.amount,
-            )
-            for ingredient in building.energy_info.return_sources(
-                building, available_recipes, item_repo, fluid_repo
-            )
+        energy_ingredients = cls._energy_ingredients(
+            building, available_recipes, item_repo, fluid_repo
         )
         ingredients = tuple(
             filter(lambda x: x, (*expended_ingredients, energy_ingredients))
@@ -168,21 +171,52 @@ class ProductionUnit(pydantic.BaseModel):
             recipe=recipe, building=magic_building, available_recipes=available_recipes
         )
 
+    @classmethod
+    def _energy_ingredients(
+        cls,
+        building: propt.domain.factorio.prototypes.Building,
+        available_recipes: RecipeSet,
+        item_repo: repo_models.ItemRepository,
+        fluid_repo: repo_models.FluidRepository,
+    ) -> tuple[tuple[Item, float], ...]:
+        """Return the possible energy ingredients of a building."""
+        return tuple(
+            (
+                Item(
+                    name=ingredient.obj.name,
+                    temperature=ingredient.min_temperature
+                    if isinstance(ingredient, prototypes.FluidIngredient)
+                    else None,
+                    energy_ingredient=True,
+                ),
+                ingredient.amount,
+            )
+            for ingredient in building.energy_info.return_sources(
+                building, available_recipes, item_repo, fluid_repo
+            )
+        )
+
     @classmethod
     def _expend_ingredients_on_temperature(
         cls, recipe: prototypes.Recipe, available_recipes: RecipeSet
     ) -> tuple[tuple[tuple[Item, float], ...]]:
-        """Return a tuple of tuple containing each possible fluid temperature."""
+        """Return a tuple of tuple containing each possible fluid temperature.
+
+        The result only depends on the recipe, so it is cached in available_recipes.
+        """
+        try:
+            return available_recipes.ingredient_expansions[recipe.name]
+        except KeyError:
+            pass
         result: list[tuple[tuple[Item, float]]] = []
         if not recipe.ingredients:
             return ()
         for ingredient in recipe.ingredients:
             if isinstance(ingredient, prototypes.FluidIngredient):
-                possible_temperatures = filter(
-                    lambda x: (ingredient.min_temperature or 0)
-                    <= x
-                    <= (ingredient.max_temperature or 99999999),
-                    available_recipes.product_temperatures[ingredient.obj],
+                possible_temperatures = available_recipes.product_temperatures_between(
+                    ingredient.obj,
+                    ingredient.min_temperature or 0,
+                    ingredient.max_temperature or 99999999,
                 )
                 result.append(
                     tuple(
@@ -202,7 +236,8 @@ class ProductionUnit(pydantic.BaseModel):
                         ),
                     ),
                 )
-        return tuple(result)
+        expansion = available_recipes.ingredient_expansions[recipe.name] = tuple(result)
+        return expansion
 
     @property
     def name(self) -> str:
@@ -227,14 +262,140 @@ class ProductionUnit(pydantic.BaseModel):
             item
         ) - self.get_item_consumed_quantity_by_unit_of_time(item)
 
+    def with_quantity(self, quantity: float = 0) -> ProductionUnit:
+        """Return the same unit with another quantity; with 0, the unit as it is in a production map."""
+        return ProductionUnit(
+            recipe_name=self.recipe_name,
+            building_name=self.building_name,
+            ingredients=self.ingredients,
+            products=self.products,
+            quantity=quantity,
+        )
+
     class Config:
         frozen = True
         arbitrary_types_allowed = True
 
 
+class MarginalCost(pydantic.BaseModel):
+    """What one more item by unit of time costs, keeping the solved plan (its basis)."""
+
+    buildings: float
+    """The increase of the objective (nb of buildings)."""
+    raw_resources: dict[Item, float] = {}
+    """The increase of the extraction of each raw resource by unit of time."""
+
+    class Config:
+        frozen = True
+
+
+class MarginalCostTable(dict[Item, MarginalCost]):
+    """The marginal cost of each item of a solved map, from the duals of its item constraints."""
+
+    def buildings(self, item: Item) -> float:
+        return self[item].buildings
+
+    def raw_resource(self, item: Item, raw_resource: Item) -> float:
+        return self[item].raw_resources.get(raw_resource, 0.0)
+
+
+class ValueRange(pydantic.BaseModel):
+    """How far a value can move while the solved plan (its basis) stays optimal."""
+
+    value: float
+    low: float
+    high: float
+
+    class Config:
+        frozen = True
+
+    def __contains__(self, value: float) -> bool:
+        return self.low <= value <= self.high
+
+
+class ConstraintSensitivity(pydantic.BaseModel):
+    """The dual value of a constraint and the range of its right-hand side."""
+
+    dual: float
+    """The change of the objective when the right-hand side moves by 1, inside rhs."""
+    rhs: ValueRange
+
+    class Config:
+        frozen = True
+
+
+class SensitivityReport(pydantic.BaseModel):
+    """The ranging of a solved map: what can change without having to solve again."""
+
+    item_targets: dict[Item, ConstraintSensitivity]
+    """For each item, its minimum production (the target, or 0)."""
+    production_unit_caps: list[tuple[ProductionUnit, ConstraintSensitivity]]
+    """For each capped unit, its maximum quantity."""
+    unit_costs: dict[ProductionUnit, ValueRange]
+    """For each unit, its cost in the objective (1 building)."""
+
+    def bottlenecks(self) -> list[tuple[ProductionUnit, ConstraintSensitivity]]:
+        """Return the caps limiting the plan, the ones saving the most buildings per unit of cap first."""
+        return sorted(
+            (cap for cap in self.production_unit_caps if cap[1].dual < 0),
+            key=lambda cap: cap[1].dual,
+        )
+
+
+class Objective(pydantic.BaseModel):
+    """A cost to minimize: the sum over the units of their weight times their nb of buildings."""
+
+    name: str
+    weight: Callable[[ProductionUnit], float]
+    tolerance: float = 1e-6
+    """How much worse (relatively) the objective can get once it is fixed for the next ones."""
+
+    class Config:
+        frozen = True
+
+    @classmethod
+    def buildings(cls) -> Objective:
+        return cls(name="buildings", weight=lambda prod_unit: 1.0)
+
+    @classmethod
+    def consumption(cls, item: Item, name: Optional[str] = None) -> Objective:
+        """The consumption of an item, e.g. the power draw with Electricity."""
+        return cls(
+            name=name or f"{item.name} consumption",
+            weight=lambda prod_unit: prod_unit.ingredients.get(item, 0.0),
+        )
+
+    @classmethod
+    def production(cls, items: Iterable[Item], name: str = "raw resources") -> Objective:
+        """The production of some items, e.g. the raw resources mined."""
+        items = frozenset(items)
+        return cls(
+            name=name,
+            weight=lambda prod_unit: sum(rate for item, rate in prod_unit.products.items() if item in items),
+        )
+
+    @classmethod
+    def pollution(cls, buildings: Iterable[propt.domain.factorio.prototypes.Building]) -> Objective:
+        """The pollution of the buildings of the units."""
+        return cls.by_building("pollution", {building.name: building.pollution for building in buildings})
+
+    @classmethod
+    def by_building(cls, name: str, weights: Mapping[str, float]) -> Objective:
+        """A weight by building name; the units of the other buildings weigh nothing."""
+        weights = dict(weights)
+        return cls(name=name, weight=lambda prod_unit: weights.get(prod_unit.building_name, 0.0))
+
+
 class ProductionMap:
     """Represent all the possible ways of doing stuff."""
 
+    marginal_costs: Optional[MarginalCostTable] = None
+    """Set by the optimizers that can compute it, on the maps they return."""
+    sensitivity: Optional[SensitivityReport] = None
+    """Set by the optimizers that can compute it, on the maps they return."""
+    objective_values: Optional[dict[str, float]] = None
+    """Set by the optimizers that can compute it, on the maps they return."""
+
     @classmethod
     def from_repositories(
         cls,
@@ -249,21 +410,43 @@ class ProductionMap:
                 if isinstance(product, prototypes.ProductFluid):
                     temp_map[product.obj].add(product.temperature)
 
-        production_units: list[ProductionUnit] = []
+        return cls(list(cls.iter_production_units(available_recipes, available_buildings, item_repo, fluid_repo)))
+
+    @classmethod
+    def iter_production_units(
+        cls,
+        available_recipes: RecipeSet,
+        available_buildings: BuildingSet,
+        item_repo: repo_models.ItemRepository,
+        fluid_repo: repo_models.FluidRepository,
+    ) -> Iterator[ProductionUnit]:
+        """Generate the units of from_repositories one by one, to stream them without keeping a list."""
         for recipe in available_recipes:
-            if recipe.name == "elec-from-steam-engine-165":
-                print("blah")
-            prod_unit_size = len(production_units)
-            matching_buildings = {
-                building
-                for building in available_buildings
-                if recipe.category in building.crafting_categories
-            }
-            for building in (
-                building
-                for building in available_buildings
-                if recipe.category in building.crafting_categories
-            ):
+            yield from cls.production_units_for_recipe(
+                recipe=recipe,
+                buildings=available_buildings,
+                available_recipes=available_recipes,
+                item_repo=item_repo,
+                fluid_repo=fluid_repo,
+            )
+
+    @staticmethod
+    def production_units_for_recipe(
+        *,
+        recipe: prototypes.Recipe,
+        buildings: Iterable[propt.domain.factorio.prototypes.Building],
+        available_recipes: RecipeSet,
+        item_repo: repo_models.ItemRepository,
+        fluid_repo: repo_models.FluidRepository,
+        handcraft: bool = True,
+    ) -> list[ProductionUnit]:
+        """Return the units making a recipe in the matching buildings.
+
+        If no building can make it and handcraft is True, the character makes it if it can.
+        """
+        production_units: list[ProductionUnit] = []
+        for building in buildings:
+            if recipe.category in building.crafting_categories:
                 production_units.extend(
                     ProductionUnit.from_recipe_and_building(
                         recipe=recipe,
@@ -273,15 +456,21 @@ class ProductionMap:
                         item_repo=item_repo,
                     )
                 )
-            if prod_unit_size == len(production_units) and recipe.handcraftable:
-                production_units.append(
-                    ProductionUnit.from_recipe_and_character(recipe)
-                )
-
-        return cls(production_units)
+        if not production_units and handcraft and recipe.handcraftable:
+            production_units.append(ProductionUnit.from_recipe_and_character(recipe))
+        return production_units
 
     def __init__(self, production_units: list[ProductionUnit]):
-        self.production_units = production_units
+        self._production_units = production_units
+
+    @property
+    def production_units(self) -> Sequence[ProductionUnit]:
+        """The units of the map, add_production_units adds some."""
+        return self._production_units
+
+    def add_production_units(self, production_units: Iterable[ProductionUnit]) -> None:
+        """Add units at the end of the map."""
+        self._production_units.extend(production_units)
 
     def add_magic_unit(self) -> None:
         """Add some magic prod units for items on the map that has no way of being produced.
@@ -296,14 +485,15 @@ class ProductionMap:
         missing_items = self.items.difference(produced_items)
         for item in missing_items:
             print(f"MISSING ITEM: {item}")
-            self.production_units.append(
-                ProductionUnit(
-                    recipe_name=f"magic-{item}",
-                    ingredients=immutables.Map({}),
-                    products=immutables.Map({item: 1}),
-                    building_name="magic-building",
-                )
+        self.add_production_units(
+            ProductionUnit(
+                recipe_name=f"magic-{item}",
+                ingredients=immutables.Map({}),
+                products=immutables.Map({item: 1}),
+                building_name="magic-building",
             )
+            for item in missing_items
+        )
 
     @property
     def items(self) -> set[Item]:
@@ -314,6 +504,25 @@ class SolutionNotFound(Exception):
     """Raised when the optimizer can't find a solution."""
 
 
+class InfeasibilityReport(pydantic.BaseModel):
+    """A minimal set of constraints that can't hold together: relaxing any one of them makes the others
+    feasible."""
+
+    item_targets: tuple[Item, ...]
+    """The items whose minimum production (the target, or 0 for a balance) is in the conflict."""
+    production_unit_caps: tuple[ProductionUnit, ...]
+
+    class Config:
+        frozen = True
+
+    @property
+    def names(self) -> list[str]:
+        return [
+            *(f"{item.name}-{item.temperature}" for item in self.item_targets),
+            *(f"cap {prod_unit.name}" for prod_unit in self.production_unit_caps),
+        ]
+
+
 class Optimizer(metaclass=abc.ABCMeta):
     """Optimize a Production map."""
 
@@ -325,7 +534,27 @@ class Optimizer(metaclass=abc.ABCMeta):
     ):
         self._production_map = production_map
         self._item_constraints = list(item_constraints)
-        self._prod_unit_constraints = prod_unit_constraints
+        self._prod_unit_constraints = list(prod_unit_constraints)
+
+    def add_production_units(self, production_units: Iterable[ProductionUnit]) -> None:
+        """Add units to the production map being optimized."""
+        self._production_map.add_production_units(production_units)
+
+    def evaluate_with(self, production_units: Iterable[ProductionUnit]) -> Optional[float]:
+        """Return the objective (nb of buildings) if some units were added, None if there is no solution.
+
+        The map isn't changed. This default solves a new optimizer from scratch; subclasses can do better.
+        """
+        optimizer = type(self)(
+            ProductionMap([*self._production_map.production_units, *production_units]),
+            self._item_constraints,
+            self._prod_unit_constraints,
+        )
+        try:
+            solution = optimizer.optimize()
+        except SolutionNotFound:
+            return None
+        return sum(prod_unit.quantity for prod_unit in solution.production_units)
 
     @abc.abstractmethod
     def optimize(self) -> ProductionMap:
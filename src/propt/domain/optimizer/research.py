@@ -0,0 +1,105 @@
+"""Rank the technologies that can be researched next by the buildings they save."""
+from __future__ import annotations
+
+import concurrent.futures
+import math
+from typing import Callable, Iterable, Optional
+
+import pydantic
+
+import propt.domain.factorio.prototypes as prototypes
+import propt.domain.optimizer.model as opt_model
+from propt.domain.factorio.technology_graph import TechnologyGraph
+from propt.domain.optimizer.unlock import TechnologyUnlocker, UnlockDelta
+
+OptimizerFactory = Callable[[opt_model.ProductionMap], opt_model.Optimizer]
+"""Build an optimizer for the scenario (constraints) on a production map."""
+
+
+class ResearchCandidate(pydantic.BaseModel):
+    """The effect of researching one technology."""
+
+    technology: prototypes.Technology
+    objective: Optional[float]
+    """The nb of buildings once researched, None if there is no solution."""
+    improvement: Optional[float]
+    """The nb of buildings saved (inf if it makes the scenario feasible), None if there is no solution."""
+    nb_production_units: int
+    """The nb of units the technology adds to the map."""
+
+    class Config:
+        frozen = True
+
+
+class ResearchEvaluator:
+    """Evaluate every technology researchable now against the current factory.
+
+    Each worker gets its own optimizer on the map and keeps its model warm: evaluate_with doesn't change the
+    map, an optimizer can add the units of every candidate to its model once, and only use them while
+    evaluating it.
+    """
+
+    def __init__(
+        self,
+        *,
+        unlocker: TechnologyUnlocker,
+        graph: TechnologyGraph,
+        optimizer_factory: OptimizerFactory,
+        max_workers: int = 4,
+    ):
+        self._unlocker = unlocker
+        self._graph = graph
+        self._optimizer_factory = optimizer_factory
+        self._max_workers = max_workers
+
+    def candidates(self) -> list[prototypes.Technology]:
+        """Return the technologies whose requirements are all researched."""
+        return self._graph.researchable(self._unlocker.technologies)
+
+    def _evaluate_chunk(
+        self, deltas: list[UnlockDelta]
+    ) -> tuple[Optional[float], list[Optional[float]]]:
+        optimizer = self._optimizer_factory(self._unlocker.production_map)
+        baseline = optimizer.evaluate_with(())
+        return baseline, [optimizer.evaluate_with(delta.production_units) for delta in deltas]
+
+    def evaluate(
+        self, technologies: Optional[Iterable[prototypes.Technology]] = None
+    ) -> list[ResearchCandidate]:
+        """Evaluate technologies (default: the candidates), best improvement first."""
+        technologies = list(self.candidates() if technologies is None else technologies)
+        # computing the deltas fills the caches of the recipe set, so it isn't done in the workers
+        deltas = [self._unlocker.compute_delta([technology]) for technology in technologies]
+        nb_chunks = max(1, min(self._max_workers, len(deltas)))
+        chunks = [deltas[idx::nb_chunks] for idx in range(nb_chunks)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=nb_chunks) as executor:
+            results = list(executor.map(self._evaluate_chunk, chunks))
+        baseline = results[0][0]
+        objectives: list[Optional[float]] = [None] * len(deltas)
+        for chunk_idx, (_, chunk_objectives) in enumerate(results):
+            objectives[chunk_idx::nb_chunks] = chunk_objectives
+
+        candidates = []
+        for technology, delta, objective in zip(technologies, deltas, objectives):
+            if objective is None:
+                improvement = None
+            elif baseline is None:
+                improvement = math.inf
+            else:
+                improvement = baseline - objective
+            candidates.append(
+                ResearchCandidate(
+                    technology=technology,
+                    objective=objective,
+                    improvement=improvement,
+                    nb_production_units=len(delta.production_units),
+                )
+            )
+        return sorted(
+            candidates,
+            key=lambda candidate: (
+                candidate.improvement is None,
+                -(candidate.improvement or 0.0),
+                candidate.technology.name,
+            ),
+        )
@@ -0,0 +1,189 @@
+"""Grow a factory incrementally when technologies are researched."""
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+import pydantic
+
+import propt.domain.factorio.energy as energy
+import propt.domain.factorio.prototypes as prototypes
+import propt.domain.factorio.repositories as repo_models
+import propt.domain.optimizer.model as opt_model
+from propt.domain.factorio.object_set import RecipeSet, TechnologySet
+
+
+class UnlockDelta(pydantic.BaseModel):
+    """What researching some technologies adds to a factory."""
+
+    technologies: frozenset[prototypes.Technology]
+    recipes: frozenset[prototypes.Recipe]
+    """The recipes becoming available, including the derived ones (e.g. generators)."""
+    buildings: frozenset[prototypes.Building]
+    """The buildings that can now be placed."""
+    temperatures: dict[prototypes.Fluid, frozenset[int]]
+    """The fluid temperatures that are now produced."""
+    production_units: tuple[opt_model.ProductionUnit, ...]
+    """The units to add to the production map."""
+
+    class Config:
+        frozen = True
+        arbitrary_types_allowed = True
+
+
+class TechnologyUnlocker:
+    """Keep a factory (technologies, recipes, buildings and production map) up to date when researching.
+
+    Only the new recipes, the new buildings and the recipes or buildings affected by new fluid temperatures
+    produce units; the rest of the map is left as-is. If an optimizer is given, its model gets the new units
+    too. It must optimize production_map.
+    """
+
+    def __init__(
+        self,
+        *,
+        technologies: TechnologySet,
+        available_recipes: RecipeSet,
+        available_buildings: opt_model.BuildingSet,
+        production_map: opt_model.ProductionMap,
+        building_repo: repo_models.BuildingRepository,
+        item_repo: repo_models.ItemRepository,
+        fluid_repo: repo_models.FluidRepository,
+        derived_recipe_repos: Iterable[repo_models.DerivedRecipeRepository] = (),
+        optimizer: Optional[opt_model.Optimizer] = None,
+    ):
+        self.technologies = technologies
+        self.available_recipes = available_recipes
+        self.available_buildings = available_buildings
+        self.production_map = production_map
+        self.optimizer = optimizer
+        self._building_repo = building_repo
+        self._item_repo = item_repo
+        self._fluid_repo = fluid_repo
+        self._derived_recipe_repos = list(derived_recipe_repos)
+        self._unit_keys: set[tuple] | None = None
+
+    @staticmethod
+    def _unit_key(prod_unit: opt_model.ProductionUnit) -> tuple:
+        return prod_unit.building_name, prod_unit.ingredients, prod_unit.products
+
+    @property
+    def unit_keys(self) -> set[tuple]:
+        """The content of the units already on the map."""
+        if self._unit_keys is None:
+            self._unit_keys = {
+                self._unit_key(prod_unit) for prod_unit in self.production_map.production_units
+            }
+        return self._unit_keys
+
+    def compute_delta(self, technologies: Iterable[prototypes.Technology]) -> UnlockDelta:
+        """Compute what researching technologies would add, without changing anything."""
+        new_technologies = frozenset(
+            technology for technology in technologies if technology not in self.technologies
+        )
+        new_recipes = {
+            recipe
+            for technology in new_technologies
+            for recipe in technology.recipe_unlocked
+            if recipe not in self.available_recipes and RecipeSet.recipe_to_include(recipe)
+        }
+        candidate_recipes = RecipeSet(self.available_recipes.union(new_recipes))
+        while derived_recipes := {
+            recipe
+            for repo in self._derived_recipe_repos
+            for recipe in repo.derive_recipes(candidate_recipes)
+            if recipe not in candidate_recipes
+        }:
+            new_recipes.update(derived_recipes)
+            candidate_recipes = RecipeSet(candidate_recipes.union(derived_recipes))
+        new_temperatures: dict[prototypes.Fluid, set[int]] = {}
+        for recipe in new_recipes:
+            for product in recipe.products:
+                if isinstance(
+                    product, prototypes.ProductFluid
+                ) and not self.available_recipes.product_temperatures_between(
+                    product.obj, product.temperature, product.temperature
+                ):
+                    new_temperatures.setdefault(product.obj, set()).add(product.temperature)
+        new_buildings = opt_model.BuildingSet.buildings_placed_by(
+            new_recipes, self._building_repo
+        ).difference(self.available_buildings)
+
+        production_units: list[opt_model.ProductionUnit] = []
+        all_buildings = [*self.available_buildings, *new_buildings]
+        for recipe in new_recipes:
+            production_units.extend(self._units(recipe, all_buildings, candidate_recipes))
+        fluid_energy_buildings = [
+            building
+            for building in self.available_buildings
+            if isinstance(building.energy_info, energy.FluidEnergy)
+        ] if new_temperatures else []
+        for recipe in self.available_recipes:
+            production_units.extend(
+                self._units(recipe, new_buildings, candidate_recipes, handcraft=False)
+            )
+            buildings = (
+                list(self.available_buildings)
+                if self._uses_temperatures(recipe, new_temperatures, candidate_recipes)
+                else fluid_energy_buildings
+            )
+            production_units.extend(
+                prod_unit
+                for prod_unit in self._units(recipe, buildings, candidate_recipes, handcraft=False)
+                if self._unit_key(prod_unit) not in self.unit_keys
+            )
+        return UnlockDelta(
+            technologies=new_technologies,
+            recipes=frozenset(new_recipes),
+            buildings=frozenset(new_buildings),
+            temperatures={fluid: frozenset(temps) for fluid, temps in new_temperatures.items()},
+            production_units=tuple(production_units),
+        )
+
+    def _units(
+        self,
+        recipe: prototypes.Recipe,
+        buildings: Iterable[prototypes.Building],
+        available_recipes: RecipeSet,
+        handcraft: bool = True,
+    ) -> list[opt_model.ProductionUnit]:
+        return opt_model.ProductionMap.production_units_for_recipe(
+            recipe=recipe,
+            buildings=buildings,
+            available_recipes=available_recipes,
+            item_repo=self._item_repo,
+            fluid_repo=self._fluid_repo,
+            handcraft=handcraft,
+        )
+
+    @staticmethod
+    def _uses_temperatures(
+        recipe: prototypes.Recipe, temperatures: dict[prototypes.Fluid, set[int]], recipes: RecipeSet
+    ) -> bool:
+        """True if the recipe accepts one of the temperatures as an ingredient, produced by the recipes."""
+        return any(
+            temperature in temperatures[ingredient.obj]
+            for ingredient in recipe.ingredients
+            if isinstance(ingredient, prototypes.FluidIngredient) and ingredient.obj in temperatures
+            for temperature in recipes.product_temperatures_between(
+                ingredient.obj, ingredient.min_temperature, ingredient.max_temperature
+            )
+        )
+
+    def apply(self, delta: UnlockDelta) -> None:
+        """Add a delta to the factory, the production map and the optimizer."""
+        self.technologies.unlock(delta.technologies)
+        self.available_recipes.add_recipes(delta.recipes)
+        for repo in self._derived_recipe_repos:
+            repo.refresh(self.available_recipes)
+        self.available_buildings.update(delta.buildings)
+        if self.optimizer is not None:
+            self.optimizer.add_production_units(delta.production_units)
+        else:
+            self.production_map.add_production_units(delta.production_units)
+        self.unit_keys.update(self._unit_key(prod_unit) for prod_unit in delta.production_units)
+
+    def unlock(self, technologies: Iterable[prototypes.Technology]) -> UnlockDelta:
+        """Research technologies: compute their delta, apply it and return it."""
+        delta = self.compute_delta(technologies)
+        self.apply(delta)
+        return delta
@@ -1,7 +1,56 @@
+import argparse
+import pathlib
+import sys
+from typing import Optional, Sequence
+
+
 def console() -> None:
     """Entrypoint for the console."""
     print("Welcome to Propt.")
 
 
+def tune(argv: Optional[Sequence[str]] = None) -> None:
+    """Entrypoint to find the fastest solver parameters for a scenario and save them as the solver profile.
+
+    The scenario is a production map file (see map_file) and targets given as item=qty.
+    """
+    import propt.adapters.map_file as map_file
+    import propt.adapters.solver_parameters as solver_parameters
+    import propt.adapters.solver_tuning as solver_tuning
+    import propt.domain.optimizer.model as model_opt
+
+    parser = argparse.ArgumentParser(prog="propt tune", description=tune.__doc__)
+    parser.add_argument("map_file", type=pathlib.Path)
+    parser.add_argument("targets", nargs="+", help="item=qty")
+    parser.add_argument("--profile", type=pathlib.Path, default=None)
+    parser.add_argument("--backends", nargs="+", default=list(solver_tuning.BACKENDS))
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, 3])
+    parser.add_argument("--time-limit", type=float, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    production_map = map_file.read(args.map_file)
+    items_by_name = {item.name: item for item in production_map.items}
+    targets = []
+    for target in args.targets:
+        name, qty = target.rsplit("=", 1)
+        targets.append((items_by_name.get(name, model_opt.Item(name=name)), float(qty)))
+    trials = solver_tuning.tune(
+        production_map,
+        targets,
+        configurations=solver_tuning.grid(args.backends, threads=args.threads, time_limit=args.time_limit),
+        repeat=args.repeat,
+    )
+    for trial in trials:
+        parameters = trial.parameters
+        seconds = "failed" if trial.seconds is None else f"{trial.seconds * 1000:.1f} ms"
+        print(f"{parameters.backend:>12} {str(parameters.algorithm):>8} {parameters.threads:>3} threads: {seconds}")
+    best = solver_tuning.fastest(trials)
+    best.save(args.profile)
+    print(f"Saved {best} to {args.profile or solver_parameters.profile_path()}")
+
+
 if __name__ == "__main__":
-    console()
+    if sys.argv[1:2] == ["tune"]:
+        tune(sys.argv[2:])
+    else:
+        console()
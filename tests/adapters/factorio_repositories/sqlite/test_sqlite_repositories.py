@@ -0,0 +1,153 @@
+"""Test the SQLite Factorio repositories."""
+import json
+import os
+import pathlib
+import shutil
+
+import more_itertools
+import pytest
+
+import propt.adapters.factorio_repositories.json.buildings as building_repos
+import propt.adapters.factorio_repositories.json.objects as obj_repos
+import propt.adapters.factorio_repositories.json.recipes as recipe_repos
+import propt.adapters.factorio_repositories.sqlite.compiler as compiler
+import propt.adapters.factorio_repositories.sqlite.repositories as sqlite_repos
+import propt.data.pyanodons as factorio_data
+import propt.domain.factorio.prototypes as prototypes
+import propt.domain.factorio.repositories as repo_models
+
+
+@pytest.fixture(scope="module")
+def json_repos():
+    path = pathlib.Path(more_itertools.first(factorio_data.__path__))
+    building_repo = building_repos.JSONFactorioAggregateBuildingRepository(
+        (
+            building_repos.JSONFactorioAssemblingMachineRepository(path),
+            building_repos.JSONFactorioFurnaceRepository(path),
+            building_repos.JSONFactorioMiningDrillRepository(path),
+            building_repos.JSONFactorioBoilerBuildingRepository(path),
+            building_repos.JSONFactorioGeneratorRepository(path),
+        )
+    )
+    item_repo = obj_repos.JSONFactorioItemRepository(path, building_repo)
+    fluid_repo = obj_repos.JSONFactorioFluidRepository(path)
+    recipe_repo = recipe_repos.JSONFactorioAggregateRecipeRepository(
+        (
+            recipe_repos.JSONFactorioResourceRepository(path, item_repo, fluid_repo),
+            recipe_repos.JSONFactorioBoilerRecipeRepository(path, fluid_repo),
+        )
+    )
+    tech_repo = repo_models.TechnologyRepository()
+    tech_repo["steam-power"] = prototypes.Technology(
+        name="steam-power",
+        recipe_unlocked=(recipe_repo["steam-from-boiler"],),
+        prerequisites=("automation",),
+    )
+    return building_repo, item_repo, fluid_repo, recipe_repo, tech_repo
+
+
+@pytest.fixture
+def dataset(json_repos, tmp_path):
+    database = tmp_path / "data.sqlite"
+    compiler.compile_repositories(database, *json_repos)
+    dataset = sqlite_repos.SQLiteFactorioDataset(database)
+    yield dataset
+    dataset.close()
+
+
+def test_lazy_lookup(dataset, json_repos):
+    _, _, fluid_repo, recipe_repo, _ = json_repos
+    recipe = dataset.recipe_repo["steam-from-boiler"]
+    assert recipe == recipe_repo["steam-from-boiler"]
+    assert dataset.recipe_repo.nb_loaded == 1
+    assert dataset.building_repo.nb_loaded == 0
+    assert "steam-from-boiler" in dataset.recipe_repo
+    assert "nothing" not in dataset.recipe_repo
+    assert dataset.recipe_repo.get("nothing") is None
+    with pytest.raises(KeyError):
+        dataset.recipe_repo["nothing"]
+    assert len(dataset.recipe_repo) == len(recipe_repo)
+    assert dataset.recipe_repo.nb_loaded == 1
+
+
+def test_round_trip(dataset, json_repos):
+    for json_repo, sqlite_repo in zip(
+        json_repos,
+        (dataset.building_repo, dataset.item_repo, dataset.fluid_repo, dataset.recipe_repo, dataset.tech_repo),
+    ):
+        assert dict(sqlite_repo.items()) == dict(json_repo.items())
+
+
+def test_indexed_queries(dataset, json_repos):
+    _, _, fluid_repo, recipe_repo, _ = json_repos
+    steam = fluid_repo["steam"]
+    assert dataset.recipe_repo.get_recipes_making_stuff(steam) == recipe_repo.get_recipes_making_stuff(steam)
+    assert dataset.recipe_repo.get_recipes_using_stuff(fluid_repo["water"]) >= {recipe_repo["steam-from-boiler"]}
+    assert dataset.recipe_repo.get_recipes_by_category("boiling-boiler") == {recipe_repo["steam-from-boiler"]}
+    assert dataset.building_repo.get_buildings_by_category("boiling-boiler") == {dataset.building_repo["boiler"]}
+
+
+@pytest.fixture
+def data_dir(tmp_path) -> pathlib.Path:
+    """The bundled prototypes, with a gear recipe and a technology unlocking it."""
+    path = pathlib.Path(more_itertools.first(factorio_data.__path__))
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    for kind in (
+        "assembling-machine",
+        "furnace",
+        "mining-drill",
+        "rocket-silo",
+        "boiler",
+        "generator",
+        "item",
+        "fluid",
+        "resource",
+    ):
+        shutil.copy(path / f"{kind}.json", data_dir)
+    gear = {
+        "name": "gear",
+        "category": "crafting",
+        "enabled": False,
+        "hidden_from_player_crafting": False,
+        "energy": 0.5,
+        "ingredients": [{"type": "item", "name": "iron-plate", "amount": 2}],
+        "products": [{"type": "item", "name": "iron-gear-wheel", "amount": 1}],
+    }
+    (data_dir / "recipe.json").write_text(json.dumps({"gear": gear}))
+    gears = {"name": "gears", "effects": [{"type": "unlock-recipe", "recipe": "gear"}], "prerequisites": []}
+    (data_dir / "technology.json").write_text(json.dumps({"gears": gears}))
+    return data_dir
+
+
+def test_compile_directory(data_dir, tmp_path):
+    database = tmp_path / "data.sqlite"
+    compiler.compile_directory(data_dir, database)
+    dataset = sqlite_repos.SQLiteFactorioDataset(database)
+    try:
+        gear = dataset.recipe_repo["gear"]
+        assert [ingredient.obj.name for ingredient in gear.ingredients] == ["iron-plate"]
+        assert dataset.tech_repo["gears"].recipe_unlocked == (gear,)
+        assert "steam-from-boiler" in dataset.recipe_repo
+        assert dataset.building_repo["assembling-machine-1"] in dataset.building_repo.get_buildings_by_category(
+            "crafting"
+        )
+    finally:
+        dataset.close()
+
+
+def test_from_directory(data_dir, tmp_path):
+    database = tmp_path / "data.sqlite"
+    assert not compiler.is_up_to_date(data_dir, database)
+    sqlite_repos.SQLiteFactorioDataset.from_directory(data_dir, database).close()
+    assert compiler.is_up_to_date(data_dir, database)
+    compiled = database.stat().st_mtime_ns
+    sqlite_repos.SQLiteFactorioDataset.from_directory(data_dir, database).close()
+    assert database.stat().st_mtime_ns == compiled
+    # JSON files newer than the database compile it again
+    os.utime(database, ns=(compiled - 10**9, compiled - 10**9))
+    assert not compiler.is_up_to_date(data_dir, database)
+    dataset = sqlite_repos.SQLiteFactorioDataset.from_directory(data_dir, database)
+    assert compiler.is_up_to_date(data_dir, database)
+    assert dataset.recipe_repo["gear"].base_time == 0.5
+    dataset.close()
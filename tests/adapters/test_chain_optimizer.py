@@ -0,0 +1,72 @@
+"""Test the chain fast path against the OR-Tools optimizer."""
+import pytest
+
+import propt.adapters.chain_optimizer as chain_optimizer
+import propt.adapters.optimizers as optimizers
+import propt.adapters.solver_parameters as solver_parameters
+import propt.domain.optimizer.model as opt_model
+
+import tests.helpers as helpers
+
+GEAR = opt_model.Item(name="gear")
+PLATE = opt_model.Item(name="plate")
+ORE = opt_model.Item(name="ore")
+SLAG = opt_model.Item(name="slag")
+PARAMETERS = solver_parameters.SolverParameters(verbose=False)
+
+
+GEAR_UNIT = helpers.unit("gear", {PLATE: 2.0}, {GEAR: 0.5})
+PLATE_UNIT = helpers.unit("plate", {ORE: 1.0}, {PLATE: 0.625, SLAG: 0.1})
+MINE = helpers.unit("mine", {}, {ORE: 0.5})
+
+
+def _optimize(prod_units, caps=()) -> tuple[chain_optimizer.ChainOptimizer, opt_model.ProductionMap]:
+    optimizer = chain_optimizer.ChainOptimizer(
+        opt_model.ProductionMap(prod_units), [(GEAR, 5.0)], caps, parameters=PARAMETERS
+    )
+    return optimizer, optimizer.optimize()
+
+
+def _quantities(production_map):
+    return {prod_unit.recipe_name: prod_unit.quantity for prod_unit in production_map.production_units}
+
+
+def test_chain():
+    unused = helpers.unit("chair", {GEAR: 1.0}, {opt_model.Item(name="chair"): 1.0})
+    optimizer, result = _optimize([unused, MINE, GEAR_UNIT, PLATE_UNIT])
+    assert optimizer.path == chain_optimizer.CHAIN
+    assert optimizer.chain() == [GEAR_UNIT, PLATE_UNIT, MINE]
+    assert _quantities(result) == pytest.approx({"gear": 10.0, "plate": 32.0, "mine": 64.0})
+    lp_result = optimizers.ORToolsOptimizer(
+        opt_model.ProductionMap([unused, MINE, GEAR_UNIT, PLATE_UNIT]), [(GEAR, 5.0)], [], parameters=PARAMETERS
+    ).optimize()
+    assert _quantities(result) == pytest.approx(_quantities(lp_result))
+
+
+@pytest.mark.parametrize(
+    "extra_unit",
+    [
+        helpers.unit("other-mine", {}, {ORE: 1.0}),  # two producers
+        helpers.unit("recycle", {SLAG: 1.0}, {ORE: 0.1}),  # ore has two producers, and there is a loop
+    ],
+)
+def test_falls_back_to_lp(extra_unit):
+    optimizer, result = _optimize([MINE, GEAR_UNIT, PLATE_UNIT, extra_unit])
+    assert optimizer.path == chain_optimizer.LP
+    assert optimizer.chain() is None
+    assert result.production_units
+
+
+def test_loop_falls_back_to_lp():
+    catalyst = helpers.unit("enrich", {ORE: 1.0, PLATE: 0.1}, {PLATE: 1.0})
+    optimizer, _ = _optimize([MINE, GEAR_UNIT, catalyst])
+    assert optimizer.path == chain_optimizer.LP
+
+
+def test_cap_falls_back_to_lp():
+    optimizer = chain_optimizer.ChainOptimizer(
+        opt_model.ProductionMap([MINE, GEAR_UNIT, PLATE_UNIT]), [(GEAR, 5.0)], [(MINE, 10)], parameters=PARAMETERS
+    )
+    with pytest.raises(opt_model.SolutionNotFound):
+        optimizer.optimize()
+    assert optimizer.path == chain_optimizer.LP
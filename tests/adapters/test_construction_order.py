@@ -0,0 +1,51 @@
+"""Test the construction order of a production graph."""
+import pytest
+
+import propt.adapters.construction_order as construction_order
+import propt.domain.optimizer.model as opt_model
+
+import tests.helpers as helpers
+
+
+@pytest.fixture
+def production_map() -> opt_model.ProductionMap:
+    """water -> (farm <-> seed-maker loop) -> plank."""
+    return opt_model.ProductionMap(
+        [
+            helpers.unit("plank", {"wood": 1}, {"plank": 1}, quantity=1),
+            helpers.unit("seed-maker", {"wood": 1}, {"seed": 2}, quantity=1),
+            helpers.unit("farm", {"seed": 1, "soil": 1}, {"wood": 2}, quantity=1),
+            helpers.unit("soil", {}, {"soil": 1}, quantity=1),
+        ]
+    )
+
+
+def _recipes(steps):
+    return [step.production_unit.recipe_name for step in steps]
+
+
+def test_loop_after_its_inputs_and_before_its_consumers(production_map):
+    steps = construction_order.ConstructionOrder.from_production_map(production_map).steps()
+    assert _recipes(steps) == ["soil", "farm", "seed-maker", "plank"]
+    assert steps[0].component < steps[1].component == steps[2].component < steps[3].component
+    assert [step.bootstrap for step in steps] == [False, True, False, False]
+    assert [item.split("\n")[-1] for item in steps[1].bootstrap_items] == ["seed"]
+
+
+def test_deterministic(production_map):
+    order = construction_order.ConstructionOrder.from_production_map(production_map)
+    assert order.steps() == order.steps()
+
+
+def test_acyclic(small_production_map):
+    steps = construction_order.ConstructionOrder.from_production_map(small_production_map).steps()
+    assert len(steps) == len(small_production_map.production_units)
+    position = {step.production_unit.recipe_name: idx for idx, step in enumerate(steps)}
+    assert position["ore-0"] < position["plate-0"] < position["gear-0"]
+
+
+def test_write(production_map, tmp_path):
+    construction_order.ConstructionOrder.from_production_map(production_map).write(tmp_path / "orders")
+    lines = (tmp_path / "orders").read_text().splitlines()
+    assert len(lines) == 4
+    assert lines[1].startswith("farm") and lines[1].endswith("[seed]")
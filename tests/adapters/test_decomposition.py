@@ -0,0 +1,79 @@
+"""Test the decomposition of production maps into sub-factories."""
+import pytest
+
+import propt.adapters.decomposition as decomposition
+import propt.adapters.optimizers as optimizers
+import propt.adapters.solver_parameters as solver_parameters
+import propt.domain.optimizer.model as opt_model
+
+import tests.helpers as helpers
+
+WATER = opt_model.Item(name="water")
+STEAM = opt_model.Item(name="steam", temperature=165)
+COAL = opt_model.Item(name="coal")
+ELECTRICITY = opt_model.Item(name="Electricity")
+GEAR = opt_model.Item(name="gear")
+PLATE = opt_model.Item(name="plate")
+PARAMETERS = solver_parameters.SolverParameters(verbose=False)
+
+
+PUMP = helpers.unit("pump", {}, {WATER: 10.0})
+MINE = helpers.unit("mine", {}, {COAL: 1.0})
+BOILER = helpers.unit("boiler", {WATER: 6.0, COAL: 0.5}, {STEAM: 6.0})
+TURBINE = helpers.unit("turbine", {STEAM: 5.0}, {ELECTRICITY: 100.0, WATER: 4.0})
+"""The water condensed by the turbine goes back to the boiler: boiler and turbine are a loop."""
+PLATE_UNIT = helpers.unit("furnace", {COAL: 0.25}, {PLATE: 1.0})
+GEAR_UNIT = helpers.unit("assembler", {PLATE: 2.0, ELECTRICITY: 150.0}, {GEAR: 1.0})
+UNITS = [PUMP, MINE, BOILER, TURBINE, PLATE_UNIT, GEAR_UNIT]
+
+
+def _nb_buildings(production_map):
+    return sum(prod_unit.quantity for prod_unit in production_map.production_units)
+
+
+def test_loops():
+    assert decomposition.loops(opt_model.ProductionMap(UNITS)) == [frozenset({BOILER, TURBINE})]
+
+
+def test_solve_loop():
+    (sub_factory,) = decomposition.solve_loop(
+        frozenset({BOILER, TURBINE}), frozenset({WATER, COAL}), ELECTRICITY, PARAMETERS
+    )
+    # 1 turbine needs 5/6 boiler: 100 MW from 11/6 buildings, 1 water short by turbine
+    assert dict(sub_factory.units) == pytest.approx({TURBINE: 6 / 11, BOILER: 5 / 11})
+    assert dict(sub_factory.production_unit.products) == pytest.approx({ELECTRICITY: 600 / 11})
+    assert dict(sub_factory.production_unit.ingredients) == pytest.approx({WATER: 6 / 11, COAL: 2.5 / 11})
+
+
+def test_decomposed_optimizer(monkeypatch):
+    reference = optimizers.ORToolsOptimizer(
+        opt_model.ProductionMap(UNITS), [(GEAR, 2.0)], [], parameters=PARAMETERS
+    ).optimize()
+    cache: decomposition.SubFactoryCache = {}
+    optimizer = decomposition.DecomposedOptimizer(
+        opt_model.ProductionMap(UNITS), [(GEAR, 2.0)], [], cache=cache, parameters=PARAMETERS
+    )
+    result = optimizer.optimize()
+    assert _nb_buildings(result) == pytest.approx(_nb_buildings(reference))
+    assert {prod_unit.recipe_name: prod_unit.quantity for prod_unit in result.production_units} == pytest.approx(
+        {prod_unit.recipe_name: prod_unit.quantity for prod_unit in reference.production_units}
+    )
+    assert cache
+
+    def solve_loop(*args):
+        raise AssertionError("The loop should come from the cache")
+
+    monkeypatch.setattr(decomposition, "solve_loop", solve_loop)
+    optimizer = decomposition.DecomposedOptimizer(
+        opt_model.ProductionMap(UNITS), [(GEAR, 5.0)], [], cache=cache, parameters=PARAMETERS
+    )
+    assert _nb_buildings(optimizer.optimize()) == pytest.approx(2.5 * _nb_buildings(reference))
+
+
+def test_capped_loop_is_kept():
+    optimizer = decomposition.DecomposedOptimizer(
+        opt_model.ProductionMap(UNITS), [(GEAR, 2.0)], [(TURBINE, 100)], parameters=PARAMETERS
+    )
+    prod_units, by_unit = optimizer.top_level()
+    assert not by_unit
+    assert prod_units == UNITS
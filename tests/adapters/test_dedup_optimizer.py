@@ -0,0 +1,42 @@
+"""Test solving production maps with the units of the same rates merged."""
+import pytest
+
+import propt.adapters.dedup_optimizer as dedup_optimizer
+import propt.adapters.solver_parameters as solver_parameters
+import propt.domain.optimizer.model as opt_model
+
+import tests.helpers as helpers
+
+GEAR = opt_model.Item(name="gear")
+PLATE = opt_model.Item(name="plate")
+PARAMETERS = solver_parameters.SolverParameters(verbose=False)
+
+GEAR_UNIT = helpers.unit("gear", {PLATE: 2.0}, {GEAR: 1.0})
+PLATE_UNIT = helpers.unit("plate", {}, {PLATE: 1.0}, "furnace")
+PLATE_UNIT_2 = helpers.unit("plate-1", {}, {PLATE: 1.0}, "furnace")
+PLATE_UNIT_3 = helpers.unit("plate-2", {}, {PLATE: 1.0}, "furnace")
+
+
+@pytest.mark.parametrize("backend", ["GLOP", solver_parameters.SCIPY_BACKEND])
+def test_optimize(backend):
+    optimizer = dedup_optimizer.DeduplicatedOptimizer(
+        opt_model.ProductionMap([GEAR_UNIT, PLATE_UNIT, PLATE_UNIT_2]),
+        [(GEAR, 6.0)],
+        [(PLATE_UNIT, 5.0), (PLATE_UNIT_2, 10.0)],
+        parameters=solver_parameters.SolverParameters(verbose=False, backend=backend),
+    )
+    result = optimizer.optimize()
+    quantities = {prod_unit.recipe_name: prod_unit.quantity for prod_unit in result.production_units}
+    assert quantities == pytest.approx({"gear": 6.0, "plate": 5.0, "plate-1": 7.0})
+    assert optimizer.nb_saved == 1
+    assert optimizer.summary() == "3 units merged into 2 columns, 1 saved"
+
+
+def test_add_production_units():
+    optimizer = dedup_optimizer.DeduplicatedOptimizer(
+        opt_model.ProductionMap([GEAR_UNIT, PLATE_UNIT, PLATE_UNIT_2]), [(GEAR, 6.0)], [], parameters=PARAMETERS
+    )
+    optimizer.optimize()
+    optimizer.add_production_units([PLATE_UNIT_3])
+    optimizer.optimize()
+    assert optimizer.nb_saved == 2
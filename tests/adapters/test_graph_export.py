@@ -0,0 +1,67 @@
+"""Test the streaming graph writers."""
+import json
+
+import networkx as nx
+import pytest
+
+import propt.adapters.graph_export as graph_export
+import propt.adapters.optimizers as optimizers
+import propt.domain.optimizer.model as opt_model
+
+
+@pytest.fixture
+def solved_map(small_production_map) -> opt_model.ProductionMap:
+    return opt_model.ProductionMap(
+        [prod_unit.copy(update={"quantity": 2.0}) for prod_unit in small_production_map.production_units]
+    )
+
+
+def _same_as_networkx(graph: nx.DiGraph, production_map, ubiquitous_items=optimizers.UBIQUITOUS_ITEMS):
+    expected = optimizers.NetworkXProductionGraph(production_map, ubiquitous_items).graph
+    # networkx draws every item of the map, even the ones left without edges
+    expected.remove_nodes_from([node for node in list(expected) if expected.degree(node) == 0])
+    assert set(graph.nodes) == set(expected.nodes)
+    assert set(graph.edges) == set(expected.edges)
+
+
+def test_graphml(solved_map, tmp_path):
+    graph_export.export(solved_map, tmp_path / "graph.graphml")
+    graph = nx.read_graphml(tmp_path / "graph.graphml")
+    _same_as_networkx(graph, solved_map)
+    ore_edges = [data for source, _, data in graph.edges(data=True) if source == "item\nore"]
+    assert [data["rate"] for data in ore_edges] == pytest.approx([-1 / 3.2 * 2.0 * 2.0])  # 2 furnaces at speed 2
+
+
+def test_json(solved_map, tmp_path):
+    graph_export.export(solved_map, tmp_path / "graph.json", ubiquitous_items=())
+    elements = json.loads((tmp_path / "graph.json").read_text())
+    graph = nx.DiGraph()
+    for element in elements:
+        if element["group"] == "nodes":
+            graph.add_node(element["data"]["id"])
+        else:
+            assert element["data"]["source"] in graph and element["data"]["target"] in graph
+            graph.add_edge(element["data"]["source"], element["data"]["target"])
+    _same_as_networkx(graph, solved_map, ())
+
+
+def test_dot(solved_map, tmp_path):
+    graph_export.export(solved_map, tmp_path / "graph.dot")
+    text = (tmp_path / "graph.dot").read_text()
+    assert text.startswith("strict digraph {")
+    assert '"item\\nore" -> "Prod unit\\nplate-0\\nfurnace\\nqty 2.0"' in text
+    assert '"item\\nElectricity" ->' not in text
+
+
+def test_dot_attributes(tmp_path):
+    elements = [("a", {"rate": 3.3e-05, "nb_units": 2}), ("a", "b", {"rate": float("inf"), "strict": True})]
+    with open(tmp_path / "graph.dot", "w") as f:
+        graph_export.write_dot(elements, f)
+    text = (tmp_path / "graph.dot").read_text()
+    assert '"a" [rate="3.3e-05", nb_units="2"];' in text
+    assert '"a" -> "b" [rate="inf", strict="True"];' in text
+
+
+def test_unknown_format(solved_map, tmp_path):
+    with pytest.raises(ValueError, match="xyz"):
+        graph_export.export(solved_map, tmp_path / "graph.xyz")
@@ -0,0 +1,58 @@
+"""Test the production graph queries."""
+import networkx as nx
+import pytest
+
+import propt.adapters.graph_query as graph_query
+import propt.domain.optimizer.model as opt_model
+
+import tests.helpers as helpers
+
+
+@pytest.fixture
+def query() -> graph_query.GraphQuery:
+    """soil -> (farm <-> seed-maker loop) -> plank -> chair, with a trickle of sawdust."""
+    return graph_query.GraphQuery.from_production_map(
+        opt_model.ProductionMap(
+            [
+                helpers.unit("soil", {}, {"soil": 1}, quantity=1),
+                helpers.unit("farm", {"seed": 1, "soil": 1}, {"wood": 2}, quantity=1),
+                helpers.unit("seed-maker", {"wood": 1}, {"seed": 2}, quantity=1),
+                helpers.unit("plank", {"wood": 1}, {"plank": 1, "sawdust": 0.01}, quantity=1),
+                helpers.unit("chair", {"plank": 1}, {"chair": 1}, quantity=1),
+            ]
+        )
+    )
+
+
+def _units(query):
+    return {node.split("\n")[1] for node, node_type in query.graph.nodes(data="node_type") if node_type == "pu"}
+
+
+def test_around(query):
+    plank = opt_model.Item(name="plank")
+    assert _units(query.around([plank], hops=1)) == {"plank", "chair"}
+    assert _units(query.around([plank], hops=2, downstream=False)) == {"plank", "farm"}
+    assert _units(query.around([plank], hops=3, downstream=False)) == {"plank", "farm", "seed-maker", "soil"}
+    assert "item\nchair" in query.around([plank], hops=1, upstream=False).graph
+    with pytest.raises(KeyError, match="nope"):
+        query.around([opt_model.Item(name="nope")])
+
+
+def test_min_rate(query):
+    pruned = query.min_rate(0.1)
+    assert "item\nsawdust" not in pruned.graph
+    assert pruned.graph.number_of_edges() == query.graph.number_of_edges() - 1
+
+
+def test_collapse_loops(query):
+    collapsed = query.collapse_loops()
+    loops = [data for _, data in collapsed.graph.nodes(data=True) if data.get("node_type") == "loop"]
+    assert [loop["nb_units"] for loop in loops] == [2]
+    assert nx.is_directed_acyclic_graph(collapsed.graph)
+    assert _units(collapsed) == {"soil", "plank", "chair"}
+
+
+def test_write(query, tmp_path):
+    query.collapse_loops().write(tmp_path / "loops.graphml")
+    graph = nx.read_graphml(tmp_path / "loops.graphml")
+    assert graph.number_of_nodes() == query.collapse_loops().graph.number_of_nodes()
@@ -0,0 +1,48 @@
+"""Test the HiGHS optimizer against the OR-Tools one."""
+import immutables
+import pytest
+
+import propt.adapters.optimizers as optimizers
+import propt.domain.optimizer.model as opt_model
+
+GEAR = opt_model.Item(name="gear")
+
+
+def _nb_buildings(production_map: opt_model.ProductionMap) -> float:
+    return sum(prod_unit.quantity for prod_unit in production_map.production_units)
+
+
+@pytest.mark.parametrize("method", optimizers.HiGHSOptimizer.METHODS)
+def test_same_objective_as_ortools(small_production_map, method):
+    def optimize(optimizer_class, **kwargs):
+        return optimizer_class(
+            opt_model.ProductionMap(list(small_production_map.production_units)), [(GEAR, 10.0)], [], **kwargs
+        ).optimize()
+
+    highs = optimize(optimizers.HiGHSOptimizer, method=method)
+    ortools = optimize(optimizers.ORToolsOptimizer)
+    assert _nb_buildings(highs) == pytest.approx(_nb_buildings(ortools))
+    assert highs.production_units
+
+
+def test_caps():
+    def unit(name, rate):
+        return opt_model.ProductionUnit(
+            recipe_name=name,
+            building_name="assembler",
+            ingredients=immutables.Map(),
+            products=immutables.Map({GEAR: rate}),
+        )
+
+    fast, slow = unit("fast", 1.0), unit("slow", 0.5)
+    optimizer = optimizers.HiGHSOptimizer(opt_model.ProductionMap([fast, slow]), [(GEAR, 10.0)], [(fast, 3)])
+    quantities = {prod_unit.recipe_name: prod_unit.quantity for prod_unit in optimizer.optimize().production_units}
+    assert quantities == pytest.approx({"fast": 3.0, "slow": 14.0})
+    optimizer = optimizers.HiGHSOptimizer(opt_model.ProductionMap([fast]), [(GEAR, 10.0)], [(fast, 3)])
+    with pytest.raises(opt_model.SolutionNotFound):
+        optimizer.optimize()
+
+
+def test_unknown_method(small_production_map):
+    with pytest.raises(ValueError):
+        optimizers.HiGHSOptimizer(small_production_map, [], [], method="simplex")
@@ -45,3 +45,106 @@ def test_multi_to_multi_collection():
     obj_indexer.set_collection(collection)
     assert obj_indexer[24] == collection
     assert obj_indexer[123] == [collection[1]]
+
+
+def test_range_collection():
+    collection = [
+        {"name": "low", "temps": (("steam", 165), ("water", 15))},
+        {"name": "high", "temps": (("steam", 500),)},
+        {"name": "mid", "temps": (("steam", 250), ("steam", 165))},
+    ]
+    obj_indexer = indexer.RangeIndexer(lambda x: x["temps"])
+    obj_indexer.set_collection(collection)
+    assert obj_indexer.values_between("steam", 100, 300) == [165, 250]
+    assert [obj["name"] for obj in obj_indexer.between("steam", 250)] == ["mid", "high"]
+    assert obj_indexer.values_between("steam") == [165, 250, 500]
+    assert obj_indexer.between("steam", 501) == []
+    assert obj_indexer.between("nothing", 0, 10) == []
+
+
+def test_1to1_incremental(collection_dataclass):
+    indexer_obj = indexer.OneToOneIndexer(lambda x: x.foo)
+    indexer_obj.set_collection(collection_dataclass)
+    new = Something(foo=99, bar="nonante-neuf")
+    indexer_obj.add(new)
+    assert indexer_obj[99] is new
+    indexer_obj.remove(collection_dataclass[0])
+    assert 12 not in indexer_obj
+    moved = collection_dataclass[1]
+    moved.foo = 43
+    indexer_obj.replace(moved, moved)
+    assert indexer_obj[43] is moved
+    assert 42 not in indexer_obj
+    with pytest.raises(KeyError):
+        indexer_obj.remove(collection_dataclass[0])
+
+
+def test_multi_to_multi_incremental():
+    collection = [
+        {"keys": (12, 24), "name": "blah"},
+        {"keys": (24, 123), "name": "pouf"},
+        {"keys": (24,), "name": "paf"},
+    ]
+    obj_indexer = indexer.MultiToMultiIndexer(lambda x: x["keys"])
+    obj_indexer.set_collection(collection)
+    obj_indexer.remove(collection[0])
+    assert 12 not in obj_indexer
+    assert sorted(obj["name"] for obj in obj_indexer[24]) == ["paf", "pouf"]
+    new = {"keys": (123, 7), "name": "new"}
+    obj_indexer.replace(collection[1], new)
+    assert obj_indexer[123] == [new]
+    assert obj_indexer[24] == [collection[2]]
+    obj_indexer.remove(collection[2])
+    assert 24 not in obj_indexer
+    with pytest.raises(ValueError):
+        obj_indexer.add(new)
+
+
+def test_range_incremental():
+    collection = [{"temps": (("steam", temp),)} for temp in (500, 165, 250)]
+    obj_indexer = indexer.RangeIndexer(lambda x: x["temps"])
+    obj_indexer.set_collection(collection[:2])
+    obj_indexer.add(collection[2])
+    assert obj_indexer.values_between("steam") == [165, 250, 500]
+    obj_indexer.remove(collection[0])
+    assert obj_indexer.between("steam", 200) == [collection[2]]
+
+
+def test_composite_indexer():
+    collection = [
+        {"name": "blah", "keys": (1, 2)},
+        {"name": "pouf", "keys": (2,)},
+    ]
+    composite = indexer.CompositeIndexer(
+        by_name=indexer.OneToOneIndexer(lambda x: x["name"]),
+        by_key=indexer.MultiToMultiIndexer(lambda x: x["keys"]),
+    )
+    composite.set_collection(collection)
+    new = {"name": "paf", "keys": (3,)}
+    composite.replace(collection[0], new)
+    assert "blah" not in composite["by_name"]
+    assert composite["by_name"]["paf"] is new
+    assert composite["by_key"][3] == [new]
+    assert composite["by_key"][2] == [collection[1]]
+    with pytest.raises(KeyError):
+        composite.remove(collection[0])
+    assert composite["by_name"]["pouf"] is collection[1]
+
+
+def test_composite_indexer_replaced_key():
+    first, second = {"name": "x", "keys": (1,)}, {"name": "x", "keys": (2,)}
+    composite = indexer.CompositeIndexer(
+        by_name=indexer.OneToOneIndexer(lambda x: x["name"]),
+        by_key=indexer.MultiToMultiIndexer(lambda x: x["keys"]),
+    )
+    composite.add(first)
+    composite.add(second)
+    assert composite["by_name"] == {"x": second}
+    assert dict(composite["by_key"]) == {2: [second]}
+    with pytest.raises(KeyError):
+        composite.remove(first)
+    composite.remove(second)
+    assert not composite["by_name"] and not composite["by_key"]
+    composite.set_collection([first, second])
+    assert composite["by_name"] == {"x": second}
+    assert dict(composite["by_key"]) == {2: [second]}
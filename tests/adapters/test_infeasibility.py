@@ -0,0 +1,51 @@
+"""Test the infeasibility diagnosis of the OR-Tools optimizer."""
+import pytest
+
+import propt.adapters.optimizers as optimizers
+import propt.domain.optimizer.model as opt_model
+
+import tests.helpers as helpers
+
+GEAR = opt_model.Item(name="gear")
+PLATE = opt_model.Item(name="plate")
+COAL = opt_model.Item(name="coal")
+
+
+GEAR_UNIT = helpers.unit("gear", {PLATE: 2.0}, {GEAR: 1.0})
+PLATE_UNIT = helpers.unit("plate", {}, {PLATE: 1.0})
+COAL_UNIT = helpers.unit("coal", {}, {COAL: 1.0})
+
+
+def _optimizer(plate_cap: float) -> optimizers.ORToolsOptimizer:
+    """10 gears of 2 plates each and some coal, with a cap on the plate unit."""
+    return optimizers.ORToolsOptimizer(
+        opt_model.ProductionMap([GEAR_UNIT, PLATE_UNIT, COAL_UNIT]),
+        [(GEAR, 10.0), (COAL, 5.0)],
+        [(PLATE_UNIT, plate_cap), (COAL_UNIT, 100)],
+    )
+
+
+def test_diagnose_infeasibility():
+    optimizer = _optimizer(plate_cap=3)
+    with pytest.raises(opt_model.SolutionNotFound):
+        optimizer.optimize()
+    report = optimizer.diagnose_infeasibility()
+    assert set(report.item_targets) == {GEAR, PLATE}
+    assert report.production_unit_caps == (PLATE_UNIT,)
+    assert sorted(report.names) == [f"cap {PLATE_UNIT.name}", "gear-None", "plate-None"]
+
+
+def test_diagnose_keeps_the_model():
+    optimizer = _optimizer(plate_cap=3)
+    optimizer.diagnose_infeasibility()
+    optimizer._prod_unit_rows[0][1].SetUb(20)
+    result = optimizer.optimize()
+    assert optimizer._solver.Objective().Value() == pytest.approx(35.0)
+    assert {prod_unit.recipe_name for prod_unit in result.production_units} == {"gear", "plate", "coal"}
+
+
+def test_diagnose_feasible():
+    optimizer = _optimizer(plate_cap=20)
+    assert optimizer.diagnose_infeasibility() is None
+    optimizer.optimize()
+    assert optimizer._solver.Objective().Value() == pytest.approx(35.0)
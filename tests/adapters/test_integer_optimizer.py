@@ -0,0 +1,52 @@
+"""Test the integer mode of the OR-Tools optimizer."""
+import pytest
+
+import propt.adapters.optimizers as optimizers
+import propt.adapters.solver_parameters as solver_parameters
+import propt.domain.optimizer.model as opt_model
+
+import tests.helpers as helpers
+
+GEAR = opt_model.Item(name="gear")
+PLATE = opt_model.Item(name="plate")
+
+
+GEAR_UNIT = helpers.unit("gear", {PLATE: 2.0}, {GEAR: 1.0})
+PLATE_UNIT = helpers.unit("plate", {}, {PLATE: 1.5})
+SLOW_PLATE_UNIT = helpers.unit("slow-plate", {}, {PLATE: 0.5})
+
+
+def _optimizer(caps=(), mip_backend="SCIP") -> optimizers.ORToolsOptimizer:
+    """10.5 gears of 2 plates each."""
+    return optimizers.ORToolsOptimizer(
+        opt_model.ProductionMap([GEAR_UNIT, PLATE_UNIT, SLOW_PLATE_UNIT]),
+        [(GEAR, 10.5)],
+        caps,
+        parameters=solver_parameters.SolverParameters(verbose=False, mip_backend=mip_backend),
+    )
+
+
+@pytest.mark.parametrize("mip_backend", ["SCIP", "CBC", "CP-SAT"])
+def test_optimize_integer(mip_backend):
+    result = _optimizer(mip_backend=mip_backend).optimize_integer(time_limit=10)
+    quantities = {prod_unit.recipe_name: prod_unit.quantity for prod_unit in result.production_units}
+    assert quantities == {"gear": 11, "plate": 15}  # 22 plates, the LP wants 10.5 and 14
+
+
+def test_round_up():
+    optimizer = _optimizer()
+    optimizer.optimize()
+    rows = {
+        GEAR: [(0, 1.0)],
+        PLATE: [(0, -2.0), (1, 1.5)],
+    }
+    assert optimizer._round_up({0: 10.5, 1: 14.0}, rows, {0: 100, 1: 100}) == {0: 11, 1: 15}
+    assert optimizer._round_up({0: 10.5, 1: 14.0}, rows, {0: 100, 1: 14}) is None
+
+
+def test_optimize_integer_caps():
+    # the fast plate unit is capped by the LP, so the slow one makes the plates rounding can't
+    result = _optimizer(caps=[(PLATE_UNIT, 14.5)]).optimize_integer()
+    quantities = {prod_unit.recipe_name: prod_unit.quantity for prod_unit in result.production_units}
+    assert quantities["gear"] == 11 and quantities["plate"] <= 14
+    assert 1.5 * quantities["plate"] + 0.5 * quantities.get("slow-plate", 0) >= 22
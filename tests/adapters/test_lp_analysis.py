@@ -0,0 +1,148 @@
+"""Test the sensitivity analysis of the OR-Tools optimizer."""
+import math
+
+import immutables
+import numpy as np
+import pytest
+
+import propt.adapters.lp_basis as lp_basis
+import propt.adapters.optimizers as optimizers
+import propt.domain.optimizer.model as opt_model
+
+GEAR = opt_model.Item(name="gear")
+ORE = opt_model.Item(name="ore")
+
+
+def _optimizer(production_map, nb_gears=10.0) -> optimizers.ORToolsOptimizer:
+    return optimizers.ORToolsOptimizer(
+        opt_model.ProductionMap(list(production_map.production_units)), [(GEAR, nb_gears)], []
+    )
+
+
+@pytest.fixture
+def solved(small_production_map) -> optimizers.ORToolsOptimizer:
+    optimizer = _optimizer(small_production_map)
+    optimizer.optimize()
+    return optimizer
+
+
+def test_basis_duals_match_solver(solved):
+    basis = lp_basis.LPBasis(solved._solver)
+    duals = basis.duals(np.ones(basis.nb_columns))
+    assert duals == pytest.approx([row.dual_value() for row in solved._solver.constraints()], abs=1e-9)
+
+
+def test_marginal_costs(solved, small_production_map):
+    table = solved.marginal_costs(raw_resources=[ORE])
+    assert solved._result.marginal_costs is table
+    more_gears = _optimizer(small_production_map, 10.5).evaluate_with(())
+    assert table.buildings(GEAR) == pytest.approx((more_gears - solved.evaluate_with(())) / 0.5)
+    assert table.raw_resource(GEAR, ORE) == pytest.approx(2.0)  # 2 plates of 1 ore
+    assert table.raw_resource(GEAR, opt_model.Item(name="coal")) == 0.0
+
+
+def test_marginal_costs_before_optimize(small_production_map):
+    with pytest.raises(opt_model.SolutionNotFound):
+        _optimizer(small_production_map).marginal_costs()
+
+
+@pytest.fixture
+def capped() -> tuple[optimizers.ORToolsOptimizer, opt_model.ProductionUnit, opt_model.ProductionUnit]:
+    """10 gears from a fast unit (1 gear/s, capped to 3) and a slow one (0.5 gear/s)."""
+
+    def unit(name, rate):
+        return opt_model.ProductionUnit(
+            recipe_name=name,
+            building_name="assembler",
+            ingredients=immutables.Map(),
+            products=immutables.Map({GEAR: rate}),
+        )
+
+    fast, slow = unit("fast", 1.0), unit("slow", 0.5)
+    optimizer = optimizers.ORToolsOptimizer(opt_model.ProductionMap([fast, slow]), [(GEAR, 10.0)], [(fast, 3)])
+    optimizer.optimize()
+    return optimizer, fast, slow
+
+
+def test_sensitivity(capped):
+    optimizer, fast, slow = capped
+    report = optimizer.sensitivity()
+    assert optimizer._result.sensitivity is report
+    target = report.item_targets[GEAR]
+    assert target.dual == pytest.approx(2.0)
+    assert (target.rhs.low, target.rhs.high) == pytest.approx((3.0, math.inf))
+    ((cap_unit, cap),) = report.production_unit_caps
+    assert cap_unit == fast
+    assert cap.dual == pytest.approx(-1.0)
+    assert (cap.rhs.low, cap.rhs.high) == pytest.approx((0.0, 10.0))
+    assert (report.unit_costs[fast].low, report.unit_costs[fast].high) == pytest.approx((-math.inf, 2.0))
+    assert (report.unit_costs[slow].low, report.unit_costs[slow].high) == pytest.approx((0.5, math.inf))
+    assert report.bottlenecks() == [(fast, cap)]
+    assert 7.5 in cap.rhs and 12 not in cap.rhs
+
+
+def test_sensitivity_predicts_resolve(capped):
+    optimizer, fast, slow = capped
+    cap = optimizer.sensitivity().production_unit_caps[0][1]
+    objective = optimizer._solver.Objective().Value()
+    moved = optimizers.ORToolsOptimizer(opt_model.ProductionMap([fast, slow]), [(GEAR, 10.0)], [(fast, 8)])
+    assert moved.evaluate_with(()) == pytest.approx(objective + cap.dual * (8 - 3))
+
+
+@pytest.fixture
+def extended() -> tuple[optimizers.ORToolsOptimizer, list[opt_model.ProductionUnit]]:
+    """Gears from ore (capped to 3) or slowly from nothing, the mine added after a diagnosis."""
+
+    def unit(name, ingredients, products):
+        return opt_model.ProductionUnit(
+            recipe_name=name,
+            building_name="assembler",
+            ingredients=immutables.Map(ingredients),
+            products=immutables.Map(products),
+        )
+
+    fast, slow = unit("fast", {ORE: 1.0}, {GEAR: 1.0}), unit("slow", {}, {GEAR: 0.25})
+    mine = unit("mine", {}, {ORE: 1.0})
+    optimizer = optimizers.ORToolsOptimizer(opt_model.ProductionMap([fast, slow]), [(GEAR, 10.0)], [(fast, 3)])
+    assert optimizer.diagnose_infeasibility() is None  # adds the elastic columns
+    optimizer.add_production_units([mine])  # a column after them
+    optimizer.optimize()
+    return optimizer, [fast, slow, mine]
+
+
+def test_marginal_costs_after_diagnosis(extended):
+    optimizer, _ = extended
+    table = optimizer.marginal_costs(raw_resources=[ORE])
+    assert table.buildings(GEAR) == pytest.approx(4.0)
+    assert table.raw_resource(ORE, ORE) == pytest.approx(1.0)
+    assert table.raw_resource(GEAR, ORE) == pytest.approx(0.0)
+
+
+def test_sensitivity_after_diagnosis(extended):
+    optimizer, (fast, slow, mine) = extended
+    report = optimizer.sensitivity()
+    assert set(report.unit_costs) == {fast, slow, mine}
+    assert all(cost.value == pytest.approx(1.0) for cost in report.unit_costs.values())
+    assert (report.unit_costs[slow].low, report.unit_costs[slow].high) == pytest.approx((0.5, math.inf))
+    assert report.item_targets[GEAR].dual == pytest.approx(4.0)
+
+
+
+def test_analysis_after_other_solves(capped):
+    """The analysis is that of the last optimize, even after other solves on the kept model."""
+    optimizer, _, _ = capped
+    result = optimizer._result
+    faster = opt_model.ProductionUnit(
+        recipe_name="faster",
+        building_name="assembler",
+        ingredients=immutables.Map(),
+        products=immutables.Map({GEAR: 5.0}),
+    )
+    assert optimizer.evaluate_with([faster]) == pytest.approx(2.0)
+    assert optimizer.diagnose_infeasibility() is None
+    assert optimizer.marginal_costs().buildings(GEAR) == pytest.approx(2.0)
+    assert optimizer.sensitivity().item_targets[GEAR].dual == pytest.approx(2.0)
+    assert result.marginal_costs.buildings(GEAR) == pytest.approx(2.0)
+    optimizer.add_production_units([faster])
+    with pytest.raises(opt_model.SolutionNotFound):  # the last plan is for the map without the new unit
+        optimizer.marginal_costs()
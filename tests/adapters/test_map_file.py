@@ -0,0 +1,69 @@
+"""Test the production map file format."""
+import numpy as np
+import pytest
+
+import propt.adapters.construction_order as construction_order
+import propt.adapters.map_file as map_file
+import propt.domain.optimizer.model as opt_model
+
+
+@pytest.fixture
+def solved_map(small_production_map) -> opt_model.ProductionMap:
+    return opt_model.ProductionMap(
+        [
+            prod_unit.copy(update={"quantity": idx + 0.5})
+            for idx, prod_unit in enumerate(small_production_map.production_units)
+        ]
+    )
+
+
+def test_round_trip(solved_map, tmp_path):
+    map_file.write(solved_map, tmp_path / "map.pmap")
+    loaded = map_file.read(tmp_path / "map.pmap")
+    assert len(loaded.production_units) == len(solved_map.production_units)
+    for unit, view in zip(solved_map.production_units, loaded.production_units):
+        assert (view.recipe_name, view.building_name, view.quantity) == (
+            unit.recipe_name, unit.building_name, unit.quantity
+        )
+        assert view.ingredients == unit.ingredients
+        assert view.products == unit.products
+    assert loaded.items == solved_map.items
+    assert isinstance(loaded.quantities, np.memmap) or isinstance(loaded.quantities.base, np.memmap)
+
+
+def test_edges(solved_map, tmp_path):
+    map_file.write(solved_map, tmp_path / "map.pmap")
+    opened = map_file.MapFile(tmp_path / "map.pmap")
+    sources, targets, rates = opened.edges
+    nb_items = len(opened.items)
+    assert len(sources) == sum(len(unit.ingredients) + len(unit.products) for unit in solved_map.production_units)
+    for source, target, rate in zip(sources.tolist(), targets.tolist(), rates.tolist()):
+        if opened.is_item_node(source):
+            unit, item = solved_map.production_units[target - nb_items], opened.items[source]
+            assert rate == pytest.approx(unit.ingredients[item] * unit.quantity)
+        else:
+            unit, item = solved_map.production_units[source - nb_items], opened.items[target]
+            assert rate == pytest.approx(unit.products[item] * unit.quantity)
+
+
+def test_loaded_map_is_usable(solved_map, tmp_path):
+    map_file.write(solved_map, tmp_path / "map.pmap")
+    loaded = map_file.read(tmp_path / "map.pmap")
+    steps = construction_order.ConstructionOrder.from_production_map(loaded).steps()
+    assert len(steps) == len(solved_map.production_units)
+    loaded.append(solved_map.production_units[0])
+    assert len(loaded.production_units) == len(solved_map.production_units) + 1
+
+
+def test_empty_map(tmp_path):
+    map_file.write(opt_model.ProductionMap([]), tmp_path / "map.pmap")
+    assert len(map_file.read(tmp_path / "map.pmap").production_units) == 0
+
+
+def test_invalid_file(tmp_path):
+    (tmp_path / "graphou").write_bytes(b"\x80\x04not a map file at all")
+    with pytest.raises(map_file.InvalidMapFile):
+        map_file.read(tmp_path / "graphou")
+    (tmp_path / "future.pmap").write_bytes(map_file._PREFIX.pack(map_file.MAGIC, 99, 2) + b"{}")
+    with pytest.raises(map_file.InvalidMapFile, match="version 99"):
+        map_file.read(tmp_path / "future.pmap")
@@ -0,0 +1,46 @@
+"""Test solving production maps with the electric network in MW."""
+import pytest
+
+import propt.adapters.network_optimizer as network_optimizer
+import propt.adapters.optimizers as optimizers
+import propt.adapters.solver_parameters as solver_parameters
+import propt.domain.optimizer.model as opt_model
+
+import tests.helpers as helpers
+
+GEAR = opt_model.Item(name="gear")
+STEAM = opt_model.Item(name="steam", temperature=165)
+ENERGY = opt_model.Item(name="Electricity", energy_ingredient=True)
+PARAMETERS = solver_parameters.SolverParameters(verbose=False)
+
+ASSEMBLER = helpers.unit("gear", {ENERGY: 75000.0}, {GEAR: 1.0})
+ENGINE = helpers.unit("steam-engine", {STEAM: 30.0}, {opt_model.Item(name="Electricity"): 900000.0}, "steam-engine")
+BOILER = helpers.unit("boil", {}, {STEAM: 60.0}, "boiler")
+FAST_ASSEMBLER = helpers.unit("fast-gear", {ENERGY: 150000.0}, {GEAR: 2.0}, "assembler-2")
+
+
+def test_same_plan():
+    production_map = opt_model.ProductionMap([ASSEMBLER, ENGINE, BOILER])
+    optimizer = network_optimizer.EnergyNetworkOptimizer(
+        production_map, [(GEAR, 24.0)], [(ASSEMBLER, 30)], parameters=PARAMETERS
+    )
+    reference = optimizers.ORToolsOptimizer(
+        production_map, [(GEAR, 24.0)], [(ASSEMBLER, 30)], parameters=PARAMETERS
+    ).optimize()
+    result = optimizer.optimize()
+    assert {prod_unit: prod_unit.quantity for prod_unit in result.production_units} == pytest.approx(
+        {prod_unit: prod_unit.quantity for prod_unit in reference.production_units}
+    )
+    assert optimizer.power_balance.demand == pytest.approx({"assembler": 1.8})
+    assert optimizer.power_balance.surplus == pytest.approx(0.0)
+
+
+def test_add_production_units():
+    optimizer = network_optimizer.EnergyNetworkOptimizer(
+        opt_model.ProductionMap([ASSEMBLER, ENGINE, BOILER]), [(GEAR, 24.0)], [], parameters=PARAMETERS
+    )
+    optimizer.optimize()
+    optimizer.add_production_units([FAST_ASSEMBLER])
+    result = optimizer.optimize()
+    assert {prod_unit.recipe_name for prod_unit in result.production_units} >= {"fast-gear"}
+    assert optimizer.power_balance.demand == pytest.approx({"assembler-2": 1.8})
@@ -0,0 +1,81 @@
+"""Test the lexicographic and Pareto modes of the OR-Tools optimizer."""
+import immutables
+import pytest
+
+import propt.adapters.optimizers as optimizers
+import propt.adapters.solver_parameters as solver_parameters
+import propt.domain.optimizer.model as opt_model
+
+import tests.helpers as helpers
+
+GEAR = opt_model.Item(name="gear")
+ELECTRICITY = opt_model.Item(name="Electricity")
+
+
+FAST = helpers.unit("fast", {ELECTRICITY: 3.0}, {GEAR: 2.0}, "assembler-2")
+"""Half the buildings of slow, but 1.5 power by gear instead of 1."""
+SLOW = helpers.unit("slow", {ELECTRICITY: 1.0}, {GEAR: 1.0}, "assembler-1")
+POWER = opt_model.ProductionUnit(
+    recipe_name="power",
+    building_name="steam-engine",
+    ingredients=immutables.Map(),
+    products=immutables.Map({ELECTRICITY: 100.0}),
+)
+BUILDINGS = opt_model.Objective.buildings()
+POWER_DRAW = opt_model.Objective.consumption(ELECTRICITY, "power")
+
+
+@pytest.fixture
+def optimizer() -> optimizers.ORToolsOptimizer:
+    """10 gears, with at most 4 fast units."""
+    return optimizers.ORToolsOptimizer(
+        opt_model.ProductionMap([FAST, SLOW, POWER]),
+        [(GEAR, 10.0)],
+        [(FAST, 4)],
+        parameters=solver_parameters.SolverParameters(verbose=False),
+    )
+
+
+def _quantities(production_map):
+    """The quantities, without those the tolerance of the objectives allows."""
+    return {
+        prod_unit.recipe_name: prod_unit.quantity
+        for prod_unit in production_map.production_units
+        if prod_unit.quantity > 1e-3
+    }
+
+
+def test_objectives():
+    assert opt_model.Objective.consumption(ELECTRICITY).weight(FAST) == 3.0
+    assert opt_model.Objective.production([GEAR]).weight(FAST) == 2.0
+    pollution = opt_model.Objective.by_building("pollution", {"assembler-1": 4.0})
+    assert (pollution.weight(SLOW), pollution.weight(FAST)) == (4.0, 0.0)
+
+
+def test_lexicographic(optimizer):
+    result = optimizer.optimize_lexicographic([POWER_DRAW, BUILDINGS])
+    assert result.objective_values["power"] == pytest.approx(10.0)
+    assert _quantities(result) == pytest.approx({"slow": 10.0, "power": 0.1}, abs=1e-4)
+    result = optimizer.optimize_lexicographic([BUILDINGS, POWER_DRAW])
+    assert result.objective_values == pytest.approx({"buildings": 6.14, "power": 14.0})
+    assert _quantities(result) == pytest.approx({"fast": 4.0, "slow": 2.0, "power": 0.14}, abs=1e-4)
+    # the model is back to the building count
+    assert sum(_quantities(optimizer.optimize()).values()) == pytest.approx(6.14)
+
+
+def test_pareto_front(optimizer):
+    front = optimizer.pareto_front(BUILDINGS, POWER_DRAW, nb_points=5)
+    values = [(point.objective_values["buildings"], point.objective_values["power"]) for point in front]
+    assert values[0] == pytest.approx((6.14, 14.0))
+    assert values[-1] == pytest.approx((10.1, 10.0))
+    assert len(values) == 5
+    for (buildings, power), (next_buildings, next_power) in zip(values, values[1:]):
+        assert buildings < next_buildings and power > next_power
+
+
+def test_bound_rows_are_reused(optimizer):
+    optimizer.pareto_front(BUILDINGS, POWER_DRAW, nb_points=5)
+    nb_rows = optimizer.solver.NumConstraints()
+    optimizer.pareto_front(BUILDINGS, POWER_DRAW, nb_points=5)
+    optimizer.optimize_lexicographic([POWER_DRAW, BUILDINGS])
+    assert optimizer.solver.NumConstraints() == nb_rows
@@ -0,0 +1,65 @@
+"""Test the solver parameters, their profile and the tuning."""
+import pytest
+
+import propt.adapters.map_file as map_file
+import propt.adapters.optimizers as optimizers
+import propt.adapters.solver_parameters as solver_parameters
+import propt.adapters.solver_tuning as solver_tuning
+import propt.domain.optimizer.model as opt_model
+import propt.entrypoints as entrypoints
+
+GEAR = opt_model.Item(name="gear")
+
+
+@pytest.fixture
+def profile(tmp_path, monkeypatch):
+    filepath = tmp_path / "profile.json"
+    monkeypatch.setenv(solver_parameters.PROFILE_ENV, str(filepath))
+    return filepath
+
+
+def test_profile(profile, small_production_map):
+    assert solver_parameters.SolverParameters.load() == solver_parameters.SolverParameters()
+    parameters = solver_parameters.SolverParameters(backend="GLOP", algorithm="primal", time_limit=10, verbose=False)
+    parameters.save()
+    assert solver_parameters.SolverParameters.load() == parameters
+    optimizer = optimizers.create_optimizer(small_production_map, [(GEAR, 10.0)], [])
+    assert isinstance(optimizer, optimizers.ORToolsOptimizer)
+    assert optimizer.parameters == parameters
+    assert optimizers.ORToolsOptimizer(small_production_map, [(GEAR, 10.0)], []).parameters == parameters
+    solver_parameters.SolverParameters(backend="scipy-highs", algorithm="barrier").save()
+    optimizer = optimizers.create_optimizer(small_production_map, [(GEAR, 10.0)], [])
+    assert isinstance(optimizer, optimizers.HiGHSOptimizer)
+    assert optimizer.method == "highs-ipm"
+
+
+@pytest.mark.parametrize("backend", solver_tuning.BACKENDS)
+def test_backends_agree(small_production_map, backend):
+    parameters = solver_parameters.SolverParameters(backend=backend, verbose=False)
+    result = optimizers.create_optimizer(small_production_map, [(GEAR, 10.0)], [], parameters=parameters).optimize()
+    reference = optimizers.ORToolsOptimizer(small_production_map, [(GEAR, 10.0)], []).optimize()
+    assert sum(prod_unit.quantity for prod_unit in result.production_units) == pytest.approx(
+        sum(prod_unit.quantity for prod_unit in reference.production_units), rel=1e-4
+    )
+
+
+def test_tune(small_production_map):
+    trials = solver_tuning.tune(
+        small_production_map,
+        [(GEAR, 10.0)],
+        configurations=solver_tuning.grid(["CLP", "scipy-highs"], ["primal", "dual"], threads=[1]),
+    )
+    assert len(trials) == 4
+    assert [trial.seconds is None for trial in trials] == [False, False, False, True]
+    assert trials[-1].parameters.backend == "scipy-highs" and trials[-1].parameters.algorithm == "primal"
+    best = solver_tuning.fastest(trials)
+    assert best.verbose and best.copy(update={"verbose": False}) == trials[0].parameters
+    with pytest.raises(opt_model.SolutionNotFound):
+        solver_tuning.fastest(trials[-1:])
+
+
+def test_tune_entrypoint(tmp_path, profile, small_production_map):
+    filepath = tmp_path / "scenario.pmap"
+    map_file.write(small_production_map, filepath)
+    entrypoints.tune([str(filepath), "gear=10", "--backends", "CLP", "GLOP", "--threads", "1", "--repeat", "1"])
+    assert solver_parameters.SolverParameters.load().backend in ("CLP", "GLOP")
@@ -0,0 +1,50 @@
+"""Test the streaming sparse model builder."""
+import types
+
+import numpy as np
+import pytest
+
+import propt.adapters.optimizers as optimizers
+import propt.adapters.solver_parameters as solver_parameters
+import propt.adapters.sparse_model as sparse_model
+import propt.domain.optimizer.model as opt_model
+
+GEAR = opt_model.Item(name="gear")
+PARAMETERS = solver_parameters.SolverParameters(verbose=False)
+
+
+@pytest.fixture
+def stream(small_recipes, small_buildings, small_items, small_fluids):
+    return opt_model.ProductionMap.iter_production_units(small_recipes, small_buildings, small_items, small_fluids)
+
+
+def test_iter_production_units(stream, small_production_map):
+    assert isinstance(stream, types.GeneratorType)
+    assert list(stream) == small_production_map.production_units
+
+
+def test_builder(small_production_map):
+    prod_units = small_production_map.production_units
+    builder = sparse_model.SparseModelBuilder([(prod_units[1], 3.0)]).extend(iter(prod_units))
+    matrix = builder.matrix().toarray()
+    assert builder.production_units == prod_units
+    assert builder.nb_nonzeros == sum(len(prod_unit.items) for prod_unit in prod_units)
+    for item, row in builder.item_rows.items():
+        assert matrix[row] == pytest.approx(
+            [prod_unit.get_item_net_quantity_by_unit_of_time(item) for prod_unit in prod_units]
+        )
+    assert builder.bounds()[1].tolist() == [0.0, 3.0]
+    assert np.isinf(builder.bounds()[0, 1])
+    assert builder.min_items([(GEAR, 10.0), (opt_model.Item(name="nothing"), 1.0)]).sum() == 10.0
+
+
+@pytest.mark.parametrize("optimizer_class", [optimizers.HiGHSOptimizer, optimizers.ORToolsOptimizer])
+def test_from_stream(optimizer_class, stream, small_production_map):
+    caps = [(small_production_map.production_units[0], 100.0)]
+    optimizer = optimizer_class.from_stream(stream, [(GEAR, 10.0)], caps, parameters=PARAMETERS)
+    result = optimizer.optimize()
+    reference = optimizer_class(small_production_map, [(GEAR, 10.0)], caps, parameters=PARAMETERS).optimize()
+    assert optimizer._production_map.production_units == small_production_map.production_units
+    assert sum(prod_unit.quantity for prod_unit in result.production_units) == pytest.approx(
+        sum(prod_unit.quantity for prod_unit in reference.production_units)
+    )
@@ -36,3 +36,231 @@
 #         factorio_model.FactorioRecipe: recipe_repo,
 #         factorio_model.FactorioResource: resource_repo
 #     }
+
+
+import pytest
+
+import propt.adapters.solver_parameters as solver_parameters
+import propt.domain.factorio.energy as energy
+import propt.domain.factorio.object_set as object_set
+import propt.domain.factorio.prototypes as prototypes
+import propt.domain.optimizer.model as opt_model
+import propt.domain.optimizer.unlock as unlock
+
+
+@pytest.fixture(autouse=True)
+def solver_profile(tmp_path, monkeypatch):
+    """Keep the tests away from a solver profile of the working directory."""
+    monkeypatch.setenv(solver_parameters.PROFILE_ENV, str(tmp_path / "solver_profile.json"))
+
+
+@pytest.fixture
+def small_items() -> dict[str, prototypes.Item]:
+    return {
+        "ore": prototypes.Item(name="ore"),
+        "plate": prototypes.Item(name="plate"),
+        "gear": prototypes.Item(name="gear"),
+        "coal": prototypes.Item(
+            name="coal", fuel_category="chemical", fuel_value=4_000_000
+        ),
+    }
+
+
+@pytest.fixture
+def small_fluids() -> dict[str, prototypes.Fluid]:
+    return {
+        "water": prototypes.Fluid(name="water"),
+        "steam": prototypes.Fluid(name="steam", max_temperature=1000, heat_capacity=200),
+    }
+
+
+@pytest.fixture
+def small_buildings() -> opt_model.BuildingSet:
+    return opt_model.BuildingSet(
+        {
+            prototypes.Building(
+                name="drill",
+                energy_usage=90_000,
+                speed_coefficient=0.5,
+                crafting_categories=("basic-solid",),
+                energy_info=energy.Electricity(),
+            ),
+            prototypes.Building(
+                name="furnace",
+                energy_usage=90_000,
+                speed_coefficient=2.0,
+                crafting_categories=("smelting",),
+                energy_info=energy.Burner(
+                    effectivity=1.0, fuel_categories=frozenset({"chemical"})
+                ),
+            ),
+            prototypes.Building(
+                name="assembler",
+                energy_usage=75_000,
+                speed_coefficient=0.5,
+                crafting_categories=("crafting",),
+                energy_info=energy.Electricity(),
+            ),
+            prototypes.Building(
+                name="offshore-pump",
+                energy_usage=0,
+                speed_coefficient=1.0,
+                crafting_categories=("pumping",),
+                energy_info=energy.Void(),
+            ),
+            prototypes.Building(
+                name="boiler",
+                energy_usage=1_800_000,
+                speed_coefficient=1.0,
+                crafting_categories=("boiling-boiler",),
+                energy_info=energy.Burner(
+                    effectivity=1.0, fuel_categories=frozenset({"chemical"})
+                ),
+            ),
+            prototypes.Building(
+                name="steam-engine",
+                energy_usage=0,
+                speed_coefficient=1.0,
+                crafting_categories=("steam-engine",),
+                energy_info=energy.Void(),
+            ),
+        }
+    )
+
+
+@pytest.fixture
+def small_recipes(small_items, small_fluids) -> object_set.RecipeSet:
+    def recipe(name, category, base_time, ingredients, products, handcraft=False):
+        return prototypes.Recipe(
+            name=name,
+            category=category,
+            available_from_start=True,
+            hidden_from_player_crafting=not handcraft,
+            base_time=base_time,
+            ingredients=tuple(ingredients),
+            products=tuple(products),
+        )
+
+    items, fluids = small_items, small_fluids
+    return object_set.RecipeSet(
+        {
+            recipe("ore", "basic-solid", 1.0, (), (prototypes.ProductItem(obj=items["ore"], amount=1),)),
+            recipe("coal", "basic-solid", 1.0, (), (prototypes.ProductItem(obj=items["coal"], amount=1),)),
+            recipe(
+                "plate",
+                "smelting",
+                3.2,
+                (prototypes.ItemIngredient(obj=items["ore"], amount=1),),
+                (prototypes.ProductItem(obj=items["plate"], amount=1),),
+            ),
+            recipe(
+                "gear",
+                "crafting",
+                0.5,
+                (prototypes.ItemIngredient(obj=items["plate"], amount=2),),
+                (prototypes.ProductItem(obj=items["gear"], amount=1),),
+                handcraft=True,
+            ),
+            recipe(
+                "water",
+                "pumping",
+                1.0,
+                (),
+                (prototypes.ProductFluid(obj=fluids["water"], amount=1200, temperature=15),),
+            ),
+            recipe(
+                "steam",
+                "boiling-boiler",
+                1.0,
+                (
+                    prototypes.FluidIngredient(
+                        obj=fluids["water"], amount=60, min_temperature=15, max_temperature=15
+                    ),
+                ),
+                (prototypes.ProductFluid(obj=fluids["steam"], amount=60, temperature=165),),
+            ),
+            recipe(
+                "elec-from-steam-engine-165",
+                "steam-engine",
+                1.0,
+                (
+                    prototypes.FluidIngredient(
+                        obj=fluids["steam"], amount=30, min_temperature=165, max_temperature=165
+                    ),
+                ),
+                (prototypes.ProductItem(obj=prototypes.ELECTRICITY, amount=900_000),),
+            ),
+        }
+    )
+
+
+@pytest.fixture
+def small_production_map(
+    small_recipes, small_buildings, small_items, small_fluids
+) -> opt_model.ProductionMap:
+    return opt_model.ProductionMap.from_repositories(
+        available_recipes=small_recipes,
+        available_buildings=small_buildings,
+        item_repo=small_items,
+        fluid_repo=small_fluids,
+    )
+
+
+STEAM_RECIPES = ("steam", "elec-from-steam-engine-165", "boiler")
+
+
+@pytest.fixture
+def building_repo(small_buildings) -> dict[str, prototypes.Building]:
+    return {building.name: building for building in small_buildings}
+
+
+@pytest.fixture
+def all_recipes(small_recipes, small_items, building_repo) -> object_set.RecipeSet:
+    boiler_item = prototypes.Item(name="boiler", place_result=building_repo["boiler"])
+    return object_set.RecipeSet(
+        small_recipes.union(
+            {
+                prototypes.Recipe(
+                    name="boiler",
+                    category="crafting",
+                    available_from_start=False,
+                    hidden_from_player_crafting=True,
+                    base_time=1.0,
+                    ingredients=(prototypes.ItemIngredient(obj=small_items["plate"], amount=4),),
+                    products=(prototypes.ProductItem(obj=boiler_item, amount=1),),
+                )
+            }
+        )
+    )
+
+
+@pytest.fixture
+def steam_power(all_recipes) -> prototypes.Technology:
+    return prototypes.Technology(
+        name="steam-power",
+        recipe_unlocked=tuple(recipe for recipe in all_recipes if recipe.name in STEAM_RECIPES),
+    )
+
+
+@pytest.fixture
+def unlocker(all_recipes, small_buildings, building_repo, small_items, small_fluids):
+    available_recipes = object_set.RecipeSet(
+        recipe for recipe in all_recipes if recipe.name not in STEAM_RECIPES
+    )
+    available_buildings = opt_model.BuildingSet(
+        building for building in small_buildings if building.name != "boiler"
+    )
+    return unlock.TechnologyUnlocker(
+        technologies=object_set.TechnologySet([]),
+        available_recipes=available_recipes,
+        available_buildings=available_buildings,
+        production_map=opt_model.ProductionMap.from_repositories(
+            available_recipes=available_recipes,
+            available_buildings=available_buildings,
+            item_repo=small_items,
+            fluid_repo=small_fluids,
+        ),
+        building_repo=building_repo,
+        item_repo=small_items,
+        fluid_repo=small_fluids,
+    )
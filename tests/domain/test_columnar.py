@@ -0,0 +1,91 @@
+"""Test the columnar production map."""
+import immutables
+import pytest
+
+import propt.adapters.optimizers as optimizers
+import propt.domain.optimizer.columnar as columnar
+import propt.domain.optimizer.model as opt_model
+
+
+@pytest.fixture
+def columnar_map(small_production_map) -> columnar.ColumnarProductionMap:
+    return columnar.ColumnarProductionMap.from_production_map(small_production_map)
+
+
+def test_same_units(small_production_map, columnar_map):
+    assert len(columnar_map.production_units) == len(small_production_map.production_units)
+    for unit, view in zip(small_production_map.production_units, columnar_map.production_units):
+        assert view.name == unit.name
+        assert view.ingredients == unit.ingredients
+        assert view.products == unit.products
+        assert view.items == unit.items
+        for item in unit.items:
+            assert view.get_item_net_quantity_by_unit_of_time(
+                item
+            ) == unit.get_item_net_quantity_by_unit_of_time(item)
+    assert columnar_map.items == small_production_map.items
+
+
+def test_unknown_item_quantity(columnar_map):
+    view = columnar_map.production_units[0]
+    assert view.get_item_consumed_quantity_by_unit_of_time(opt_model.Item(name="nope")) == 0.0
+
+
+def test_view_hash_and_eq(columnar_map):
+    first = columnar_map.production_units[0]
+    assert first == columnar_map.production_units[0]
+    assert first != columnar_map.production_units[1]
+    assert len(set(columnar_map.production_units)) == len(columnar_map.production_units)
+
+
+def test_add_magic_unit(columnar_map):
+    size = len(columnar_map.production_units)
+    columnar_map.add_production_units(
+        [
+            opt_model.ProductionUnit(
+                recipe_name="consumer",
+                building_name="void",
+                ingredients=immutables.Map({opt_model.Item(name="unobtainium"): 1.0}),
+                products=immutables.Map(),
+            )
+        ]
+    )
+    columnar_map.add_magic_unit()
+    assert len(columnar_map.production_units) == size + 2
+    assert columnar_map.production_units[-1].products == immutables.Map({opt_model.Item(name="unobtainium"): 1})
+
+
+def test_optimize_columnar(columnar_map):
+    result = optimizers.ORToolsOptimizer(
+        columnar_map, [(opt_model.Item(name="gear"), 1.0)], []
+    ).optimize()
+    assert {unit.recipe_name for unit in result.production_units} >= {"gear-0", "plate-0"}
+
+
+def _rates(rates):
+    return tuple(sorted((item.name, item.temperature or 0, round(rate, 9)) for item, rate in rates.items()))
+
+
+def _unit_contents(production_map):
+    return sorted(
+        (
+            unit.recipe_name,
+            unit.building_name,
+            _rates(unit.ingredients),
+            _rates(unit.products),
+        )
+        for unit in production_map.production_units
+    )
+
+
+def test_vectorized_from_repositories(
+    small_production_map, small_recipes, small_buildings, small_items, small_fluids
+):
+    vectorized = columnar.ColumnarProductionMap.from_repositories(
+        available_recipes=small_recipes,
+        available_buildings=small_buildings,
+        item_repo=small_items,
+        fluid_repo=small_fluids,
+    )
+    assert _unit_contents(vectorized) == _unit_contents(small_production_map)
+    assert vectorized.items == small_production_map.items
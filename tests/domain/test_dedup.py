@@ -0,0 +1,54 @@
+"""Test the merge of the units with the same rates."""
+import pytest
+
+import propt.adapters.optimizers as optimizers
+import propt.adapters.solver_parameters as solver_parameters
+import propt.domain.optimizer.dedup as dedup
+import propt.domain.optimizer.model as opt_model
+
+import tests.helpers as helpers
+
+GEAR = opt_model.Item(name="gear")
+PLATE = opt_model.Item(name="plate")
+STEAM = opt_model.Item(name="steam", temperature=165)
+ELECTRICITY = opt_model.Item(name="Electricity")
+
+
+ENGINE = helpers.unit("elec-from-steam-engine-165", {STEAM: 30.0}, {ELECTRICITY: 900000.0}, "steam-engine")
+TURBINE = helpers.unit("elec-from-steam-turbine-165", {STEAM: 30.0}, {ELECTRICITY: 900000.0 + 1e-12}, "steam-turbine")
+BOILER = helpers.unit("boil", {}, {STEAM: 60.0}, "boiler")
+GEAR_UNIT = helpers.unit("gear", {PLATE: 2.0, ELECTRICITY: 75000.0}, {GEAR: 1.0})
+PLATE_UNIT = helpers.unit("plate", {}, {PLATE: 1.0}, "furnace")
+PLATE_UNIT_2 = helpers.unit("plate-1", {}, {PLATE: 1.0}, "furnace")
+UNITS = [ENGINE, TURBINE, BOILER, GEAR_UNIT, PLATE_UNIT, PLATE_UNIT_2]
+
+
+def test_rate_key():
+    assert dedup.rate_key(ENGINE) == dedup.rate_key(TURBINE)
+    assert dedup.rate_key(ENGINE) != dedup.rate_key(BOILER)
+    hot = helpers.unit("boil", {}, {opt_model.Item(name="steam", temperature=500): 60.0}, "boiler")
+    assert dedup.rate_key(hot) != dedup.rate_key(BOILER)
+
+
+def test_deduplication():
+    merged = dedup.Deduplication(opt_model.ProductionMap(UNITS))
+    assert merged.production_map.production_units == [ENGINE, BOILER, GEAR_UNIT, PLATE_UNIT]
+    assert merged.aliases[ENGINE] == [ENGINE, TURBINE]
+    assert merged.canonical(PLATE_UNIT_2) is PLATE_UNIT
+    assert merged.nb_saved == 2
+    assert merged.summary() == "6 units merged into 4 columns, 2 saved"
+
+
+def test_caps_and_expand():
+    merged = dedup.Deduplication(opt_model.ProductionMap(UNITS))
+    caps = [(PLATE_UNIT, 5.0), (PLATE_UNIT_2, 10.0), (ENGINE, 1.0)]
+    merged_caps = merged.canonical_constraints(caps)
+    assert merged_caps == [(PLATE_UNIT, 15.0)]  # the turbine has no cap
+    result = optimizers.ORToolsOptimizer(
+        merged.production_map, [(GEAR, 6.0)], merged_caps, parameters=solver_parameters.SolverParameters(verbose=False)
+    ).optimize()
+    expanded = merged.expand(result, caps)
+    quantities = {prod_unit.recipe_name: prod_unit.quantity for prod_unit in expanded.production_units}
+    assert quantities == pytest.approx(
+        {"gear": 6.0, "plate": 5.0, "plate-1": 7.0, "elec-from-steam-engine-165": 0.5, "boil": 0.25}
+    )
@@ -0,0 +1,30 @@
+"""Test the energy sources."""
+import propt.domain.factorio.energy as energy
+import propt.domain.factorio.object_set as object_set
+import propt.domain.factorio.prototypes as prototypes
+
+
+def test_fluid_energy_temperatures():
+    steam = prototypes.Fluid(name="steam", default_temperature=15, heat_capacity=200)
+    recipes = object_set.RecipeSet(
+        prototypes.Recipe(
+            name=f"steam-{temp}",
+            category="boiling",
+            available_from_start=True,
+            hidden_from_player_crafting=True,
+            base_time=1.0,
+            ingredients=(),
+            products=(prototypes.ProductFluid(obj=steam, amount=1, temperature=temp),),
+        )
+        for temp in (15, 165, 500)
+    )
+    fluid_energy = energy.FluidEnergy(effectivity=1.0, burns_fluid=False, max_temperature=165)
+    building = prototypes.Building(
+        name="heater",
+        energy_usage=1000,
+        speed_coefficient=1.0,
+        crafting_categories=("heating",),
+        energy_info=fluid_energy,
+    )
+    sources = fluid_energy.return_sources(building, recipes, {}, {"steam": steam})
+    assert sorted(source.min_temperature for source in sources) == [15, 500]
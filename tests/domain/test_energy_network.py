@@ -0,0 +1,64 @@
+"""Test the electric network in MW."""
+import pytest
+
+import propt.adapters.optimizers as optimizers
+import propt.adapters.solver_parameters as solver_parameters
+import propt.domain.optimizer.energy_network as energy_network
+import propt.domain.optimizer.model as opt_model
+
+import tests.helpers as helpers
+
+GEAR = opt_model.Item(name="gear")
+STEAM = opt_model.Item(name="steam", temperature=165)
+ELECTRICITY = energy_network.ELECTRICITY
+ENERGY = opt_model.Item(name="Electricity", energy_ingredient=True)
+
+
+ASSEMBLER = helpers.unit("gear", {ENERGY: 75000.0}, {GEAR: 1.0})
+ENGINE = helpers.unit("elec-from-steam-engine-165", {STEAM: 30.0}, {ELECTRICITY: 900000.0}, "steam-engine")
+BOILER = helpers.unit("boil", {}, {STEAM: 60.0}, "boiler")
+
+
+@pytest.fixture
+def network() -> energy_network.EnergyNetwork:
+    return energy_network.EnergyNetwork(opt_model.ProductionMap([ASSEMBLER, ENGINE, BOILER]))
+
+
+def _optimize(production_map, item_constraints, prod_unit_constraints=()):
+    return optimizers.ORToolsOptimizer(
+        production_map,
+        item_constraints,
+        prod_unit_constraints,
+        parameters=solver_parameters.SolverParameters(verbose=False),
+    ).optimize()
+
+
+def test_scaled_units(network):
+    assembler, engine, boiler = network.production_map.production_units
+    assert assembler.ingredients[ELECTRICITY] == pytest.approx(0.075)
+    assert next(iter(assembler.ingredients)).energy_ingredient
+    assert engine.products[ELECTRICITY] == pytest.approx(0.9)
+    assert boiler is BOILER
+    assert network.supply == {engine: pytest.approx(0.9)}
+    assert network.demand == {assembler: pytest.approx(0.075)}
+
+
+def test_same_plan(network):
+    reference = _optimize(opt_model.ProductionMap([ASSEMBLER, ENGINE, BOILER]), [(GEAR, 24.0)], [(ASSEMBLER, 30)])
+    item_constraints, prod_unit_constraints = network.scale_constraints([(GEAR, 24.0)], [(ASSEMBLER, 30)])
+    assert prod_unit_constraints[0][0] in network.demand
+    result = network.unscale(_optimize(network.production_map, item_constraints, prod_unit_constraints))
+    assert {prod_unit: prod_unit.quantity for prod_unit in result.production_units} == pytest.approx(
+        {prod_unit: prod_unit.quantity for prod_unit in reference.production_units}
+    )
+    balance = network.power_balance(result)
+    assert balance.demand == pytest.approx({"assembler": 1.8})
+    assert balance.supply == pytest.approx({ENGINE.name: 1.8})
+    assert balance.surplus == pytest.approx(0.0)
+
+
+def test_electricity_target(network):
+    item_constraints, _ = network.scale_constraints([(ELECTRICITY, 4.5e6)])
+    assert item_constraints == [(ELECTRICITY, pytest.approx(4.5))]
+    result = _optimize(network.production_map, item_constraints)
+    assert network.power_balance(result).total_supply == pytest.approx(4.5)
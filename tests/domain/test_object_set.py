@@ -0,0 +1,49 @@
+"""Test the object sets."""
+import propt.domain.factorio.prototypes as prototypes
+import propt.domain.factorio.object_set as object_set
+import propt.domain.optimizer.model as opt_model
+
+
+def _steam_recipe(temperature: int) -> prototypes.Recipe:
+    return prototypes.Recipe(
+        name=f"steam-{temperature}",
+        category="boiling",
+        available_from_start=True,
+        hidden_from_player_crafting=True,
+        base_time=1.0,
+        ingredients=(),
+        products=(
+            prototypes.ProductFluid(
+                obj=prototypes.Fluid(name="steam"), amount=1, temperature=temperature
+            ),
+        ),
+    )
+
+
+def test_product_temperatures_between():
+    recipes = object_set.RecipeSet(_steam_recipe(temp) for temp in (500, 165, 250, 1000))
+    steam = prototypes.Fluid(name="steam")
+    assert recipes.product_temperatures_between(steam, 165, 500) == [165, 250, 500]
+    assert recipes.product_temperatures_between(steam, 166, 499) == [250]
+    assert recipes.product_temperatures_between(steam, 1001, 2000) == []
+    assert recipes.product_temperatures_between(prototypes.Fluid(name="water"), 0, 100) == []
+
+
+def test_expansion_cached_per_recipe_set():
+    recipes = object_set.RecipeSet(_steam_recipe(temp) for temp in (165, 500))
+    consumer = prototypes.Recipe(
+        name="turbine",
+        category="turbine",
+        available_from_start=True,
+        hidden_from_player_crafting=True,
+        base_time=1.0,
+        ingredients=(
+            prototypes.FluidIngredient(
+                obj=prototypes.Fluid(name="steam"), amount=1, min_temperature=100, max_temperature=600
+            ),
+        ),
+        products=(),
+    )
+    expansion = opt_model.ProductionUnit._expend_ingredients_on_temperature(consumer, recipes)
+    assert [item.temperature for item, _ in expansion[0]] == [165, 500]
+    assert opt_model.ProductionUnit._expend_ingredients_on_temperature(consumer, recipes) is expansion
@@ -0,0 +1,99 @@
+"""Test the ranking of the technologies to research."""
+import math
+
+import immutables
+import pytest
+
+import propt.adapters.optimizers as optimizers
+import propt.domain.factorio.prototypes as prototypes
+import propt.domain.optimizer.model as opt_model
+from propt.domain.factorio.technology_graph import TechnologyGraph
+from propt.domain.optimizer.research import ResearchEvaluator
+
+
+@pytest.fixture
+def fast_gear(small_items) -> prototypes.Technology:
+    """Unlock a gear recipe 5 times as fast."""
+    return prototypes.Technology(
+        name="fast-gear",
+        prerequisites=("steam-power",),
+        recipe_unlocked=(
+            prototypes.Recipe(
+                name="fast-gear",
+                category="crafting",
+                available_from_start=False,
+                hidden_from_player_crafting=True,
+                base_time=0.1,
+                ingredients=(prototypes.ItemIngredient(obj=small_items["plate"], amount=2),),
+                products=(prototypes.ProductItem(obj=small_items["gear"], amount=1),),
+            ),
+        ),
+    )
+
+
+@pytest.fixture
+def graph(steam_power, fast_gear) -> TechnologyGraph:
+    technologies = (
+        steam_power,
+        fast_gear,
+        prototypes.Technology(name="useless", recipe_unlocked=()),
+        prototypes.Technology(name="later", recipe_unlocked=(), prerequisites=("fast-gear",)),
+    )
+    return TechnologyGraph({technology.name: technology for technology in technologies})
+
+
+def _evaluator(unlocker, graph, max_workers=2) -> ResearchEvaluator:
+    return ResearchEvaluator(
+        unlocker=unlocker,
+        graph=graph,
+        optimizer_factory=lambda production_map: optimizers.ORToolsOptimizer(
+            production_map, [(opt_model.Item(name="gear"), 10.0)], []
+        ),
+        max_workers=max_workers,
+    )
+
+
+def test_feasible_only_after_research(unlocker, graph):
+    ranking = _evaluator(unlocker, graph).evaluate()
+    assert [candidate.technology.name for candidate in ranking] == ["steam-power", "useless"]
+    assert ranking[0].improvement == math.inf
+    assert ranking[1].improvement is None
+
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_ranking(unlocker, graph, steam_power, max_workers):
+    unlocker.unlock([steam_power])
+    size = len(unlocker.production_map.production_units)
+    ranking = _evaluator(unlocker, graph, max_workers).evaluate()
+    assert [candidate.technology.name for candidate in ranking] == ["fast-gear", "useless"]
+    assert ranking[0].improvement > 0
+    assert ranking[1].improvement == pytest.approx(0)
+    assert ranking[0].objective == pytest.approx(ranking[1].objective - ranking[0].improvement)
+    assert len(unlocker.production_map.production_units) == size
+
+
+def test_default_evaluate_with(small_production_map):
+    optimizer = optimizers.ORToolsOptimizer(
+        small_production_map, [(opt_model.Item(name="gear"), 10.0)], []
+    )
+    warm = optimizer.evaluate_with(())
+    assert opt_model.Optimizer.evaluate_with(optimizer, ()) == pytest.approx(warm)
+
+
+def test_evaluate_with_keeps_the_map(small_production_map):
+    optimizer = optimizers.ORToolsOptimizer(small_production_map, [(opt_model.Item(name="gear"), 10.0)], [])
+    size = len(small_production_map.production_units)
+    fast_gear = opt_model.ProductionUnit(
+        recipe_name="fast-gear",
+        building_name="assembler",
+        ingredients=immutables.Map({opt_model.Item(name="plate"): 2.0}),
+        products=immutables.Map({opt_model.Item(name="gear"): 5.0}),
+    )
+    with_fast_gear = optimizer.evaluate_with([fast_gear])
+    assert len(small_production_map.production_units) == size
+    assert optimizer.evaluate_with(()) > with_fast_gear
+    nb_variables = optimizer.solver.NumVariables()
+    optimizer.add_production_units([fast_gear])
+    assert optimizer.solver.NumVariables() == nb_variables  # the column of evaluate_with is used
+    result = optimizer.optimize()
+    assert sum(prod_unit.quantity for prod_unit in result.production_units) == pytest.approx(with_fast_gear)
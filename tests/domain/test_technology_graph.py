@@ -0,0 +1,105 @@
+"""Test the technology prerequisite graph."""
+import pytest
+
+import propt.domain.factorio.object_set as object_set
+import propt.domain.factorio.prototypes as prototypes
+from propt.domain.factorio.technology_graph import TechnologyGraph
+
+
+def _recipe(name: str) -> prototypes.Recipe:
+    return prototypes.Recipe(
+        name=name,
+        category="crafting",
+        available_from_start=False,
+        hidden_from_player_crafting=False,
+        base_time=1.0,
+        ingredients=(),
+        products=(),
+    )
+
+
+@pytest.fixture
+def technologies() -> dict[str, prototypes.Technology]:
+    """automation <- logistics, automation <- electronics, (logistics, electronics) <- advanced."""
+
+    def tech(name, recipes=(), prerequisites=()):
+        return prototypes.Technology(
+            name=name,
+            recipe_unlocked=tuple(map(_recipe, recipes)),
+            prerequisites=prerequisites,
+        )
+
+    return {
+        technology.name: technology
+        for technology in (
+            tech("advanced", ("robot",), ("logistics", "electronics")),
+            tech("logistics", ("belt",), ("automation",)),
+            tech("electronics", ("circuit",), ("automation",)),
+            tech("automation", ("assembler",)),
+            tech("unrelated", ("pipe",)),
+        )
+    }
+
+
+@pytest.fixture
+def graph(technologies) -> TechnologyGraph:
+    return TechnologyGraph(technologies)
+
+
+def test_topological_order(graph):
+    position = {technology.name: idx for idx, technology in enumerate(graph.technologies)}
+    for technology in graph.technologies:
+        for prerequisite in technology.prerequisites:
+            assert position[prerequisite] < position[technology.name]
+
+
+def test_requirements(graph, technologies):
+    assert graph.requirements("advanced") == {
+        technologies["logistics"], technologies["electronics"], technologies["automation"]
+    }
+    assert graph.requirements(technologies["automation"]) == frozenset()
+    assert graph.requirements_mask("advanced") == graph.mask(["logistics", "electronics", "automation"])
+
+
+def test_recipes_unlocked_by(graph):
+    assert {recipe.name for recipe in graph.recipes_unlocked_by("advanced")} == {
+        "robot", "belt", "circuit", "assembler"
+    }
+    assert {recipe.name for recipe in graph.recipes_unlocked_by("unrelated")} == {"pipe"}
+
+
+def test_closure_and_missing(graph, technologies):
+    closure = graph.closure(["advanced"])
+    assert isinstance(closure, object_set.TechnologySet)
+    assert {technology.name for technology in closure} == {
+        "advanced", "logistics", "electronics", "automation"
+    }
+    assert graph.is_closed(closure)
+    assert {technology.name for technology in graph.missing_prerequisites(["advanced", "logistics"])} == {
+        "electronics", "automation"
+    }
+    with pytest.raises(ValueError, match="electronics"):
+        object_set.TechnologySet([technologies["advanced"], technologies["logistics"]]).check_prerequisites(graph)
+    closure.check_prerequisites(graph)
+
+
+def test_cycle_and_unknown(technologies):
+    cyclic = dict(technologies)
+    cyclic["automation"] = prototypes.Technology(
+        name="automation", recipe_unlocked=(), prerequisites=("advanced",)
+    )
+    with pytest.raises(ValueError, match="Cycle"):
+        TechnologyGraph(cyclic)
+    unknown = dict(technologies)
+    unknown["unrelated"] = prototypes.Technology(
+        name="unrelated", recipe_unlocked=(), prerequisites=("nope",)
+    )
+    with pytest.raises(KeyError, match="nope"):
+        TechnologyGraph(unknown)
+
+
+def test_researchable(graph):
+    assert {technology.name for technology in graph.researchable([])} == {"automation", "unrelated"}
+    assert {technology.name for technology in graph.researchable(["automation", "logistics"])} == {
+        "electronics", "unrelated"
+    }
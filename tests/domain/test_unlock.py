@@ -0,0 +1,60 @@
+"""Test the incremental update of a factory on technology unlock."""
+import pytest
+
+import propt.adapters.optimizers as optimizers
+import propt.domain.optimizer.model as opt_model
+import propt.domain.optimizer.unlock as unlock
+
+
+def _unit_keys(production_map):
+    return sorted(
+        (unit.name, sorted(map(str, unit.ingredients.items())), sorted(map(str, unit.products.items())))
+        for unit in production_map.production_units
+    )
+
+
+def test_compute_delta_does_not_mutate(unlocker, steam_power):
+    size = len(unlocker.production_map.production_units)
+    delta = unlocker.compute_delta([steam_power])
+    assert {recipe.name for recipe in delta.recipes} == {"steam", "elec-from-steam-engine-165", "boiler"}
+    assert {building.name for building in delta.buildings} == {"boiler"}
+    assert {fluid.name: temps for fluid, temps in delta.temperatures.items()} == {"steam": {165}}
+    assert len(unlocker.production_map.production_units) == size
+    assert not unlocker.technologies
+    assert unlocker.compute_delta([steam_power]) == delta
+
+
+def test_unlock_matches_full_rebuild(
+    unlocker, steam_power, all_recipes, small_buildings, small_items, small_fluids
+):
+    unlocker.unlock([steam_power])
+    rebuilt = opt_model.ProductionMap.from_repositories(
+        available_recipes=all_recipes,
+        available_buildings=small_buildings,
+        item_repo=small_items,
+        fluid_repo=small_fluids,
+    )
+    assert _unit_keys(unlocker.production_map) == _unit_keys(rebuilt)
+    assert unlocker.available_recipes == all_recipes
+    assert unlocker.available_buildings == small_buildings
+    assert not unlocker.compute_delta([steam_power]).production_units
+
+
+def test_unlock_resolves_warm_optimizer(unlocker, steam_power):
+    optimizer = optimizers.ORToolsOptimizer(
+        unlocker.production_map, [(opt_model.Item(name="gear"), 1.0)], []
+    )
+    unlocker.optimizer = optimizer
+    with pytest.raises(opt_model.SolutionNotFound):  # nothing makes electricity yet
+        optimizer.optimize()
+    unlocker.unlock([steam_power])
+    result = optimizer.optimize()
+    assert {"boiler", "steam-engine"} <= {unit.building_name for unit in result.production_units}
+
+
+def test_uses_temperatures(all_recipes, small_fluids):
+    engine = next(recipe for recipe in all_recipes if recipe.name == "elec-from-steam-engine-165")
+    steam = small_fluids["steam"]
+    assert unlock.TechnologyUnlocker._uses_temperatures(engine, {steam: {165}}, all_recipes)
+    assert not unlock.TechnologyUnlocker._uses_temperatures(engine, {steam: {500}}, all_recipes)
+    assert not unlock.TechnologyUnlocker._uses_temperatures(engine, {small_fluids["water"]: {15}}, all_recipes)
@@ -0,0 +1,29 @@
+"""Helpers shared by the tests."""
+from typing import Mapping, Union
+
+import immutables
+
+import propt.domain.optimizer.model as opt_model
+
+
+def unit(
+    name: str,
+    ingredients: Mapping[Union[opt_model.Item, str], float],
+    products: Mapping[Union[opt_model.Item, str], float],
+    building: str = "assembler",
+    quantity: float = 0,
+) -> opt_model.ProductionUnit:
+    """A production unit made by hand for the optimizer tests; items can be given by name."""
+
+    def rates(items: Mapping[Union[opt_model.Item, str], float]) -> immutables.Map[opt_model.Item, float]:
+        return immutables.Map(
+            {opt_model.Item(name=item) if isinstance(item, str) else item: rate for item, rate in items.items()}
+        )
+
+    return opt_model.ProductionUnit(
+        recipe_name=name,
+        building_name=building,
+        ingredients=rates(ingredients),
+        products=rates(products),
+        quantity=quantity,
+    )